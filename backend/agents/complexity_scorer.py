@@ -0,0 +1,233 @@
+"""
+Local heuristic complexity scorer.
+Estimates query complexity from lexical features so trivial queries skip the LLM analyzer.
+"""
+
+from dataclasses import dataclass
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+import json
+import os
+import re
+
+from config.settings import Settings
+
+_WORD = re.compile(r"[A-Za-z0-9][\w\-\.]*")
+_CONJUNCTIONS = {"and", "or", "versus", "vs", "plus", "&"}
+_COMPARISON = {
+    "compare", "comparison", "comparing", "versus", "vs", "difference", "differences",
+    "better", "best", "alternatives", "tradeoffs", "trade-offs", "pros", "cons", "between",
+}
+_BROAD = {
+    "impact", "implications", "future", "trends", "ethics", "risks", "strategy",
+    "landscape", "ecosystem", "economics", "policy", "regulation", "society", "adoption",
+}
+_DEFINITIONAL = ("what is", "what are", "define", "definition of", "who is", "meaning of")
+_PROCEDURAL = ("how to", "how do", "how does", "steps to", "guide to")
+_ANALYTICAL = ("why", "should", "to what extent", "evaluate", "assess", "analyze")
+
+# Order matters: it is the layout of the calibrated weight vector (after the bias)
+FEATURES = ["words", "conjunctions", "comparison", "entities", "broad", "definitional", "procedural", "analytical"]
+
+# Hand-tuned starting weights, replaced once enough LLM analyses have been logged
+_DEFAULT_WEIGHTS = {
+    "bias": 1.2,
+    "words": 0.12,
+    "conjunctions": 0.45,
+    "comparison": 0.6,
+    "entities": 0.25,
+    "broad": 0.55,
+    "definitional": -0.9,
+    "procedural": 0.2,
+    "analytical": 0.7,
+}
+# Confidence ceiling of the uncalibrated model
+_DEFAULT_RELIABILITY = 0.85
+
+
+@dataclass
+class ComplexityEstimate:
+    """Result of a local complexity estimate"""
+
+    complexity_score: int
+    confidence: float
+    features: Dict[str, float]
+
+
+class HeuristicComplexityScorer:
+    """Linear model over lexical query features, calibrated against logged LLM analyses"""
+
+    def __init__(self, samples_path: Optional[str] = None, weights_path: Optional[str] = None):
+        """
+        Args:
+            samples_path: JSONL log of (features, LLM score) pairs (default from settings)
+            weights_path: Calibrated weights file (default from settings)
+        """
+        self.samples_path = samples_path or os.path.join(Settings.DATA_DIR, "complexity_samples.jsonl")
+        self.weights_path = weights_path or os.path.join(Settings.DATA_DIR, "complexity_weights.json")
+        self._lock = Lock()
+        # Guards the samples log, so rotating it never holds up estimates
+        self._log_lock = Lock()
+        self._samples_since_calibration = 0
+        self._calibration: Optional[Thread] = None
+        self.weights = dict(_DEFAULT_WEIGHTS)
+        self.reliability = _DEFAULT_RELIABILITY
+        self._load_weights()
+
+    @staticmethod
+    def extract_features(query: str) -> Dict[str, float]:
+        """Compute the lexical features of a query"""
+        text = query.strip().lower()
+        words = _WORD.findall(query)
+        lowered = [w.lower() for w in words]
+        # Capitalized words past the first, acronyms and numbers approximate named entities
+        entities = sum(
+            1 for i, w in enumerate(words)
+            if (i > 0 and w[0].isupper()) or (len(w) > 1 and w.isupper()) or any(c.isdigit() for c in w)
+        )
+        return {
+            "words": float(len(words)),
+            "conjunctions": float(sum(1 for w in lowered if w in _CONJUNCTIONS) + query.count(",")),
+            "comparison": float(sum(1 for w in lowered if w in _COMPARISON)),
+            "entities": float(entities),
+            "broad": float(sum(1 for w in lowered if w in _BROAD)),
+            "definitional": 1.0 if text.startswith(_DEFINITIONAL) else 0.0,
+            "procedural": 1.0 if text.startswith(_PROCEDURAL) else 0.0,
+            "analytical": 1.0 if text.startswith(_ANALYTICAL) else 0.0,
+        }
+
+    def estimate(self, query: str) -> ComplexityEstimate:
+        """
+        Estimate complexity without any network call.
+
+        Confidence is highest when the raw score lands near a whole score and is
+        capped by how well the model agreed with the LLM at calibration time. A raw
+        score outside 1-5 is extrapolation: its distance to the clamped score counts
+        against confidence like a distance to a whole score does.
+        """
+        features = self.extract_features(query)
+        with self._lock:
+            weights, reliability = self.weights, self.reliability
+        raw = weights["bias"] + sum(weights[name] * features[name] for name in FEATURES)
+        score = int(round(max(1.0, min(5.0, raw))))
+        margin = abs(raw - score)  # 0 (on a whole score) .. 0.5 (halfway between two) and beyond
+        confidence = round(reliability * max(0.0, 1.0 - 2.0 * margin), 3)
+        return ComplexityEstimate(complexity_score=score, confidence=confidence, features=features)
+
+    def record(self, query: str, llm_score: int) -> None:
+        """Log an LLM analysis for calibration and periodically recalibrate in the background"""
+        sample = {"features": self.extract_features(query), "score": int(llm_score)}
+        try:
+            directory = os.path.dirname(self.samples_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._log_lock:
+                with open(self.samples_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(sample) + "\n")
+                self._samples_since_calibration += 1
+                due = self._samples_since_calibration >= Settings.HEURISTIC_RECALIBRATE_EVERY
+                if due and (self._calibration is None or not self._calibration.is_alive()):
+                    # The refit reads every sample: keep it off the request thread
+                    self._samples_since_calibration = 0
+                    self._calibration = Thread(target=self.calibrate, name="complexity-calibration", daemon=True)
+                    self._calibration.start()
+        except OSError as e:
+            print(f"❌ Complexity sample logging error: {e}")
+
+    def calibrate(self) -> bool:
+        """
+        Refit weights to the logged LLM scores with ridge-regularized least squares,
+        after trimming the log to the newest HEURISTIC_MAX_SAMPLES.
+
+        Returns:
+            True if new weights were fitted and saved
+        """
+        samples = self._rotate_samples()
+        if len(samples) < Settings.HEURISTIC_MIN_SAMPLES:
+            return False
+
+        rows = [[1.0] + [s["features"].get(name, 0.0) for name in FEATURES] for s in samples]
+        targets = [float(s["score"]) for s in samples]
+        solution = _ridge_fit(rows, targets, ridge=0.1)
+        if solution is None:
+            return False
+
+        weights = {"bias": solution[0], **{name: w for name, w in zip(FEATURES, solution[1:])}}
+        hits = sum(
+            1 for row, target in zip(rows, targets)
+            if round(max(1.0, min(5.0, sum(w * x for w, x in zip(solution, row))))) == target
+        )
+        reliability = hits / len(samples)
+
+        with self._lock:
+            self.weights = weights
+            self.reliability = reliability
+        try:
+            with open(self.weights_path, "w", encoding="utf-8") as f:
+                json.dump({"weights": weights, "reliability": reliability, "samples": len(samples)}, f)
+        except OSError as e:
+            print(f"❌ Complexity weights save error: {e}")
+        return True
+
+    def _rotate_samples(self) -> List[Dict]:
+        """The newest samples, rewriting the log to only them when it has grown past the cap"""
+        with self._log_lock:
+            samples = self._load_samples()
+            if len(samples) <= Settings.HEURISTIC_MAX_SAMPLES:
+                return samples
+            samples = samples[-Settings.HEURISTIC_MAX_SAMPLES:]
+            try:
+                # Replaced in one step, so a crash never leaves a truncated log
+                partial = f"{self.samples_path}.tmp"
+                with open(partial, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(sample) + "\n" for sample in samples)
+                os.replace(partial, self.samples_path)
+            except OSError as e:
+                print(f"❌ Complexity sample rotation error: {e}")
+        return samples
+
+    def _load_samples(self) -> List[Dict]:
+        samples = []
+        try:
+            with open(self.samples_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        samples.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return samples
+
+    def _load_weights(self) -> None:
+        try:
+            with open(self.weights_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.weights = {**_DEFAULT_WEIGHTS, **saved["weights"]}
+            self.reliability = float(saved["reliability"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+
+def _ridge_fit(rows: List[List[float]], targets: List[float], ridge: float) -> Optional[List[float]]:
+    """Solve (XᵀX + λI)w = Xᵀy by Gaussian elimination (no numpy dependency)"""
+    n = len(rows[0])
+    a = [[sum(r[i] * r[j] for r in rows) + (ridge if i == j and i > 0 else 0.0) for j in range(n)] for i in range(n)]
+    b = [sum(r[i] * y for r, y in zip(rows, targets)) for i in range(n)]
+
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        if abs(a[pivot][col]) < 1e-12:
+            return None
+        a[col], a[pivot] = a[pivot], a[col]
+        b[col], b[pivot] = b[pivot], b[col]
+        for r in range(col + 1, n):
+            factor = a[r][col] / a[col][col]
+            for c in range(col, n):
+                a[r][c] -= factor * a[col][c]
+            b[r] -= factor * b[col]
+
+    solution = [0.0] * n
+    for i in reversed(range(n)):
+        solution[i] = (b[i] - sum(a[i][j] * solution[j] for j in range(i + 1, n))) / a[i][i]
+    return solution
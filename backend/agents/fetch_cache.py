@@ -0,0 +1,83 @@
+"""
+Shared fetch cache for batch research.
+Deduplicates identical subtask searches across the queries of one batch.
+"""
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.cancellation import CancellationToken, Cancelled, SharedCancellation
+from utils.singleflight import SingleFlight
+
+
+class SharedFetchCache:
+    """Memoizes (search query, result count) fetches and bounds concurrent upstream searches"""
+
+    def __init__(self, max_concurrent_fetches: int):
+        """
+        Args:
+            max_concurrent_fetches: Upper bound on searches running at once across the batch
+        """
+        self._results: Dict[Tuple[str, int], tuple] = {}
+        self._lock = Lock()
+        self._inflight = SingleFlight()
+        self._slots = BoundedSemaphore(max_concurrent_fetches)
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, search_query: str, num_results: int, loader: Callable[[str, int, CancellationToken], tuple], cancel: Optional[CancellationToken] = None) -> tuple:
+        """
+        Return the cached fetch for a search, running loader once if it is new.
+
+        Args:
+            search_query: What to search for
+            num_results: Number of results requested
+            loader: Fetch function taking (query, count, cancellation token), e.g. SubAgent._fetch
+            cancel: The calling query's token; the shared search is abandoned only
+                once every query waiting on it has cancelled
+
+        Returns:
+            The loader's (results, origin) tuple; only fetches that found results are kept
+
+        Raises:
+            Cancelled: If cancel was cancelled before the results arrived
+        """
+        key = (" ".join(search_query.casefold().split()), num_results)
+
+        def join(leader_cancel: SharedCancellation) -> None:
+            leader_cancel.attach(cancel)
+
+        while True:
+            with self._lock:
+                if key in self._results:
+                    self.hits += 1
+                    return self._results[key]
+            shared_cancel = SharedCancellation()
+            shared_cancel.attach(cancel)
+
+            def load() -> tuple:
+                with self._slots:
+                    return loader(search_query, num_results, shared_cancel)
+
+            try:
+                value, shared = self._inflight.do(key, load, context=shared_cancel, on_join=join, cancel=cancel)
+            except Cancelled:
+                if cancel is not None and cancel.cancelled:
+                    raise
+                # Every query waiting on that search had cancelled before this one joined: search again
+                continue
+            with self._lock:
+                # No results may be a transient Exa error or an open breaker: the next query retries
+                if value[0]:
+                    self._results[key] = value
+                if shared:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if cancel is not None:
+                # A leader runs the search to the end for the others, then honours its own token
+                cancel.raise_if_cancelled()
+            return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"unique_searches": self.misses, "deduplicated_searches": self.hits}
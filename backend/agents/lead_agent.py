@@ -2,19 +2,53 @@
 Lead agent for orchestrating multi-agent research.
 Plans, delegates, and synthesizes research findings.
 """
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+from config.settings import Settings
 from services.ai_service import AIService
+from services.checkpoint_store import COMPLETE, INTERRUPTED, Checkpoint, CheckpointNotFound, CheckpointStore
+from services.result_cache import ResultCache
+from agents.fetch_cache import SharedFetchCache
+from agents.postprocessing import encode_sources, rank_sources, sanitize_report
 from agents.sub_agent import SubAgent
+from agents.query_analyzer import QueryAnalyzer
+from agents.scheduler import SubtaskScheduler, focus_similarity
 from utils.prompts import Prompts
 from utils.activity import activity_manager
+from utils.admission import Overloaded
+from utils.cancellation import CancellationToken, Cancelled, SharedCancellation
+from utils.cpu_pool import CPUTaskError, cpu_pool
+from utils.deadline import Deadline, stage_timeout
+from utils.singleflight import SingleFlight
+from utils.threads import ContextThreadPoolExecutor
+from utils.usage import CHARS_PER_TOKEN, Usage, current_usage, estimate_tokens, usage_ledger
+
+# Opening of a partial report, by why the synthesis is missing
+_MISSING_SYNTHESIS = {
+    "deadline": "The full synthesis could not be completed within the time budget.",
+    "token_budget": "The token budget was too small for a full synthesis.",
+    "failed": "The full synthesis could not be generated.",
+}
 
 class LeadAgent:
     """Orchestrates research across multiple subagents"""
     
-    def __init__(self, ai_service: AIService, sub_agent: SubAgent):
+    def __init__(self, ai_service: AIService, sub_agent: SubAgent, query_analyzer: Optional[QueryAnalyzer] = None, checkpoints: Optional[CheckpointStore] = None, result_cache: Optional[ResultCache] = None):
         self.ai_service = ai_service
         self.sub_agent = sub_agent
+        self.query_analyzer = query_analyzer or QueryAnalyzer(ai_service)
+        self.checkpoints = checkpoints
+        self.result_cache = result_cache
+        self._inflight = SingleFlight()
+        # Pipeline runs in progress, waited out before the stores they write to are closed
+        self._running = 0
+        self._idle = threading.Condition()
     
-    def research(self, query: str, num_results_per_agent: int = 2, silent: bool = False, session_id: str | None = None) -> dict:
+    def research(self, query: str, num_results_per_agent: int = 2, silent: bool = False, session_id: str | None = None, model: str | None = None, deadline_ms: int | None = None, fetch_cache: SharedFetchCache | None = None, cancel: CancellationToken | None = None, resume_from: Checkpoint | None = None, refine_session_id: str | None = None, use_cache: bool = True, token_budget: int | None = None, account: str | None = None) -> dict:
         """
         Conduct multi-agent research on a query.
         
@@ -22,7 +56,285 @@ class LeadAgent:
             query: Research question or topic
             num_results_per_agent: Number of search results to gather per subagent
             silent: If True, suppress console output (for API usage)
+            session_id: Activity session to log progress to
+            model: AI model to use (default from settings)
+            deadline_ms: Latency budget; the best report achievable within it is returned
+            fetch_cache: Batch-wide cache that deduplicates searches across queries
+            cancel: Token that abandons the research (searches stop, LLM calls abort)
+            resume_from: Checkpoint of an interrupted run whose completed stages are reused
+            refine_session_id: Completed session this query follows up on; its sources
+                are reused, only uncovered angles are searched and its report is refined
+            use_cache: Answer from the result cache when it holds a fresh result (plain
+                requests only: no deadline, resume or follow-up); False always researches
+                and caches the new result
+            token_budget: LLM tokens the research may spend; the synthesis' output
+                and context are capped to what is left of it
+            account: API key (tenant) the usage is billed to and the session belongs to
+            
+        Returns:
+            The research result with a "usage" block of this call's tokens and searches
+            (empty when it was answered from the cache or joined an identical run)
+            
+        Raises:
+            Cancelled: If cancel was cancelled before the research completed
+            CheckpointNotFound: If refine_session_id has no completed result of account's
+        """
+        model = model or Settings.AI_MODEL
+        cache_key = None
+        usage = Usage(account or "anonymous", token_budget)
+        if self.result_cache is not None and deadline_ms is None and token_budget is None and resume_from is None and refine_session_id is None:
+            cache_key = (self.normalize_query(query), num_results_per_agent, model)
+            cached = self.result_cache.get(cache_key, query) if use_cache else None
+            if cached is not None:
+                result = self._serve_cached(query, *cached, session_id=session_id, num_results_per_agent=num_results_per_agent, model=model, account=usage.account)
+                return {**result, "usage": usage.report()}
+        prior = self._prior_result(refine_session_id, usage.account) if refine_session_id else None
+        
+        # Identical concurrent requests share one pipeline run; joiners mirror its activity.
+        # The shared run is cancelled only once every caller waiting on it has cancelled.
+        # A resumed session continues its own checkpoints, so it is never coalesced.
+        key = (self.normalize_query(query), num_results_per_agent, model, deadline_ms, token_budget, resume_from and resume_from.session_id, refine_session_id)
+        shared_cancel = SharedCancellation()
+        shared_cancel.attach(cancel)
+        
+        def join(context: tuple) -> None:
+            leader_session_id, leader_cancel = context
+            leader_cancel.attach(cancel)
+            follower = activity_manager.get(session_id)
+            activity_manager.get(leader_session_id).add_mirror(follower)
+            follower.log("Joined identical in-flight research", data={"coalesced": True})
+        
+        def run() -> dict:
+            try:
+                # Upstream calls anywhere in the pipeline bill this run
+                with usage.scope():
+                    result = self._research(
+                        query,
+                        num_results_per_agent=num_results_per_agent,
+                        silent=silent,
+                        session_id=session_id,
+                        model=model,
+                        deadline_ms=deadline_ms,
+                        fetch_cache=fetch_cache,
+                        cancel=shared_cancel,
+                        resume_from=resume_from,
+                        prior=prior,
+                        token_budget=token_budget,
+                        account=usage.account,
+                    )
+            except Cancelled as e:
+                self._interrupted(session_id)
+                logger = activity_manager.get(session_id)
+                logger.log("Research cancelled", type="cancelled", data={"reason": str(e)})
+                logger.complete("cancelled")
+                raise
+            except Exception:
+                self._interrupted(session_id)
+                raise
+            finally:
+                usage_ledger.add(usage, session_id)
+            if cache_key is not None:
+                self.result_cache.put(cache_key, result)
+            return result
+        
+        result, shared = self._inflight.do(key, lambda: self._tracked(run), context=(session_id, shared_cancel), on_join=join, cancel=cancel)
+        if shared:
+            # A coalesced caller's session owns the result too, so it can be resumed or refined
+            self._adopt_result(
+                session_id, query, result,
+                {
+                    "num_results_per_agent": num_results_per_agent,
+                    "model": model,
+                    "deadline_ms": deadline_ms,
+                    "refine_session_id": refine_session_id,
+                    "token_budget": token_budget,
+                    "account": usage.account,
+                },
+            )
+        # The result may be shared with coalesced callers; usage is per caller
+        return {**result, "usage": usage.report()}
+    
+    def research_batch(self, queries: List[str], num_results_per_agent: int = 2, model: str | None = None, deadline_ms: int | None = None, session_ids: List[str] | None = None, max_workers: int | None = None, cancel_tokens: List[CancellationToken] | None = None, admit: Callable[[CancellationToken], ContextManager] | None = None, token_budget: int | None = None, account: str | None = None, resume: bool = False) -> Iterator[dict]:
+        """
+        Research many queries through one bounded worker pool.
+        
+        Identical queries run once, and identical subtask searches are shared
+        across the whole batch through a SharedFetchCache.
+        
+        Args:
+            queries: Research questions
+            num_results_per_agent: Number of usable sources per subagent
+            model: AI model to use (default from settings)
+            deadline_ms: Per-query latency budget
+            session_ids: Activity session per query (same order as queries)
+            max_workers: Queries researched concurrently (default from settings)
+            cancel_tokens: Cancellation token per query (same order as queries); a
+                duplicated query stops only when all of its copies are cancelled
+            admit: Returns the context a query must hold while it runs (e.g. a fair
+                scheduler slot); called with the query's cancellation token
+            token_budget: Per-query LLM token budget
+            account: API key (tenant) the usage is billed to
+            resume: Continue a query from its session's checkpoint when an earlier run
+                with the same parameters left one (e.g. an interrupted CLI run)
+            
+        Yields:
+            {"index", "query", "session_id", "elapsed_ms", "result"} or {..., "error"} as
+            each query completes, then a final {"summary": {...}} with deduplication counts
+        """
+        session_ids = session_ids or [None] * len(queries)
+        cancel_tokens = cancel_tokens or [None] * len(queries)
+        cache = SharedFetchCache(Settings.BATCH_MAX_CONCURRENT_SEARCHES)
+        
+        # Group duplicate queries; the first occurrence runs, the rest mirror its activity
+        groups: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            groups.setdefault(self.normalize_query(query), []).append(index)
+        
+        params = {"num_results_per_agent": num_results_per_agent, "model": model or Settings.AI_MODEL, "deadline_ms": deadline_ms, "token_budget": token_budget}
+        
+        def resumable(session_id: str | None) -> bool:
+            saved = self.checkpoints.load(session_id) if resume and self.checkpoints is not None and session_id else None
+            return (
+                saved is not None and self._owned_by(saved, account)
+                and not saved.params.get("refine_session_id")
+                and all(saved.params.get(name) == value for name, value in params.items())
+            )
+        
+        def run(query: str, session_id: str | None, cancel: CancellationToken) -> tuple:
+            started = time.monotonic()
+            with admit(cancel) if admit is not None else nullcontext():
+                if resumable(session_id):
+                    result = self.resume(session_id, cancel=cancel, account=account)
+                else:
+                    result = self.research(
+                        query, num_results_per_agent=num_results_per_agent, silent=True, session_id=session_id,
+                        model=model, deadline_ms=deadline_ms, fetch_cache=cache, cancel=cancel,
+                        token_budget=token_budget, account=account,
+                    )
+            return result, int((time.monotonic() - started) * 1000)
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers or Settings.BATCH_MAX_WORKERS)
+        try:
+            futures = {}
+            for indices in groups.values():
+                leader = indices[0]
+                for index in indices[1:]:
+                    activity_manager.get(session_ids[leader]).add_mirror(activity_manager.get(session_ids[index]))
+                group_cancel = SharedCancellation()
+                for index in indices:
+                    group_cancel.attach(cancel_tokens[index])
+                future = executor.submit(run, queries[leader], session_ids[leader], group_cancel)
+                futures[future] = indices
+            
+            for future in as_completed(futures):
+                for index in futures[future]:
+                    item = {"index": index, "query": queries[index], "session_id": session_ids[index]}
+                    try:
+                        item["result"], item["elapsed_ms"] = future.result()
+                    except Cancelled as e:
+                        item["error"] = f"cancelled: {e}"
+                        item["cancelled"] = True
+                    except Overloaded as e:
+                        item["error"] = f"overloaded: {e}"
+                        item["overloaded"] = True
+                        item["retry_after"] = e.retry_after
+                    except Exception as e:
+                        item["error"] = str(e)
+                    yield item
+            
+            yield {"summary": {"queries": len(queries), "unique_queries": len(groups), **cache.stats()}}
+        finally:
+            # The consumer may stop early (e.g. client disconnected)
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def resume(self, session_id: str, silent: bool = True, cancel: CancellationToken | None = None, account: str | None = None) -> dict:
         """
+        Resume an interrupted research session from its last checkpoint.
+        
+        Stages saved before the interruption (plan, finished subagents, map
+        summaries) are reused; only the remaining work runs again.
+        
+        Args:
+            session_id: Session of the interrupted research
+            silent: If True, suppress console output (for API usage)
+            cancel: Token that abandons the resumed research
+            account: API key (tenant) the usage is billed to; only its own sessions resume
+            
+        Returns:
+            The research result (the saved one if the session already completed);
+            its usage covers only the work done by this call
+            
+        Raises:
+            CheckpointNotFound: If the session has no checkpoint of account's
+            CheckpointBusy: If the session is still running (here or on another worker)
+        """
+        if self.checkpoints is None:
+            raise RuntimeError("Checkpointing is disabled")
+        # Another API key's session is reported as unknown, before it can be claimed
+        saved = self.checkpoints.load(session_id)
+        if saved is None or not self._owned_by(saved, account):
+            raise CheckpointNotFound(session_id)
+        checkpoint = self.checkpoints.claim(session_id)
+        if "result" in checkpoint.stages:
+            return {**checkpoint.stages["result"], "usage": Usage(account or "anonymous").report()}
+        params = checkpoint.params
+        return self.research(
+            checkpoint.query,
+            num_results_per_agent=params["num_results_per_agent"],
+            silent=silent,
+            session_id=session_id,
+            model=params["model"],
+            deadline_ms=params["deadline_ms"],
+            cancel=cancel,
+            resume_from=checkpoint,
+            refine_session_id=params.get("refine_session_id"),
+            token_budget=params.get("token_budget"),
+            account=account,
+        )
+    
+    def wait_idle(self, timeout: float) -> bool:
+        """
+        Wait for running pipelines to return (e.g. after they were cancelled at shutdown).
+        
+        Returns:
+            False if some were still running after timeout seconds
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._running == 0, timeout)
+    
+    def _tracked(self, run: Callable[[], dict]) -> dict:
+        """Run a pipeline, counted for wait_idle"""
+        with self._idle:
+            self._running += 1
+        try:
+            return run()
+        finally:
+            with self._idle:
+                self._running -= 1
+                if self._running == 0:
+                    self._idle.notify_all()
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Canonical form of a query used to detect identical requests"""
+        return " ".join(query.casefold().split()).rstrip("?.! ")
+    
+    def _research(self, query: str, *, num_results_per_agent: int, silent: bool, session_id: str | None, model: str, deadline_ms: int | None, fetch_cache: SharedFetchCache | None, cancel: CancellationToken, resume_from: Checkpoint | None, prior: dict | None, token_budget: int | None, account: str) -> dict:
+        """Run the full plan → search → synthesize pipeline, checkpointing each stage"""
+        cancel.raise_if_cancelled()
+        saved = resume_from.stages if resume_from is not None else {}
+        if resume_from is None and self.checkpoints is not None and session_id:
+            self.checkpoints.start(
+                session_id, query,
+                {
+                    "num_results_per_agent": num_results_per_agent,
+                    "model": model,
+                    "deadline_ms": deadline_ms,
+                    "refine_session_id": prior and prior["session_id"],
+                    "token_budget": token_budget,
+                    "account": account,
+                },
+            )
         # Initialize activity for session
         logger = activity_manager.get(session_id)
         logger.reset(query)
@@ -31,37 +343,204 @@ class LeadAgent:
             print(f"🤖 Multi-Agent Research: {query}")
             print("-" * 50)
         
-        # Step 1: Plan and delegate
-        logger.set_status("planning")
-        logger.log("LEAD AGENT: Planning and delegating...")
-        if not silent:
-            print("👨‍💼 LEAD AGENT: Planning and delegating...")
-        
-        plan = self.ai_service.ask(Prompts.delegation_prompt(query))
-        
-        logger.log("Subtasks defined and delegated", data={"plan_length": len(plan)})
-        if not silent:
-            print("  ✓ Subtasks defined and delegated")
+        deadline = None
+        tight = False
+        if deadline_ms:
+            deadline = Deadline(deadline_ms, Settings.DEADLINE_ANALYSIS_SHARE, Settings.DEADLINE_SEARCH_SHARE)
+            tight = deadline_ms < Settings.DEADLINE_TIGHT_MS
+            if tight:
+                # Short budget: trade depth for speed up front
+                if model != Settings.FAST_MODEL:
+                    model = Settings.FAST_MODEL
+                    deadline.cut("smaller_model")
+                if num_results_per_agent > Settings.DEADLINE_TIGHT_MAX_RESULTS:
+                    num_results_per_agent = Settings.DEADLINE_TIGHT_MAX_RESULTS
+                    deadline.cut("fewer_sources")
+            logger.log("Deadline budget set", data={"deadline_ms": deadline_ms, "tight": tight, "cuts": deadline.cuts})
         
-        # Step 2: Execute parallel research
-        logger.set_status("executing")
-        logger.log("SUBAGENTS: Working in parallel...")
-        if not silent:
-            print("\n🔍 SUBAGENTS: Working in parallel...")
-        
-        subtask_searches = [
-            f"{query} fundamentals principles",
-            f"{query} latest developments",
-            f"{query} applications real world"
-        ]
-        
-        subagent_results = []
-        for i, search_term in enumerate(subtask_searches, 1):
-            logger.update_subagent(i, status="started", search_focus=search_term)
-            result = self.sub_agent.research(i, search_term, num_results=num_results_per_agent, silent=silent, session_id=session_id)
-            subagent_results.append(result)
-            logger.update_subagent(i, status="completed", sources=len(result.get("sources", [])))
-            logger.add_sources(len(result.get("sources", [])))
+        # Searches, early searches and map summaries share one pool
+        executor = ContextThreadPoolExecutor(max_workers=Settings.MAX_PARALLEL_SUBAGENTS * 3)
+        scheduler = SubtaskScheduler(
+            self.sub_agent, executor, query, num_results_per_agent, Settings.SPECULATIVE_MATCH_THRESHOLD,
+            fetch_cache=fetch_cache, cancel=cancel,
+        )
+        # Completes on cancellation so waits on subagents return at once
+        cancellation = Future()
+        stop_watching = cancel.on_cancel(lambda: cancellation.set_result(None))
+        try:
+            # Step 1: Plan and delegate
+            logger.set_status("planning")
+            logger.log("LEAD AGENT: Planning and delegating...")
+            if not silent:
+                print("👨‍💼 LEAD AGENT: Planning and delegating...")
+            
+            saved_plan = saved.get("analysis")
+            if saved_plan is not None:
+                # Resumed run: the plan was already made (and paid for) by an earlier worker
+                analysis, subtasks = saved_plan["analysis"], saved_plan["subtasks"]
+                reused_results = saved_plan.get("reused", [])
+                logger.log("Plan restored from checkpoint", data={"stages": sorted(saved)})
+            else:
+                if Settings.SPECULATIVE_DISPATCH and prior is None:
+                    # Hide analysis latency behind the searches the plan is most likely to ask for
+                    for subtask in self.query_analyzer.likely_subtasks(query):
+                        scheduler.dispatch(subtask["focus"])
+                    logger.log("Speculative searches dispatched", data={"count": scheduler.dispatched})
+                
+                # Streamed subtasks start searching before the analysis completes
+                # (a follow-up only searches angles the prior session did not cover)
+                def on_subtask(subtask: dict) -> None:
+                    if prior is None or self._covering_result(query, subtask["focus"], prior) is None:
+                        scheduler.dispatch(subtask["focus"])
+                
+                analysis_timeout = stage_timeout(deadline, "analysis")
+                allow_llm = analysis_timeout is None or analysis_timeout * 1000 >= Settings.DEADLINE_MIN_LLM_ANALYSIS_MS
+                if not allow_llm:
+                    deadline.cut("heuristic_analysis")
+                analysis = self.query_analyzer.analyze(
+                    query, model=model, on_subtask=on_subtask if Settings.STREAMING_DISPATCH else None, timeout=analysis_timeout, allow_llm=allow_llm, cancel=cancel
+                )
+                if analysis.get("truncated"):
+                    deadline.cut("analysis_truncated")
+                subtasks = analysis["subtasks"]
+                if tight and len(subtasks) > Settings.DEADLINE_TIGHT_MAX_SUBAGENTS:
+                    subtasks = subtasks[:Settings.DEADLINE_TIGHT_MAX_SUBAGENTS]
+                    deadline.cut("fewer_subagents")
+                
+                reused_results = []
+                if prior is not None:
+                    # Follow-up: angles the prior session already researched keep its sources
+                    uncovered = []
+                    covered = set()
+                    for subtask in subtasks:
+                        covering = self._covering_result(query, subtask["focus"], prior)
+                        if covering is None:
+                            uncovered.append(subtask)
+                        elif covering["subtask"] not in covered:
+                            covered.add(covering["subtask"])
+                            reused_results.append({**covering, "subtask": len(reused_results) + 1, "reused": True})
+                    subtasks = uncovered
+                    logger.log(
+                        "Follow-up: reusing prior findings",
+                        data={"refined_from": prior["session_id"], "reused": len(reused_results), "new_angles": len(subtasks)},
+                    )
+                
+                self._checkpoint(session_id, "analysis", {"analysis": analysis, "subtasks": subtasks, "reused": reused_results})
+            
+            logger.log(
+                "Subtasks defined and delegated",
+                data={
+                    "complexity_score": analysis["complexity_score"],
+                    "num_subagents": len(subtasks),
+                    "analysis_path": analysis.get("analysis_path"),
+                },
+            )
+            if not silent:
+                print(f"  ✓ {len(subtasks)} subtasks defined and delegated")
+            
+            # Large source sets (or every set, when pipelined) are summarized per subagent
+            # (map) and then reduced; a follow-up instead refines the prior report
+            map_reduce = prior is None and (
+                Settings.PIPELINED_SUMMARIES
+                or len(subtasks) * num_results_per_agent >= Settings.MAP_REDUCE_MIN_SOURCES
+            )
+            
+            # Step 2: Execute parallel research
+            logger.set_status("executing")
+            logger.log("SUBAGENTS: Working in parallel...", data={"map_reduce": map_reduce})
+            if not silent:
+                print("\n🔍 SUBAGENTS: Working in parallel...")
+            
+            futures = {}
+            reused = 0
+            subagent_results = list(reused_results)
+            partial_futures = {}
+            subagent_cancels = {}
+            for result in reused_results:
+                logger.update_subagent(result["subtask"], status="completed", search_focus=result["search_focus"], sources=len(result["sources"]), reused=True)
+                logger.add_sources(len(result["sources"]))
+            # New angles are numbered after the reused ones
+            for i, subtask in enumerate(subtasks, len(reused_results) + 1):
+                restored = saved.get(f"subagent:{i}")
+                if restored is not None:
+                    # Finished before the interruption: keep its sources, don't search again
+                    subagent_results.append(restored)
+                    logger.update_subagent(i, status="completed", search_focus=restored["search_focus"], sources=len(restored.get("sources", [])), restored=True)
+                    logger.add_sources(len(restored.get("sources", [])))
+                    if map_reduce:
+                        summary = saved.get(f"summary:{i}")
+                        if summary is not None:
+                            partial_futures[i] = Future()
+                            partial_futures[i].set_result(summary)
+                            self._publish_summary(session_id, restored, summary)
+                        else:
+                            partial_futures[i] = executor.submit(
+                                self._summarize_subagent, query, restored, model, session_id, cancel, deadline
+                            )
+                    continue
+                # Reuse an early (speculative or streamed) search whose angle matches this subtask
+                claimed = scheduler.claim(subtask["focus"])
+                focus, prefetched = claimed if claimed else (subtask["focus"], None)
+                reused += claimed is not None
+                logger.update_subagent(i, status="started", search_focus=focus, speculative=claimed is not None)
+                # Its own token, so a straggler can be stopped without cancelling the request
+                subagent_cancel = cancel.child()
+                future = executor.submit(
+                    self.sub_agent.research, i, focus,
+                    num_results=num_results_per_agent, silent=silent, session_id=session_id,
+                    prefetched=prefetched, fetch_cache=fetch_cache, cancel=subagent_cancel,
+                )
+                futures[future] = i
+                subagent_cancels[i] = subagent_cancel
+            if scheduler.dispatched:
+                cancelled = scheduler.cancel_unclaimed()
+                logger.log("Early searches reconciled", data={"reused": reused, "cancelled": cancelled})
+            
+            try:
+                pending = [*futures, cancellation] if futures else []
+                finished = 0
+                for future in as_completed(pending, timeout=stage_timeout(deadline, "search")):
+                    cancel.raise_if_cancelled()
+                    result = self._rank_sources(query, future.result())
+                    finished += 1
+                    subagent_results.append(result)
+                    self._checkpoint(session_id, f"subagent:{result['subtask']}", result)
+                    logger.update_subagent(result["subtask"], status="completed", sources=len(result.get("sources", [])))
+                    logger.add_sources(len(result.get("sources", [])))
+                    if map_reduce:
+                        # Summarize while the remaining subagents are still searching
+                        partial_futures[result["subtask"]] = executor.submit(
+                            self._summarize_subagent, query, result, model, session_id, cancel, deadline
+                        )
+                    if finished == len(futures):
+                        break  # Only the cancellation sentinel is left
+            except FuturesTimeout:
+                # Out of search budget: go on with the subagents that finished
+                stragglers = [i for future, i in futures.items() if not future.done()]
+                for future in futures:
+                    future.cancel()
+                for i in stragglers:
+                    # Running subagents stop at their next round check
+                    subagent_cancels[i].cancel("search deadline")
+                    logger.update_subagent(i, status="cancelled")
+                deadline.cut("straggling_subagents")
+                logger.log("Straggling subagents cancelled at deadline", data={"subtasks": stragglers})
+            
+            subagent_results.sort(key=lambda r: r["subtask"])
+            partials = [
+                {
+                    "subtask": r["subtask"],
+                    "search_focus": r["search_focus"],
+                    "summary": self._collect_summary(partial_futures[r["subtask"]], r, deadline),
+                }
+                for r in subagent_results
+            ] if map_reduce else []
+        finally:
+            stop_watching()
+            # Don't wait for abandoned speculative searches, unless the run was cancelled:
+            # its workers then stop at their next check, and must be done before a
+            # shutdown closes the stores they write to
+            executor.shutdown(wait=cancel.cancelled, cancel_futures=True)
         
         total_sources = sum(len(r["sources"]) for r in subagent_results)
         
@@ -75,8 +554,44 @@ class LeadAgent:
         if not silent:
             print("\n👨‍💼 LEAD AGENT: Synthesizing parallel findings...")
         
-        synthesis_prompt = Prompts.synthesis_prompt(query, subagent_results, total_sources)
-        final_synthesis = self.ai_service.ask(synthesis_prompt)
+        def build_prompt(results: list, summaries: list) -> str:
+            if prior is not None:
+                return Prompts.refinement_prompt(query, prior, results, total_sources)
+            if map_reduce:
+                return Prompts.reduce_prompt(query, summaries, total_sources)
+            return Prompts.synthesis_prompt(query, results, total_sources)
+        
+        synthesis_prompt = build_prompt(subagent_results, partials)
+        max_tokens = None
+        usage = current_usage()
+        remaining = usage.remaining_tokens() if usage is not None else None
+        if remaining is not None:
+            # Token budget: cap the report's length, then fit the context into the rest
+            max_tokens = min(Settings.MAX_TOKENS, int(remaining * Settings.TOKEN_BUDGET_SYNTHESIS_SHARE))
+            synthesis_prompt, trimmed = self._fit_context(build_prompt, subagent_results, partials, remaining - max_tokens)
+            if trimmed:
+                usage.cut("context_trimmed")
+            if max_tokens < Settings.TOKEN_BUDGET_MIN_SYNTHESIS_TOKENS:
+                usage.cut("synthesis_skipped")
+            elif max_tokens < Settings.MAX_TOKENS:
+                usage.cut("shorter_synthesis")
+            logger.log("Token budget applied", data={"remaining_tokens": remaining, "max_tokens": max_tokens, "cuts": usage.cuts})
+        synthesis_timeout = stage_timeout(deadline, "synthesis")
+        if synthesis_timeout is not None and synthesis_timeout * 1000 < Settings.DEADLINE_MIN_SYNTHESIS_MS:
+            final_synthesis, missing_because = "", "deadline"
+            deadline.cut("synthesis_skipped")
+        elif max_tokens is not None and max_tokens < Settings.TOKEN_BUDGET_MIN_SYNTHESIS_TOKENS:
+            final_synthesis, missing_because = "", "token_budget"
+        else:
+            final_synthesis = self.ai_service.ask(synthesis_prompt, max_tokens=max_tokens, model=model, timeout=synthesis_timeout, cancel=cancel)
+            missing_because = "failed"
+            if not final_synthesis and deadline is not None:
+                missing_because = "deadline"
+                deadline.cut("synthesis_timed_out")
+        if not final_synthesis and (deadline is not None or max_tokens is not None):
+            # Anytime result: assemble what was gathered instead of returning nothing
+            final_synthesis = self._extractive_report(query, subagent_results, partials, missing_because)
+        final_synthesis = self._sanitize_report(final_synthesis)
         
         logger.set_status("complete")
         logger.log("MULTI-AGENT RESEARCH COMPLETE", type="complete")
@@ -87,10 +602,208 @@ class LeadAgent:
             print("=" * 50)
             print(final_synthesis)
         
-        return {
+        result = {
             "query": query,
             "subagents": len(subagent_results),
             "total_sources": total_sources,
             "synthesis": final_synthesis,
-            "subagent_results": subagent_results  # Include for frontend
-        }
\ No newline at end of file
+            "subagent_results": subagent_results,  # Include for frontend
+            "complexity_analysis": analysis,
+            "synthesis_mode": "refinement" if prior is not None else "map_reduce" if map_reduce else "single",
+            "refined_from": prior and prior["session_id"],
+            "model": model,
+            "deadline": deadline.report() if deadline is not None else None,
+        }
+        if self.checkpoints is not None and session_id:
+            self._checkpoint(session_id, "result", result)
+            self.checkpoints.finish(session_id, COMPLETE)
+        return result
+    
+    def _serve_cached(self, query: str, result: dict, age_seconds: float, *, session_id: str | None, num_results_per_agent: int, model: str, account: str) -> dict:
+        """Answer from the result cache as if this session had done the research"""
+        logger = activity_manager.get(session_id)
+        logger.reset(query)
+        logger.log("Served from result cache", type="complete", data={"cached": True, "age_seconds": int(age_seconds)})
+        logger.complete()
+        result = {**result, "query": query, "cached": True}
+        # The session can still be resumed (a no-op) or refined like a researched one
+        self._adopt_result(
+            session_id, query, result,
+            {"num_results_per_agent": num_results_per_agent, "model": model, "deadline_ms": None, "refine_session_id": None, "account": account},
+        )
+        return result
+    
+    def _adopt_result(self, session_id: str | None, query: str, result: dict, params: dict) -> None:
+        """Checkpoint a result this session did not research itself as its completed result"""
+        if self.checkpoints is None or not session_id:
+            return
+        try:
+            self.checkpoints.start(session_id, query, params)
+            self.checkpoints.save(session_id, "result", result)
+            self.checkpoints.finish(session_id, COMPLETE)
+        except Exception as e:
+            print(f"❌ Checkpoint save error (result): {e}")
+    
+    def _prior_result(self, session_id: str, account: str) -> dict:
+        """Completed result of the session a follow-up refines, tagged with its session id"""
+        checkpoint = self.checkpoints.load(session_id) if self.checkpoints is not None else None
+        if checkpoint is None or "result" not in checkpoint.stages or not self._owned_by(checkpoint, account):
+            raise CheckpointNotFound(session_id)
+        return {**checkpoint.stages["result"], "session_id": session_id}
+    
+    @staticmethod
+    def _owned_by(checkpoint: Checkpoint, account: str | None) -> bool:
+        """Whether a session belongs to an API key (sessions saved without one are anonymous)"""
+        return checkpoint.params.get("account", "anonymous") == (account or "anonymous")
+    
+    @staticmethod
+    def _fit_context(build_prompt: Callable[[list, list], str], subagent_results: list, partials: list, max_prompt_tokens: int) -> tuple:
+        """
+        Shrink a synthesis prompt to a token budget.
+        
+        Every source text and map summary is cut by the same proportion (keeping
+        its beginning) and the prompt rebuilt; what the fixed instructions still
+        overflow is truncated.
+        
+        Returns:
+            Tuple of (prompt, whether anything was cut)
+        """
+        prompt = build_prompt(subagent_results, partials)
+        estimated = estimate_tokens(prompt)
+        if estimated <= max_prompt_tokens:
+            return prompt, False
+        ratio = max(0, max_prompt_tokens) / estimated
+        trimmed_results = [
+            {**r, "sources": [{**s, "content": s["content"][:int(len(s["content"]) * ratio)]} for s in r["sources"]]}
+            for r in subagent_results
+        ]
+        trimmed_partials = [{**p, "summary": p["summary"][:int(len(p["summary"]) * ratio)]} for p in partials]
+        prompt = build_prompt(trimmed_results, trimmed_partials)
+        return prompt[:max(0, max_prompt_tokens) * CHARS_PER_TOKEN], True
+    
+    @staticmethod
+    def _covering_result(query: str, focus: str, prior: dict) -> dict | None:
+        """Prior subagent result that already researched this angle, if any"""
+        best, best_score = None, 0.0
+        for result in prior.get("subagent_results") or []:
+            score = focus_similarity(query, focus, result["search_focus"])
+            if score > best_score:
+                best, best_score = result, score
+        return best if best_score >= Settings.REFINE_REUSE_THRESHOLD else None
+    
+    def _interrupted(self, session_id: str | None) -> None:
+        """Leave a failed or cancelled run resumable"""
+        if self.checkpoints is None or not session_id:
+            return
+        try:
+            self.checkpoints.finish(session_id, INTERRUPTED)
+        except Exception as e:
+            print(f"❌ Checkpoint update error: {e}")
+    
+    def _checkpoint(self, session_id: str | None, stage: str, data) -> None:
+        """Persist a completed stage; a failing store never fails the research"""
+        if self.checkpoints is None or not session_id:
+            return
+        try:
+            self.checkpoints.save(session_id, stage, data)
+        except Exception as e:
+            print(f"❌ Checkpoint save error ({stage}): {e}")
+    
+    @staticmethod
+    def _rank_sources(query: str, result: dict) -> dict:
+        """Drop a subagent's near-duplicate sources and order the rest by relevance (CPU pool stage)"""
+        if len(result["sources"]) < 2:
+            return result
+        payload = encode_sources(query, result["search_focus"], result["sources"], Settings.SOURCE_DEDUP_SIMILARITY)
+        try:
+            keep = json.loads(cpu_pool.run(rank_sources, payload))["keep"]
+        except CPUTaskError as e:
+            print(f"❌ Source ranking skipped: {e}")
+            return result
+        ranked = {**result, "sources": [result["sources"][i] for i in keep]}
+        if "stats" in result:
+            ranked["stats"] = {**result["stats"], "near_duplicates": len(result["sources"]) - len(keep)}
+        return ranked
+    
+    @staticmethod
+    def _sanitize_report(report: str) -> str:
+        """Strip unsafe HTML and links from a generated report (CPU pool stage)"""
+        if not report:
+            return report
+        try:
+            return cpu_pool.run(sanitize_report, report.encode("utf-8")).decode("utf-8")
+        except CPUTaskError as e:
+            print(f"❌ Report sanitization skipped: {e}")
+            return report
+    
+    def _summarize_subagent(self, query: str, result: dict, model: str, session_id: str | None, cancel: CancellationToken, deadline: Deadline | None) -> str:
+        """Condense one subagent's sources into compact findings (map step)"""
+        if not result["sources"]:
+            return "No usable sources found for this focus area."
+        
+        # A summary is waited for within the search budget, so it need not run longer
+        timeout = Settings.MAP_SUMMARY_TIMEOUT_SECONDS
+        search_remaining = stage_timeout(deadline, "search")
+        if search_remaining is not None:
+            timeout = max(0.0, min(timeout, search_remaining))
+        summary = self.ai_service.ask(
+            Prompts.partial_summary_prompt(query, result),
+            max_tokens=Settings.MAP_SUMMARY_MAX_TOKENS,
+            model=model,
+            timeout=timeout,
+            cancel=cancel,
+        )
+        if summary:
+            self._checkpoint(session_id, f"summary:{result['subtask']}", summary)
+        else:
+            # Fall back to raw snippets so the reduce step never loses a subagent
+            summary = self._snippet_summary(result)
+        
+        self._publish_summary(session_id, result, summary)
+        return summary
+    
+    @staticmethod
+    def _publish_summary(session_id: str | None, result: dict, summary: str) -> None:
+        """Stream a subagent's findings to the activity feed while the others still search"""
+        logger = activity_manager.get(session_id)
+        logger.update_subagent(result["subtask"], summary=summary)
+        logger.log(
+            "Subagent findings summarized",
+            type="partial",
+            data={
+                "subtask": result["subtask"],
+                "search_focus": result["search_focus"],
+                "summary": summary,
+                "summary_length": len(summary),
+            },
+        )
+    
+    def _collect_summary(self, future, result: dict, deadline: Deadline | None) -> str:
+        """Wait for a map summary within the search budget, else use raw snippets"""
+        try:
+            return future.result(timeout=stage_timeout(deadline, "search"))
+        except FuturesTimeout:
+            future.cancel()
+            deadline.cut("partial_summaries")
+            return self._snippet_summary(result)
+    
+    @staticmethod
+    def _snippet_summary(result: dict) -> str:
+        return "\n".join(f"- {s['title']}: {s['content']}" for s in result["sources"])
+    
+    @staticmethod
+    def _extractive_report(query: str, subagent_results: list, partials: list, reason: str) -> str:
+        """
+        Report assembled from gathered material when no synthesis could be generated.
+        
+        Args:
+            reason: Why there is no synthesis: "deadline", "token_budget" or "failed"
+        """
+        why = _MISSING_SYNTHESIS.get(reason, _MISSING_SYNTHESIS["failed"])
+        report = f"PARTIAL REPORT: {query}\n\n{why} Findings gathered so far:\n"
+        summaries = {p["subtask"]: p["summary"] for p in partials}
+        for result in subagent_results:
+            report += f"\n{result['search_focus']}:\n"
+            report += summaries.get(result["subtask"]) or LeadAgent._snippet_summary(result) or "- No sources found"
+            report += "\n"
+        return report
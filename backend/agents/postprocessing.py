@@ -0,0 +1,114 @@
+"""
+CPU-bound post-processing stages of the research pipeline.
+Each stage is a module-level bytes -> bytes function (stdlib only), so it can run
+in a worker process of the CPU pool as well as inline.
+"""
+import json
+import re
+
+# Words too common to say anything about relevance
+_STOPWORDS = frozenset(
+    "the and for are with that this from what how why which who when where into about "
+    "than then them they their there these those have has had was were will would can "
+    "could should does did not but all any its our your more most best vs".split()
+)
+
+# Elements whose content is dropped along with the tags
+_UNSAFE_BLOCKS = re.compile(
+    r"<(script|style|iframe|object|embed|noscript|template)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+# Any other HTML tag markup (the text between tags is kept)
+_HTML_TAG = re.compile(
+    r"</?(a|abbr|b|big|blockquote|body|br|button|center|code|details|div|em|embed|font|form|h[1-6]|head|hr|html|i|"
+    r"iframe|img|input|link|li|mark|meta|object|ol|p|pre|s|script|small|span|strong|style|sub|summary|sup|svg|"
+    r"table|tbody|td|textarea|tfoot|th|thead|tr|u|ul)\b[^>]*>",
+    re.IGNORECASE,
+)
+_BR = re.compile(r"<br\s*/?>", re.IGNORECASE)
+# Markdown links and images pointing at script or data URLs
+_UNSAFE_LINK = re.compile(r"!?\[([^\]]*)\]\(\s*(?:javascript|vbscript|data):(?:[^()\s]|\([^()]*\))*\)", re.IGNORECASE)
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+# Fenced code blocks, then inline code spans (single or double backticks)
+_CODE = re.compile(r"(```.*?(?:```|\Z)|``[^\n]+?``|`[^`\n]+`)", re.DOTALL)
+
+
+def _terms(text: str) -> list:
+    return [w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def _shingles(words: list, size: int = 3) -> set:
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def encode_sources(query: str, focus: str, sources: list, dedup_similarity: float) -> bytes:
+    """Compact rank_sources payload: only the fields the stage reads"""
+    return json.dumps(
+        {
+            "query": query,
+            "focus": focus,
+            "threshold": dedup_similarity,
+            "sources": [[s["title"], s["content"]] for s in sources],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+def rank_sources(payload: bytes) -> bytes:
+    """
+    Score each source against the query and focus, drop near-duplicates and
+    order the rest best first.
+    
+    A source scores the share of query/focus terms it contains, title matches
+    counting double. A source whose word 3-shingles overlap a better one's by at
+    least the threshold (Jaccard) is a near-duplicate.
+    
+    Returns:
+        JSON {"keep": [indices of the sources kept, best first]}
+    """
+    request = json.loads(payload)
+    wanted = set(_terms(f"{request['query']} {request['focus']}"))
+    scored = []
+    for index, (title, content) in enumerate(request["sources"]):
+        words = _terms(content)
+        if wanted:
+            title_hits = len(wanted & set(_terms(title)))
+            content_hits = len(wanted & set(words))
+            score = (2 * title_hits + content_hits) / (3 * len(wanted))
+        else:
+            score = 0.0
+        scored.append((score, index, _shingles(words)))
+    # Stable: equally scored sources keep the search engine's order
+    scored.sort(key=lambda item: -item[0])
+    
+    keep, kept_shingles = [], []
+    for _, index, shingles in scored:
+        if shingles and any(
+            len(shingles & other) / len(shingles | other) >= request["threshold"] for other in kept_shingles
+        ):
+            continue
+        keep.append(index)
+        kept_shingles.append(shingles)
+    return json.dumps({"keep": keep}, separators=(",", ":")).encode()
+
+
+def sanitize_report(payload: bytes) -> bytes:
+    """
+    Make a generated Markdown report safe to render: drop script-like HTML
+    blocks and raw tags, script/data links and control characters, and collapse
+    runs of blank lines. Plain Markdown, fenced code and inline code are left
+    as they are.
+    """
+    text = _CONTROL.sub("", payload.decode("utf-8", errors="replace").replace("\r\n", "\n"))
+    # Code blocks and spans (odd parts) are shown verbatim, so only prose is cleaned
+    parts = _CODE.split(text)
+    for i in range(0, len(parts), 2):
+        prose = _UNSAFE_BLOCKS.sub("", parts[i])
+        prose = _BR.sub("\n", prose)
+        prose = _HTML_TAG.sub("", prose)
+        prose = _UNSAFE_LINK.sub(lambda m: m.group(1), prose)
+        parts[i] = _BLANK_RUNS.sub("\n\n", prose)
+    return "".join(parts).strip().encode("utf-8")
@@ -0,0 +1,175 @@
+"""
+Refresh-ahead prefetching of trending research.
+Re-researches the most popular queries shortly before their cached results
+expire, only while the research pipeline has spare capacity and within an
+hourly budget, so repeated questions keep being answered from the cache.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional
+
+from config.settings import Settings
+from services.result_cache import ResultCache
+from utils.activity import activity_manager
+from utils.admission import AdmissionController
+from utils.auth import Tenant
+from utils.cancellation import CancellationToken, Cancelled
+from utils.fair_scheduler import FairScheduler
+from utils.metrics import metrics
+
+# Refreshes queue like a low-weight tenant that never holds more than one slot
+PREFETCH_TENANT = Tenant("prefetch", weight=0.25, max_concurrent=1)
+
+
+class Prefetcher:
+    """Background thread that keeps the cached results of trending queries fresh"""
+
+    def __init__(
+        self,
+        lead_agent: Any,
+        cache: ResultCache,
+        scheduler: FairScheduler,
+        admission: AdmissionController,
+        top_n: Optional[int] = None,
+        lead_seconds: Optional[float] = None,
+        interval_seconds: Optional[float] = None,
+        max_per_hour: Optional[int] = None,
+    ):
+        """
+        Args:
+            lead_agent: LeadAgent that runs the refreshes
+            cache: Result cache to keep hot (and the source of query popularity)
+            scheduler: Research scheduler whose spare capacity refreshes use
+            admission: Admission controller; nothing is refreshed while overloaded
+            top_n: Most popular queries kept hot
+            lead_seconds: How long before expiry an entry is refreshed
+            interval_seconds: How often to look for due entries
+            max_per_hour: Refresh budget (research runs per rolling hour)
+        """
+        self.lead_agent = lead_agent
+        self.cache = cache
+        self.scheduler = scheduler
+        self.admission = admission
+        self.top_n = top_n or Settings.PREFETCH_TOP_N
+        self.lead_seconds = lead_seconds or Settings.PREFETCH_LEAD_SECONDS
+        self.interval_seconds = interval_seconds or Settings.PREFETCH_INTERVAL_SECONDS
+        self.max_per_hour = max_per_hour or Settings.PREFETCH_MAX_PER_HOUR
+        self._lock = threading.Lock()
+        self._recent: Deque[float] = deque()
+        # A failed refresh is not retried until its entry would have been due again
+        self._failed_until: Dict[Hashable, float] = {}
+        self._stop = threading.Event()
+        self._cancel = CancellationToken()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped_busy = 0
+        self.skipped_budget = 0
+        metrics.register("prefetch", self.stats)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="prefetcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread, abandoning a refresh in progress"""
+        self._stop.set()
+        self._cancel.cancel("server shutting down")
+
+    def run_once(self) -> int:
+        """
+        Refresh the entries that are due, while capacity and budget allow.
+
+        Returns:
+            Number of results refreshed
+        """
+        refreshed = 0
+        for key, query, _ in self.cache.due(self.top_n, self.lead_seconds, Settings.PREFETCH_MIN_POPULARITY):
+            if self._stop.is_set():
+                break
+            if self._failed_until.get(key, 0.0) > time.time():
+                continue
+            if not self._has_spare_capacity():
+                with self._lock:
+                    self.skipped_busy += 1
+                break
+            if not self._take_budget():
+                with self._lock:
+                    self.skipped_budget += 1
+                break
+            if self._refresh(key, query):
+                refreshed += 1
+        return refreshed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire_budget(time.monotonic())
+            return {
+                "refreshed": self.refreshed,
+                "failed": self.failed,
+                "skipped_busy": self.skipped_busy,
+                "skipped_budget": self.skipped_budget,
+                "budget_per_hour": self.max_per_hour,
+                "budget_used": len(self._recent),
+            }
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Prefetch error: {e}")
+
+    def _refresh(self, key: Hashable, query: str) -> bool:
+        """Re-research one query; the lead agent caches the fresh result"""
+        _, num_results_per_agent, model = key
+        session_id = activity_manager.create_session(query)
+        try:
+            with self.scheduler.slot(PREFETCH_TENANT, self._cancel):
+                self.lead_agent.research(
+                    query,
+                    num_results_per_agent=num_results_per_agent,
+                    silent=True,
+                    session_id=session_id,
+                    model=model,
+                    cancel=self._cancel,
+                    use_cache=False,
+                    account=PREFETCH_TENANT.name,
+                )
+        except Cancelled:
+            return False
+        except Exception as e:
+            print(f"❌ Prefetch of {query!r} failed: {e}")
+            with self._lock:
+                self.failed += 1
+            self._failed_until[key] = time.time() + self.cache.ttl_seconds - self.lead_seconds
+            return False
+        self._failed_until.pop(key, None)
+        with self._lock:
+            self.refreshed += 1
+        return True
+
+    def _has_spare_capacity(self) -> bool:
+        """Refresh only into idle slots: nothing queued, the pipeline partly free, no overload"""
+        running, queued, _ = self.scheduler.load()
+        return (
+            queued == 0
+            and running < self.scheduler.capacity * Settings.PREFETCH_MAX_UTILIZATION
+            and not self.admission.overloaded
+        )
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._expire_budget(now)
+            if len(self._recent) >= self.max_per_hour:
+                return False
+            self._recent.append(now)
+            return True
+
+    def _expire_budget(self, now: float) -> None:
+        """Forget refreshes older than an hour (lock held)"""
+        while self._recent and now - self._recent[0] >= 3600:
+            self._recent.popleft()
@@ -3,21 +3,46 @@ Query Analyzer for dynamic subagent allocation.
 Analyzes query complexity and determines optimal research strategy.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional
+from config.settings import Settings
 from services.ai_service import AIService
+from agents.complexity_scorer import HeuristicComplexityScorer
+from utils.cancellation import CancellationToken, Cancelled
+from utils.json_stream import StreamingArrayParser, repair_json
 import json
+import time
 
 
 class QueryAnalyzer:
     """Analyzes research queries to determine complexity and optimal strategy"""
 
-    def __init__(self, ai_service: AIService):
+    def __init__(
+        self, ai_service: AIService, scorer: Optional[HeuristicComplexityScorer] = None
+    ):
         self.ai_service = ai_service
+        if scorer is None and Settings.HEURISTIC_ANALYSIS_ENABLED:
+            scorer = HeuristicComplexityScorer()
+        self.scorer = scorer
 
-    def analyze(self, query: str, model: Optional[str] = None) -> Dict[str, Any]:
+    def analyze(
+        self,
+        query: str,
+        model: Optional[str] = None,
+        on_subtask: Optional[Callable[[Dict[str, Any]], None]] = None,
+        timeout: Optional[float] = None,
+        allow_llm: bool = True,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Dict[str, Any]:
         """
         Analyze query complexity and determine research strategy.
 
+        The completion is streamed and parsed incrementally; each subtask is passed
+        to on_subtask as soon as its JSON object is complete, before the analysis ends.
+        With a timeout, streaming stops when it expires and whatever was received is
+        repaired and used (the result is then marked "truncated").
+        allow_llm=False forces the local heuristic path regardless of confidence.
+        A cancelled token aborts the streamed completion and raises Cancelled.
+
         Returns:
             Dictionary with:
             - complexity_score: 1-5 (1=simple, 5=very complex)
@@ -25,7 +50,27 @@ class QueryAnalyzer:
             - subtasks: List of specific research angles
             - explanation: Why this allocation was chosen
             - estimated_sources: Estimated total sources needed
+            - analysis_path: "heuristic", "llm" or "fallback"
         """
+        # Fast path: confident local estimate, no LLM round-trip
+        if self.scorer is not None:
+            estimate = self.scorer.estimate(query)
+            if not allow_llm or estimate.confidence >= Settings.HEURISTIC_CONFIDENCE_THRESHOLD:
+                num_subagents = max(2, min(6, estimate.complexity_score + 1))
+                subtasks = self._generate_default_subtasks(query, num_subagents)
+                if on_subtask:
+                    for subtask in subtasks:
+                        on_subtask(subtask)
+                return {
+                    "complexity_score": estimate.complexity_score,
+                    "num_subagents": num_subagents,
+                    "subtasks": subtasks,
+                    "explanation": f"Local heuristic estimate (confidence {estimate.confidence:.2f}) from query length, structure and terms.",
+                    "estimated_sources": max(6, min(30, num_subagents * 4)),
+                    "analysis_path": "heuristic",
+                    "confidence": estimate.confidence,
+                }
+
         analysis_prompt = f"""Analyze this research query and determine the optimal multi-agent research strategy.
 
 Query: "{query}"
@@ -51,29 +96,46 @@ Guidelines:
 Each subtask should be distinct, specific, and non-overlapping.
 Ensure subtasks cover different aspects: fundamentals, current state, applications, challenges, future trends, comparisons, etc."""
 
+        if not allow_llm:
+            return self._fallback_analysis(query, "LLM analysis skipped")
+
         try:
-            response = self.ai_service.ask(
-                analysis_prompt, max_tokens=1500, temperature=0.2, model=model
+            parser = StreamingArrayParser("subtasks")
+            stop_at = time.monotonic() + timeout if timeout is not None else None
+            truncated = False
+            stream = self.ai_service.ask_stream(
+                analysis_prompt, max_tokens=1500, temperature=0.2, model=model, timeout=timeout, cancel=cancel
             )
+            for chunk in stream:
+                for subtask in parser.feed(chunk):
+                    if on_subtask and isinstance(subtask, dict) and subtask.get("focus"):
+                        on_subtask(subtask)
+                if stop_at is not None and time.monotonic() >= stop_at:
+                    truncated = True
+                    stream.close()
+                    break
+            if cancel is not None:
+                cancel.raise_if_cancelled()
 
-            # Extract JSON from response (handle potential markdown code blocks)
-            json_str = response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
-
-            analysis = json.loads(json_str)
+            # Recover the object from fenced, chatty or truncated output
+            analysis = json.loads(repair_json(parser.text))
 
             # Validate and clamp values
             analysis["complexity_score"] = max(
-                1, min(5, analysis.get("complexity_score", 3))
+                1, min(5, int(analysis.get("complexity_score", 3)))
             )
             analysis["num_subagents"] = max(2, min(6, analysis.get("num_subagents", 3)))
             analysis["estimated_sources"] = max(
                 6, min(30, analysis.get("estimated_sources", 15))
             )
 
+            # Keep only well-formed subtasks (repaired output may end mid-object)
+            analysis["subtasks"] = [
+                subtask
+                for subtask in analysis.get("subtasks", [])
+                if isinstance(subtask, dict) and subtask.get("focus")
+            ]
+
             # Ensure subtasks match num_subagents
             if len(analysis.get("subtasks", [])) != analysis["num_subagents"]:
                 # Generate default subtasks if mismatch
@@ -81,17 +143,33 @@ Ensure subtasks cover different aspects: fundamentals, current state, applicatio
                     query, analysis["num_subagents"]
                 )
 
+            analysis["analysis_path"] = "llm"
+            if truncated:
+                analysis["truncated"] = True
+            if self.scorer is not None and not truncated:
+                # Every complete LLM analysis becomes a calibration sample for the local scorer
+                self.scorer.record(query, analysis["complexity_score"])
             return analysis
 
+        except Cancelled:
+            raise
         except Exception as e:
-            # Fallback to moderate complexity if analysis fails
-            return {
-                "complexity_score": 3,
-                "num_subagents": 3,
-                "subtasks": self._generate_default_subtasks(query, 3),
-                "explanation": f"Default allocation applied (analysis error: {str(e)}). Standard 3-agent approach for balanced coverage.",
-                "estimated_sources": 15,
-            }
+            return self._fallback_analysis(query, f"analysis error: {str(e)}")
+
+    def _fallback_analysis(self, query: str, reason: str) -> Dict[str, Any]:
+        """Fallback to moderate complexity if analysis fails or is skipped"""
+        return {
+            "complexity_score": 3,
+            "num_subagents": 3,
+            "subtasks": self._generate_default_subtasks(query, 3),
+            "explanation": f"Default allocation applied ({reason}). Standard 3-agent approach for balanced coverage.",
+            "estimated_sources": 15,
+            "analysis_path": "fallback",
+        }
+
+    def likely_subtasks(self, query: str) -> List[Dict[str, str]]:
+        """Subtasks most likely to appear in the plan, usable before analysis finishes"""
+        return self._generate_default_subtasks(query, 3)
 
     def _generate_default_subtasks(
         self, query: str, num_subagents: int
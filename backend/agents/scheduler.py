@@ -0,0 +1,122 @@
+"""
+Subtask scheduler for early (speculative) search dispatch.
+Starts searches before the plan is final and reconciles them with it.
+"""
+import re
+from concurrent.futures import Executor, Future
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from agents.fetch_cache import SharedFetchCache
+from agents.sub_agent import SubAgent
+from utils.cancellation import CancellationToken
+
+# Filler words ignored when comparing research angles
+_FILLER = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "how", "in", "is",
+    "it", "its", "of", "on", "or", "the", "to", "vs", "what", "with",
+}
+
+
+def _terms(text: str) -> set:
+    return {t for t in re.findall(r"\w+", text.lower()) if t not in _FILLER}
+
+
+def focus_similarity(query: str, a: str, b: str) -> float:
+    """
+    Jaccard similarity of two subtask foci, ignoring the words of the query itself.
+
+    Every focus usually repeats the query, so only the angle words
+    ("fundamentals", "future trends", ...) distinguish one subtask from another.
+    """
+    query_terms = _terms(query)
+    angle_a = _terms(a) - query_terms
+    angle_b = _terms(b) - query_terms
+    if not angle_a and not angle_b:
+        return 1.0
+    return len(angle_a & angle_b) / len(angle_a | angle_b)
+
+
+class _Dispatch:
+    def __init__(self, focus: str, future: Future) -> None:
+        self.focus = focus
+        self.future = future
+        self.claimed = False
+
+
+class SubtaskScheduler:
+    """Tracks searches dispatched ahead of the final plan"""
+
+    def __init__(self, sub_agent: SubAgent, executor: Executor, query: str, num_results: int, match_threshold: float, fetch_cache: Optional[SharedFetchCache] = None, cancel: Optional[CancellationToken] = None):
+        """
+        Args:
+            sub_agent: Subagent whose fetch path runs the searches
+            executor: Pool the searches are submitted to
+            query: Original research query (used for focus matching)
+            num_results: Results to fetch per search
+            match_threshold: Minimum focus similarity for a dispatched search to be reused
+            fetch_cache: Batch-wide cache shared with other queries' searches
+            cancel: Token of the research request the searches belong to
+        """
+        self.sub_agent = sub_agent
+        self.executor = executor
+        self.query = query
+        self.num_results = num_results
+        self.match_threshold = match_threshold
+        self.fetch_cache = fetch_cache
+        self.cancel = cancel
+        self._dispatches: List[_Dispatch] = []
+        self._lock = Lock()
+
+    def dispatch(self, focus: str) -> bool:
+        """
+        Start fetching results for a focus unless an equivalent search is already running.
+
+        Returns:
+            True if a new search was started
+        """
+        with self._lock:
+            if any(focus_similarity(self.query, focus, d.focus) >= 1.0 for d in self._dispatches):
+                return False
+            future = self.executor.submit(self.sub_agent.fetch, focus, self.num_results, self.fetch_cache, self.cancel)
+            self._dispatches.append(_Dispatch(focus, future))
+            return True
+
+    def claim(self, focus: str) -> Optional[Tuple[str, Future]]:
+        """
+        Reserve the best-matching unclaimed search for a planned subtask.
+
+        Returns:
+            Tuple of (dispatched focus, future of fetch results), or None if nothing matches
+        """
+        with self._lock:
+            best, best_score = None, 0.0
+            for d in self._dispatches:
+                if d.claimed:
+                    continue
+                score = focus_similarity(self.query, focus, d.focus)
+                if score >= self.match_threshold and score > best_score:
+                    best, best_score = d, score
+            if best is None:
+                return None
+            best.claimed = True
+            return best.focus, best.future
+
+    def cancel_unclaimed(self) -> int:
+        """
+        Cancel searches that no planned subtask claimed.
+
+        Returns:
+            Number of searches dropped (already-running ones finish in the background)
+        """
+        with self._lock:
+            dropped = [d for d in self._dispatches if not d.claimed]
+            for d in dropped:
+                d.future.cancel()
+            self._dispatches = [d for d in self._dispatches if d.claimed]
+            return len(dropped)
+
+    @property
+    def dispatched(self) -> int:
+        with self._lock:
+            return len(self._dispatches)
@@ -2,70 +2,203 @@
 Subagent for specialized research tasks.
 Each subagent focuses on one aspect of the research.
 """
+import math
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from typing import Optional
+from config.settings import Settings
+from agents.fetch_cache import SharedFetchCache
+from services.content_store import ContentStore, content_id
 from services.search_service import SearchService
+from services.source_index import SourceIndex
 from utils.activity import activity_manager
+from utils.cancellation import CancellationToken
 
 class SubAgent:
     """Specialized research agent"""
     
-    def __init__(self, search_service: SearchService):
+    # How often a wait on the prefetched search checks for cancellation
+    CANCEL_POLL_SECONDS = 0.1
+    
+    def __init__(self, search_service: SearchService, source_index: Optional[SourceIndex] = None, content_store: Optional[ContentStore] = None):
         """
         Initialize subagent.
         
         Args:
             search_service: Search service instance for web searches
+            source_index: Optional local index consulted before calling Exa
+            content_store: Optional store that deduplicates source texts across results
         """
         self.search_service = search_service
+        self.source_index = source_index
+        self.content_store = content_store
     
-    def research(self, subtask_id: int, search_query: str, num_results: int = 2, silent: bool = False, session_id: str | None = None) -> dict:
+    def research(self, subtask_id: int, search_query: str, num_results: int = 2, silent: bool = False, session_id: str | None = None, prefetched: Optional[Future] = None, fetch_cache: Optional[SharedFetchCache] = None, cancel: Optional[CancellationToken] = None) -> dict:
         """
         Conduct research for a specific subtask.
         
         Args:
             subtask_id: ID number of this subtask
             search_query: What to search for
-            num_results: Number of search results to gather
+            num_results: Number of usable sources to gather
             silent: If True, suppress print statements
+            prefetched: Future of an already-dispatched fetch for this query
+            fetch_cache: Batch-wide cache that deduplicates identical searches
+            cancel: Token that stops further fetch rounds
             
         Returns:
-            Dictionary containing subtask results
+            Dictionary containing subtask results and fetch yield stats
+            
+        Raises:
+            Cancelled: If cancel was cancelled before the subagent finished
+        
+        Fetching is adaptive: the first batch asks for exactly num_results, and
+        follow-up rounds (a larger page of the same query, then reformulations)
+        run only while the subagent is short of usable sources.
         """
         logger = activity_manager.get(session_id)
         logger.log(f"Subagent {subtask_id}: Researching {search_query}", data={"subtask": subtask_id, "query": search_query})
         if not silent:
             print(f"  🤖 Subagent {subtask_id}: Researching {search_query}")
         
-        # Search the web
-        results = self.search_service.search(search_query, num_results)
-        logger.update_subagent(subtask_id, status="searching", requested=num_results)
-        
-        # Process and filter results
         sources = []
-        for idx, result in enumerate(results, start=1):
-            # Extract URL if available in Exa result objects
-            url = getattr(result, "url", None)
-            # Include sources with any non-trivial text to improve visibility
-            if result.text and len(result.text.strip()) > 30:
-                snippet = result.text.strip()[:300]
-                sources.append({
-                    "title": result.title,
-                    "content": snippet,
-                    "url": url
-                })
-                # Per-result increment event
-                logger.log(
-                    "Source collected",
-                    data={
-                        "subtask": subtask_id,
-                        "index": idx,
+        seen = set()
+        stats = {"rounds": 0, "requested": 0, "returned": 0, "usable": 0, "duplicates": 0, "origins": []}
+        
+        # Serve from the local index when it has enough fresh hits, else search the web
+        round_query, batch = search_query, num_results
+        reformulations = 0
+        while True:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            if stats["rounds"] == 0 and prefetched is not None:
+                results, origin = self._await_prefetched(prefetched, cancel)
+            else:
+                results, origin = self.fetch(round_query, batch, fetch_cache, cancel)
+            stats["rounds"] += 1
+            stats["requested"] += batch
+            stats["returned"] += len(results)
+            stats["origins"].append(origin)
+            logger.update_subagent(subtask_id, status="searching", requested=stats["requested"], origin=origin)
+            
+            # Process and filter results, stopping as soon as the target is met
+            for result in results:
+                if len(sources) >= num_results:
+                    break
+                # Extract URL if available in Exa result objects
+                url = getattr(result, "url", None)
+                key = url or result.title
+                if key in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(key)
+                # Include sources with any non-trivial text to improve visibility
+                if result.text and len(result.text.strip()) > Settings.MIN_SOURCE_CHARS:
+                    snippet = result.text.strip()[:300]
+                    if self.content_store is not None:
+                        # Identical sources share one stored text across all results
+                        source_id, snippet = self.content_store.put(url, result.title, snippet)
+                    else:
+                        source_id = content_id(url, snippet)
+                    sources.append({
+                        "id": source_id,
                         "title": result.title,
-                        "has_url": bool(url),
-                    },
-                )
-        logger.log("Subagent sources processed", data={"subtask": subtask_id, "sources": len(sources)})
+                        "content": snippet,
+                        "url": url
+                    })
+                    # Per-result increment event
+                    logger.log(
+                        "Source collected",
+                        data={
+                            "subtask": subtask_id,
+                            "index": len(sources),
+                            "title": result.title,
+                            "has_url": bool(url),
+                        },
+                    )
+            
+            if len(sources) >= num_results or stats["rounds"] >= Settings.ADAPTIVE_MAX_ROUNDS:
+                break
+            round_query, batch = self._follow_up(search_query, num_results, len(sources), stats, reformulations)
+            if round_query != search_query:
+                reformulations += 1
+            logger.log(
+                "Subagent under target, fetching more",
+                data={"subtask": subtask_id, "usable": len(sources), "target": num_results, "next_query": round_query, "next_batch": batch},
+            )
+        
+        stats["usable"] = len(sources)
+        stats["yield"] = round(len(sources) / stats["returned"], 3) if stats["returned"] else 0.0
+        logger.update_subagent(subtask_id, yield_stats=stats)
+        logger.log("Subagent sources processed", data={"subtask": subtask_id, "sources": len(sources), "stats": stats})
         
         return {
             "subtask": subtask_id,
             "search_focus": search_query,
-            "sources": sources
-        }
\ No newline at end of file
+            "sources": sources,
+            "stats": stats
+        }
+    
+    def _await_prefetched(self, prefetched: Future, cancel: Optional[CancellationToken]) -> tuple:
+        """Result of the speculative search, given up on as soon as cancel is cancelled"""
+        if cancel is None:
+            return prefetched.result()
+        while True:
+            try:
+                return prefetched.result(timeout=self.CANCEL_POLL_SECONDS)
+            except FuturesTimeout:
+                cancel.raise_if_cancelled()
+    
+    @staticmethod
+    def _follow_up(search_query: str, target: int, usable: int, stats: dict, reformulations: int) -> tuple:
+        """
+        Plan the next fetch round from the yield observed so far.
+        
+        Round 2 asks the same query for a larger page (Exa has no offset, so
+        already-seen results are skipped). Later rounds, and round 2 when round 1
+        already asked for the largest page, reformulate the query.
+        
+        Args:
+            search_query: The subtask's original query
+            target: Usable sources the subagent needs
+            usable: Usable sources gathered so far
+            stats: Fetch stats of the rounds run so far
+            reformulations: Reformulated rounds already run
+        
+        Returns:
+            Tuple of (query, number of results to request)
+        """
+        observed_yield = usable / stats["returned"] if stats["returned"] else 0.0
+        needed = target - usable
+        # Expect the same yield as before, but never assume it is worse than 1 in 4
+        fresh = math.ceil(needed / max(observed_yield, 0.25))
+        if stats["rounds"] == 1:
+            batch = min(Settings.ADAPTIVE_MAX_BATCH, stats["returned"] + fresh)
+            # A page no larger than round 1's would return the same results again
+            if batch > stats["requested"]:
+                return search_query, batch
+        suffix = Settings.ADAPTIVE_REFORMULATIONS[reformulations % len(Settings.ADAPTIVE_REFORMULATIONS)]
+        return f"{search_query} {suffix}", min(Settings.ADAPTIVE_MAX_BATCH, fresh)
+    
+    def fetch(self, search_query: str, num_results: int, cache: Optional[SharedFetchCache] = None, cancel: Optional[CancellationToken] = None) -> tuple:
+        """
+        Get raw search results, preferring the local source index.
+        
+        Args:
+            search_query: What to search for
+            num_results: Number of search results to gather
+            cache: Optional batch-wide cache consulted before fetching
+            cancel: Token checked before calling Exa
+            
+        Returns:
+            Tuple of (results, origin) where origin is "local_index" or "exa"
+        """
+        if cache is not None:
+            return cache.fetch(search_query, num_results, self._fetch, cancel)
+        return self._fetch(search_query, num_results, cancel)
+    
+    def _fetch(self, search_query: str, num_results: int, cancel: Optional[CancellationToken] = None) -> tuple:
+        if self.source_index is not None:
+            local = self.source_index.search(search_query, num_results)
+            if len(local) >= num_results:
+                return local, "local_index"
+        return self.search_service.search(search_query, num_results, cancel=cancel), "exa"
\ No newline at end of file
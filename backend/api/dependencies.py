@@ -2,17 +2,63 @@
 FastAPI dependencies for dependency injection.
 Ensures single instances of services are shared across requests.
 """
+import threading
 from functools import lru_cache
+from typing import Optional
+from config.settings import Settings
 from services.search_service import SearchService
+from services.source_index import SourceIndex
+from services.checkpoint_store import CheckpointStore
+from services.content_store import ContentStore
+from services.history_store import HistoryStore
+from services.result_cache import ResultCache
 from services.ai_service import AIService
 from agents.sub_agent import SubAgent
 from agents.lead_agent import LeadAgent
+from agents.prefetcher import Prefetcher
+from utils.admission import admission
+from utils.cancellation import cancellations
+from utils.cpu_pool import cpu_pool
+from utils.fair_scheduler import research_scheduler
 
 # Cache these so they're created once and reused
+@lru_cache()
+def get_source_index() -> Optional[SourceIndex]:
+    """Get singleton SourceIndex instance (None when disabled)"""
+    if not Settings.SOURCE_INDEX_ENABLED:
+        return None
+    return SourceIndex()
+
+@lru_cache()
+def get_content_store() -> ContentStore:
+    """Get singleton ContentStore instance"""
+    return ContentStore()
+
+@lru_cache()
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Get singleton CheckpointStore instance (None when disabled)"""
+    if not Settings.CHECKPOINT_ENABLED:
+        return None
+    return CheckpointStore()
+
+@lru_cache()
+def get_history_store() -> Optional[HistoryStore]:
+    """Get singleton HistoryStore instance (None when disabled)"""
+    if not Settings.HISTORY_ENABLED:
+        return None
+    return HistoryStore()
+
+@lru_cache()
+def get_result_cache() -> Optional[ResultCache]:
+    """Get singleton ResultCache instance (None when disabled)"""
+    if not Settings.RESULT_CACHE_ENABLED:
+        return None
+    return ResultCache(get_content_store())
+
 @lru_cache()
 def get_search_service() -> SearchService:
     """Get singleton SearchService instance"""
-    return SearchService()
+    return SearchService(get_source_index())
 
 @lru_cache()
 def get_ai_service() -> AIService:
@@ -23,11 +69,68 @@ def get_ai_service() -> AIService:
 def get_sub_agent() -> SubAgent:
     """Get singleton SubAgent instance"""
     search_service = get_search_service()
-    return SubAgent(search_service)
+    return SubAgent(search_service, get_source_index(), get_content_store())
 
 @lru_cache()
 def get_lead_agent() -> LeadAgent:
     """Get singleton LeadAgent instance"""
     ai_service = get_ai_service()
     sub_agent = get_sub_agent()
-    return LeadAgent(ai_service, sub_agent)
\ No newline at end of file
+    return LeadAgent(ai_service, sub_agent, checkpoints=get_checkpoint_store(), result_cache=get_result_cache())
+
+@lru_cache()
+def get_prefetcher() -> Optional[Prefetcher]:
+    """Get singleton Prefetcher instance (None when disabled or there is no result cache)"""
+    cache = get_result_cache()
+    if not Settings.PREFETCH_ENABLED or cache is None:
+        return None
+    return Prefetcher(get_lead_agent(), cache, research_scheduler, admission)
+
+_close_lock = threading.Lock()
+_services_closed = False
+
+def _created(getter):
+    """The singleton a getter returns, or None if it was never created"""
+    return getter() if getter.cache_info().currsize else None
+
+def close_services() -> None:
+    """
+    Release what the services hold, when the server or the CLI shuts down.
+    Running research is cancelled and, once it has returned (or after
+    SHUTDOWN_CANCEL_GRACE_SECONDS), left resumable; then the CPU pool is stopped, the
+    source index writer is flushed and closed and cold source segments are dropped.
+    Services that were never created are not created here. Only the first call
+    does anything, so the drain timer and the shutdown hook can both call it.
+    """
+    global _services_closed
+    # A second caller waits for the first to finish, then has nothing to do
+    with _close_lock:
+        if not _services_closed:
+            _services_closed = True
+            _close_services()
+
+def _close_services() -> None:
+    prefetcher = _created(get_prefetcher)
+    if prefetcher is not None:
+        prefetcher.stop()
+    # Research still running after the drain is stopped and left resumable
+    cancelled = cancellations.cancel_all("server shutting down")
+    if cancelled:
+        print(f"🛑 Cancelled {cancelled} running research requests")
+    lead_agent = _created(get_lead_agent)
+    if lead_agent is not None and not lead_agent.wait_idle(Settings.SHUTDOWN_CANCEL_GRACE_SECONDS):
+        print(f"⚠️ Research still running after {Settings.SHUTDOWN_CANCEL_GRACE_SECONDS:.0f}s, closing stores anyway")
+    checkpoints = _created(get_checkpoint_store)
+    if checkpoints is not None:
+        interrupted = checkpoints.interrupt_owned()
+        checkpoints.close()
+        if interrupted:
+            print(f"💾 {len(interrupted)} research sessions left resumable")
+    cpu_pool.shutdown()
+    source_index = _created(get_source_index)
+    if source_index is not None:
+        source_index.close()
+    content_store = _created(get_content_store)
+    if content_store is not None:
+        # Drop this process's cold source segments
+        content_store.close()
@@ -2,8 +2,8 @@
 Pydantic models for API request and response validation.
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Dict, List, Optional
 
 
 class ResearchRequest(BaseModel):
@@ -16,8 +16,25 @@ class ResearchRequest(BaseModel):
     model: Optional[str] = Field(
         "gpt-oss-120b", description="AI model to use for research"
     )
+    deadline_ms: Optional[int] = Field(
+        None,
+        ge=1000,
+        le=300000,
+        description="Latency budget in ms; the best report achievable by then is returned",
+    )
+    refine_session_id: Optional[str] = Field(
+        None,
+        description="Completed session this query follows up on; its sources are reused and its report refined",
+    )
+    token_budget: Optional[int] = Field(
+        None,
+        ge=1000,
+        le=1000000,
+        description="LLM tokens the research may spend; the report's length and context are capped to fit",
+    )
 
-    @validator("model")
+    @field_validator("model")
+    @classmethod
     def validate_model(cls, v):
         """Validate that the model is in the allowed list."""
         from config.settings import Settings
@@ -29,30 +46,101 @@ class ResearchRequest(BaseModel):
             )
         return v
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "query": "Best Agentic AI Framework",
                 "num_results_per_agent": 2,
                 "model": "gpt-oss-120b",
             }
         }
+    )
+
+
+class BatchResearchRequest(BaseModel):
+    """Request model for batch research endpoint"""
+
+    queries: List[str] = Field(
+        ..., min_length=1, description="Research queries (3-500 characters each)"
+    )
+    num_results_per_agent: Optional[int] = Field(
+        2, ge=1, le=5, description="Results per subagent"
+    )
+    model: Optional[str] = Field(None, description="AI model to use for research")
+    deadline_ms: Optional[int] = Field(
+        None, ge=1000, le=300000, description="Per-query latency budget in ms"
+    )
+    token_budget: Optional[int] = Field(
+        None, ge=1000, le=1000000, description="Per-query LLM token budget"
+    )
+
+    @field_validator("queries")
+    @classmethod
+    def validate_queries(cls, v):
+        """Enforce the batch size cap and per-query length limits."""
+        from config.settings import Settings
+
+        if len(v) > Settings.BATCH_MAX_QUERIES:
+            raise ValueError(f"At most {Settings.BATCH_MAX_QUERIES} queries per batch")
+        for query in v:
+            if not 3 <= len(query) <= 500:
+                raise ValueError("Each query must be 3-500 characters")
+        return v
+
+    @field_validator("model")
+    @classmethod
+    def validate_model(cls, v):
+        """Validate that the model is in the allowed list."""
+        from config.settings import Settings
+
+        if v is not None and v not in Settings.AVAILABLE_MODELS:
+            raise ValueError(
+                f"Invalid model '{v}'. Allowed models: {', '.join(Settings.AVAILABLE_MODELS)}"
+            )
+        return v
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "queries": ["Best Agentic AI Framework", "Vector database comparison"],
+                "num_results_per_agent": 2,
+            }
+        }
+    )
 
 
 class Source(BaseModel):
     """Source information"""
 
+    id: Optional[str] = Field(None, description="Content hash; identical sources share one id")
     title: str
     content: str
     url: Optional[str] = None
 
 
+class FetchStats(BaseModel):
+    """Adaptive fetch yield for a single subagent"""
+
+    rounds: int
+    requested: int
+    returned: int
+    usable: int
+    duplicates: int
+    near_duplicates: int = Field(0, description="Usable sources dropped as near-copies of a better one")
+    origins: List[str] = Field(default_factory=list, description="'exa' or 'local_index' per round")
+    yield_: float = Field(0.0, alias="yield", description="Usable sources / returned results")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 class SubagentResult(BaseModel):
     """Result from a single subagent"""
 
     subtask: int
     search_focus: str
     sources: List[Source]
+    stats: Optional[FetchStats] = None
+    reused: bool = Field(False, description="Carried over from the session a follow-up refines")
 
 
 class ComplexityAnalysis(BaseModel):
@@ -64,6 +152,71 @@ class ComplexityAnalysis(BaseModel):
     )
     explanation: str = Field(..., description="Explanation for allocation decision")
     estimated_sources: int = Field(..., description="Estimated sources needed")
+    analysis_path: Optional[str] = Field(
+        None, description="How the analysis was produced: 'heuristic', 'llm' or 'fallback'"
+    )
+    confidence: Optional[float] = Field(
+        None, description="Local heuristic confidence (heuristic path only)"
+    )
+
+
+class DeadlineReport(BaseModel):
+    """How a deadline-bounded request used its budget"""
+
+    deadline_ms: int
+    elapsed_ms: int
+    met: bool
+    degraded: bool = Field(..., description="True if anything was cut to meet the deadline")
+    cuts: List[str] = Field(
+        default_factory=list, description="Degradations applied, e.g. 'smaller_model'"
+    )
+
+
+class ModelUsage(BaseModel):
+    """LLM usage of one model"""
+
+    llm_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class UsageReport(BaseModel):
+    """Upstream usage of a research request"""
+
+    llm_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    search_calls: int = Field(..., description="Exa searches made (cached and shared searches excluded)")
+    search_results: int
+    by_model: Dict[str, ModelUsage] = Field(default_factory=dict)
+    token_budget: Optional[int] = None
+    budget_cuts: List[str] = Field(
+        default_factory=list, description="Reductions applied to stay within token_budget"
+    )
+    estimated: bool = Field(False, description="True if some token counts were estimated from text length")
+
+
+class ProfileFrame(BaseModel):
+    """A function and how often it was sampled running"""
+
+    frame: str = Field(..., description="module.function:line")
+    samples: int
+
+
+class ProfileReport(BaseModel):
+    """Sampling profile of one research request"""
+
+    samples: int
+    interval_ms: float
+    duration_ms: int
+    top_self: List[ProfileFrame] = Field(
+        default_factory=list, description="Functions most often on top of the stack"
+    )
+    folded: str = Field(
+        ..., description="Collapsed stacks ('frame;frame;frame count' per line) for flamegraph.pl or speedscope"
+    )
 
 
 class ResearchResponse(BaseModel):
@@ -77,9 +230,21 @@ class ResearchResponse(BaseModel):
     subagent_results: Optional[List[SubagentResult]] = None
     complexity_analysis: Optional[ComplexityAnalysis] = None
     model: Optional[str] = None
+    synthesis_mode: Optional[str] = Field(
+        None,
+        description="'single', 'map_reduce' (per-subagent summaries reduced) or 'refinement' (follow-up)",
+    )
+    deadline: Optional[DeadlineReport] = None
+    refined_from: Optional[str] = Field(None, description="Session a follow-up query refined")
+    cached: Optional[bool] = Field(None, description="True when served from the result cache")
+    usage: Optional[UsageReport] = None
+    admission: Optional[str] = Field(
+        None, description="'degraded' when server load switched the request to the cheaper mode"
+    )
+    profile: Optional[ProfileReport] = Field(None, description="Present when ?profile=true was requested")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "query": "Best Agentic AI Framework",
                 "subagents": 4,
@@ -95,6 +260,30 @@ class ResearchResponse(BaseModel):
                 "model": "gpt-oss-120b",
             }
         }
+    )
+
+
+class HistoryItem(BaseModel):
+    """Summary of a stored research report"""
+
+    session_id: str
+    query: str
+    model: Optional[str] = None
+    subagents: int
+    total_sources: int
+    created_at: float = Field(..., description="Unix timestamp the report was stored")
+    snippet: Optional[str] = Field(
+        None, description="Matching excerpt of the synthesis (search results only)"
+    )
+
+
+class HistoryPage(BaseModel):
+    """One page of research history"""
+
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as cursor to fetch the next page; null on the last page"
+    )
 
 
 class ModelInfo(BaseModel):
@@ -0,0 +1,116 @@
+"""
+Fast JSON rendering for research payloads.
+Encodes with orjson when it is installed, trims responses to the requested fields,
+and compresses them with brotli or gzip as negotiated through Accept-Encoding.
+"""
+
+import gzip
+import json
+from typing import Any, Iterable, Optional, Set
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from config.settings import Settings
+
+# Both are in requirements.txt; without them the server still runs
+try:
+    import orjson
+except ImportError:  # The stdlib encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Only gzip is offered
+    brotli = None
+
+# Fast settings suited to compressing a response per request
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def json_bytes(content: Any, include: Optional[Set[str]] = None) -> bytes:
+    """
+    Encode a model or plain JSON data.
+
+    Models are serialized by pydantic's compiled serializer (by alias), restricted
+    to the include fields; other data goes through orjson or the stdlib encoder.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json(by_alias=True, include=include).encode()
+    if include is not None:
+        content = {key: value for key, value in content.items() if key in include}
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def parse_fields(fields: Optional[str], model: type) -> Optional[Set[str]]:
+    """
+    Parse a comma-separated fields= parameter against a response model.
+
+    Returns:
+        The selected top-level field names, or None to return every field
+
+    Raises:
+        HTTPException: 400 for unknown field names
+    """
+    if not fields:
+        return None
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(model.model_fields)}",
+        )
+    return selected
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding the client accepts: br, then gzip (None for identity)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    offered: Iterable[str] = ("br", "gzip") if brotli is not None else ("gzip",)
+    for coding in offered:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    """Compress a body with a coding chosen by negotiate_encoding"""
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+async def json_response(
+    content: Any,
+    request: Request,
+    include: Optional[Set[str]] = None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """
+    Render content as a JSON response, compressed when the client accepts it
+    and the body is large enough to be worth it.
+    """
+    body = json_bytes(content, include)
+    headers = {"Vary": "Accept-Encoding"}
+    coding = None
+    if len(body) >= Settings.RESPONSE_COMPRESSION_MIN_BYTES:
+        coding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if coding is not None:
+        # Compressing a large report takes milliseconds: keep it off the event loop
+        body = await run_in_threadpool(compress, body, coding)
+        headers["Content-Encoding"] = coding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -2,71 +2,179 @@
 FastAPI routes for the research agent API.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import StreamingResponse
-from api.models import ResearchRequest, ResearchResponse, HealthResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from api.models import (
+    BatchResearchRequest,
+    HistoryPage,
+    ResearchRequest,
+    ResearchResponse,
+    HealthResponse,
+    ProfileReport,
+    UsageReport,
+)
 from agents.lead_agent import LeadAgent
-from api.dependencies import get_lead_agent, get_search_service, get_ai_service
+from api.dependencies import get_history_store, get_lead_agent
+from api.responses import json_bytes, json_response, parse_fields
+from services.history_store import HistoryStore
 from utils.activity import activity_manager
-from utils.auth import verify_api_key
+from services.checkpoint_store import CheckpointBusy, CheckpointNotFound
+from utils.cancellation import CancellationToken, Cancelled, cancellations
+from utils.lifecycle import lifecycle
+from utils.metrics import metrics
+from utils.usage import usage_ledger
+from utils.profiler import Profile, memory_tracer
+from utils.auth import Tenant, get_tenant, verify_admin_key
+from utils.admission import ADMIT, Overloaded, admission
+from config.settings import Settings
 from middleware.rate_limit import rate_limiter
-from typing import Optional
+from typing import Optional, Tuple
 import asyncio
 import json
 
 router = APIRouter()
 
+# How often a running request checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Retry-After sent while this worker drains for shutdown
+DRAIN_RETRY_AFTER_SECONDS = 5
+
 
 @router.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check(
-    search_service=Depends(get_search_service), ai_service=Depends(get_ai_service)
-):
+async def health_check():
     """
-    Health check endpoint to verify all services are running.
+    Health check endpoint summarizing the readiness checks.
     """
+    ready, report = await run_in_threadpool(lifecycle.readiness)
+    if not report["startup_complete"]:
+        return HealthResponse(status="starting", message="Services are starting up", services={})
+    services = {
+        name: "operational" if check.get("ok") else "unavailable"
+        for name, check in report["checks"].items()
+    }
     return HealthResponse(
-        status="healthy",
-        message="All services operational",
-        services={"search_service": "operational", "ai_service": "operational"},
+        status="healthy" if ready else "degraded",
+        message="All services operational" if ready else "Some services are unavailable",
+        services=services,
+    )
+
+
+@router.get("/live", tags=["Health"])
+async def live():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return lifecycle.liveness()
+
+
+@router.get("/ready", tags=["Health"])
+async def ready():
+    """
+    Readiness probe: startup (client init, connection warm-up) is complete, the
+    source index is writable and no upstream circuit breaker is open. Answers 503 otherwise.
+    """
+    is_ready, report = await run_in_threadpool(lifecycle.readiness)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=report,
     )
 
 
+@router.get("/metrics", tags=["Health"])
+async def get_metrics():
+    """
+    Runtime metrics: startup timing, HTTP connection pool utilization and wait times,
+    DNS cache hits, circuit breaker states and event loop blocking.
+    """
+    return metrics.snapshot()
+
+
 @router.post("/research", response_model=ResearchResponse, tags=["Research"])
 async def research(
     request: ResearchRequest,
+    http_request: Request,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated response fields to return, e.g. synthesis,query"
+    ),
+    profile: bool = Query(False, description="Profile the request (needs X-Admin-Key)"),
     lead_agent: LeadAgent = Depends(get_lead_agent),
-    _: bool = Depends(verify_api_key),
+    history: Optional[HistoryStore] = Depends(get_history_store),
+    tenant: Tenant = Depends(get_tenant),
 ):
     """
     Perform multi-agent research on a given query.
 
     - **query**: The research question or topic (3-500 characters)
     - **num_results_per_agent**: Number of search results per subagent (1-5)
+    - **refine_session_id**: Optional completed session to follow up on. Angles it
+      already covered reuse its sources, only new angles are searched, and its
+      report is refined rather than rewritten. Unknown sessions answer 404.
 
     Returns comprehensive research findings synthesized by multiple specialized agents.
+    The report is also stored in the research history (`GET /history/{session_id}`).
+    Pass `?fields=synthesis` to skip the per-subagent sources; large responses are
+    compressed (brotli or gzip) when the client sends `Accept-Encoding`.
+    The research is cancelled if the client disconnects or calls
+    `DELETE /research/{session_id}`. If it is interrupted (cancelled, failed or
+    the server restarted) it can be continued with `POST /research/{session_id}/resume`.
+    When the server is busy, requests wait in a queue shared fairly across API keys.
+    Under sustained overload new requests run in a cheaper mode (`admission` is
+    `"degraded"`), or are turned away with 503 and `Retry-After`.
+    The `usage` block reports the LLM tokens and Exa searches spent, and
+    `token_budget` caps them: the report's length and context are cut to fit.
+    With `?profile=true` and the `X-Admin-Key` header, the response carries a
+    sampling profile of the request in collapsed-stack (flame graph) format.
     """
+    _reject_if_draining()
+    include = parse_fields(fields, ResearchResponse)
+    deadline_ms, degraded = _admit(request.deadline_ms)
+    profiler = _start_profile(http_request) if profile else None
     try:
         # Create session and perform research using the lead agent
         session_id = activity_manager.create_session(request.query)
-        result = lead_agent.research(
-            request.query,
-            num_results_per_agent=request.num_results_per_agent or 2,
-            silent=True,
-            session_id=session_id,
-            model=request.model,
+        result = await _run_cancellable(
+            http_request,
+            session_id,
+            tenant,
+            _profiled(
+                profiler,
+                lambda cancel: lead_agent.research(
+                    request.query,
+                    num_results_per_agent=request.num_results_per_agent or 2,
+                    silent=True,
+                    session_id=session_id,
+                    model=request.model,
+                    deadline_ms=deadline_ms,
+                    cancel=cancel,
+                    refine_session_id=request.refine_session_id,
+                    token_budget=request.token_budget,
+                    account=tenant.name,
+                ),
+            ),
         )
+        response = _build_response(result, session_id)
+        if degraded:
+            response.admission = "degraded"
+        await run_in_threadpool(_record, history, response, tenant.name)
+        if profiler is not None:
+            # Not kept in the history
+            response.profile = ProfileReport(**profiler.stop().report())
+        return await json_response(response, http_request, include)
 
-        return ResearchResponse(
-            query=result["query"],
-            subagents=result["subagents"],
-            total_sources=result["total_sources"],
-            synthesis=result["synthesis"],
-            session_id=session_id,
-            subagent_results=result.get("subagent_results"),
-            complexity_analysis=result.get("complexity_analysis"),
-            model=result.get("model"),
+    except CheckpointNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No completed research for refine_session_id.",
+        )
+    except Overloaded as e:
+        raise _shed(e)
+    except Cancelled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Research was cancelled.",
         )
-
     except Exception as e:
         # Log the actual error for debugging
         import logging
@@ -79,6 +187,421 @@ async def research(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Research operation failed. Please try again later.",
         )
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+
+@router.post("/research/batch", tags=["Research"])
+async def research_batch(
+    request: BatchResearchRequest,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated response fields to return, e.g. synthesis,query"
+    ),
+    lead_agent: LeadAgent = Depends(get_lead_agent),
+    history: Optional[HistoryStore] = Depends(get_history_store),
+    tenant: Tenant = Depends(get_tenant),
+):
+    """
+    Research many queries in one call, streaming results as NDJSON.
+
+    - **queries**: List of research questions (3-500 characters each)
+    - **num_results_per_agent**: Number of search results per subagent (1-5)
+
+    Each line is `{"index", "query", "session_id", "status", "result" | "error"}`,
+    written as soon as that query completes. Identical subtask searches are shared
+    across the batch. The last line is a `{"summary": ...}` of deduplication counts.
+    `fields` selects the fields of each line's `result`, as for `POST /research`.
+    Queries still running are cancelled if the client disconnects, and a single
+    query can be cancelled with `DELETE /research/{session_id}`.
+    Each query takes its own turn in the fair queue, so a large batch shares
+    capacity with other API keys instead of taking it over. Under overload the
+    whole batch runs in the cheaper mode or is turned away with 503, and queries
+    that wait too long for a slot end with status `overloaded`.
+    """
+    _reject_if_draining()
+    include = parse_fields(fields, ResearchResponse)
+    deadline_ms, _ = _admit(request.deadline_ms)
+    session_ids = [activity_manager.create_session(q) for q in request.queries]
+    cancel_tokens = [CancellationToken() for _ in request.queries]
+    for session_id, token in zip(session_ids, cancel_tokens):
+        cancellations.register(session_id, token, tenant.name)
+    items = lead_agent.research_batch(
+        request.queries,
+        num_results_per_agent=request.num_results_per_agent or 2,
+        model=request.model,
+        deadline_ms=deadline_ms,
+        session_ids=session_ids,
+        cancel_tokens=cancel_tokens,
+        admit=lambda cancel: admission.slot(tenant, cancel),
+        token_budget=request.token_budget,
+        account=tenant.name,
+    )
+
+    def ndjson():
+        # Sync generator: Starlette iterates it in the threadpool and closes it
+        # when the client disconnects, which cancels whatever is still running
+        try:
+            for item in items:
+                yield json_bytes(_batch_line(item, history, include, tenant.name)) + b"\n"
+        finally:
+            for session_id, token in zip(session_ids, cancel_tokens):
+                token.cancel("client disconnected")
+                cancellations.unregister(session_id)
+            items.close()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.delete("/research/{session_id}", tags=["Research"])
+async def cancel_research(session_id: str, tenant: Tenant = Depends(get_tenant)):
+    """
+    Cancel a running research request (single or batch query) by its session id.
+
+    Pending searches are not started and in-flight LLM calls are aborted. Research
+    shared with identical concurrent requests keeps running for the others.
+    Only the API key that started the research can cancel it (404 for any other).
+    """
+    if not cancellations.cancel(session_id, owner=tenant.name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No running research for this session.",
+        )
+    return {"session_id": session_id, "status": "cancelling"}
+
+
+@router.get("/research/{session_id}/usage", response_model=UsageReport, tags=["Research"])
+async def session_usage(session_id: str, tenant: Tenant = Depends(get_tenant)):
+    """
+    Total upstream usage of a research session, including every resume of it.
+
+    Kept in memory for recent sessions of this worker; per-model and per-API-key
+    totals are under `usage` in `GET /metrics`. Sessions of other API keys answer 404.
+    """
+    totals = usage_ledger.session(session_id, tenant.name)
+    if totals is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No usage recorded for this session.",
+        )
+    return UsageReport(**totals)
+
+
+@router.post("/research/{session_id}/resume", response_model=ResearchResponse, tags=["Research"])
+async def resume_research(
+    session_id: str,
+    http_request: Request,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated response fields to return, e.g. synthesis,query"
+    ),
+    lead_agent: LeadAgent = Depends(get_lead_agent),
+    history: Optional[HistoryStore] = Depends(get_history_store),
+    tenant: Tenant = Depends(get_tenant),
+):
+    """
+    Resume an interrupted research session from its last checkpoint.
+
+    Works across restarts and workers: the plan, finished subagents and their
+    summaries are reused, and only the remaining work runs again. A session
+    that already completed returns its saved result. Answers 404 if the session
+    was never checkpointed and 409 while it is still running (here or on another
+    worker). Sessions of other API keys answer 404. Accepts `fields` like
+    `POST /research`. Answers 503 under overload.
+    """
+    _reject_if_draining()
+    include = parse_fields(fields, ResearchResponse)
+    if cancellations.running(session_id, tenant.name):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Research for this session is still running.",
+        )
+    # A resumed session keeps its original parameters, so it is never degraded
+    _admit(None)
+    try:
+        result = await _run_cancellable(
+            http_request,
+            session_id,
+            tenant,
+            lambda cancel: lead_agent.resume(session_id, silent=True, cancel=cancel, account=tenant.name),
+        )
+        response = _build_response(result, session_id)
+        await run_in_threadpool(_record, history, response, tenant.name)
+        return await json_response(response, http_request, include)
+
+    except CheckpointNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No checkpoint for this session.",
+        )
+    except CheckpointBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Research for this session is still running.",
+        )
+    except Overloaded as e:
+        raise _shed(e)
+    except Cancelled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Research was cancelled.",
+        )
+    except Exception as e:
+        import logging
+
+        logger = logging.getLogger(__name__)
+        logger.error(f"Resume failed: {str(e)}", exc_info=True)
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Research operation failed. Please try again later.",
+        )
+
+
+def _reject_if_draining() -> None:
+    """Turn away new research while this worker shuts down"""
+    if lifecycle.draining:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down. Please retry.",
+            headers={"Retry-After": str(DRAIN_RETRY_AFTER_SECONDS)},
+        )
+
+
+def _admit(deadline_ms: Optional[int]) -> Tuple[Optional[int], bool]:
+    """
+    Admission control for a new research request.
+
+    Returns:
+        Tuple of (deadline to research with, whether it was degraded); a degraded
+        request gets a tight deadline, which selects the fast model with fewer
+        subagents and sources
+
+    Raises:
+        HTTPException: 503 with Retry-After if the request is shed
+    """
+    try:
+        decision = admission.check()
+    except Overloaded as e:
+        raise _shed(e)
+    if decision == ADMIT:
+        return deadline_ms, False
+    return min(deadline_ms or Settings.ADMISSION_DEGRADED_DEADLINE_MS, Settings.ADMISSION_DEGRADED_DEADLINE_MS), True
+
+
+def _shed(error: Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"{error.reason}. Please retry.",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+async def _run_cancellable(request: Request, session_id: str, tenant: Tenant, work):
+    """
+    Run blocking research work off the event loop, once the tenant's turn in
+    the fair queue comes, with a cancellation token that fires on client
+    disconnect, DELETE /research/{session_id}, or when the request itself is
+    aborted (e.g. at the end of a shutdown drain).
+
+    Raises:
+        Overloaded: If the request waited too long for its turn
+    """
+    cancel = CancellationToken()
+    cancellations.register(session_id, cancel, tenant.name)
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, cancel))
+    try:
+        # Queue on the event loop, then run the blocking pipeline off it so
+        # concurrent requests (and identical ones coalesced by the lead agent)
+        # proceed in parallel
+        async with admission.slot_async(tenant, cancel):
+            return await run_in_threadpool(work, cancel)
+    finally:
+        watcher.cancel()
+        cancellations.unregister(session_id)
+        # No-op after completion; otherwise stops the pipeline thread
+        cancel.cancel("request ended")
+
+
+def _start_profile(request: Request) -> Profile:
+    """Start profiling a request for an admin (403 for anyone else)"""
+    verify_admin_key(request.headers.get("x-admin-key"))
+    return Profile(Settings.PROFILE_INTERVAL_MS).start()
+
+
+def _profiled(profiler: Optional[Profile], work):
+    """
+    Sample the thread that runs work, and the subagent workers it starts
+    (they inherit the active profile through the context)
+    """
+    if profiler is None:
+        return work
+
+    def run(cancel):
+        with profiler.active(), profiler.attach("request"):
+            return work(cancel)
+
+    return run
+
+
+async def _cancel_on_disconnect(request: Request, cancel: CancellationToken) -> None:
+    """Cancel the token once the client has gone away"""
+    while not cancel.cancelled:
+        if await request.is_disconnected():
+            cancel.cancel("client disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+def _batch_line(item: dict, history: Optional[HistoryStore], include: Optional[set], account: str) -> dict:
+    """NDJSON line for one research_batch item"""
+    if "summary" in item:
+        return item
+    if item.get("cancelled"):
+        return {
+            "index": item["index"],
+            "query": item["query"],
+            "session_id": item["session_id"],
+            "status": "cancelled",
+        }
+    if item.get("overloaded"):
+        return {
+            "index": item["index"],
+            "query": item["query"],
+            "session_id": item["session_id"],
+            "status": "overloaded",
+            "retry_after": item["retry_after"],
+        }
+    if "error" in item:
+        import logging
+
+        logging.getLogger(__name__).error(
+            f"Batch research failed for query {item['index']}: {item['error']}"
+        )
+        return {
+            "index": item["index"],
+            "query": item["query"],
+            "session_id": item["session_id"],
+            "status": "error",
+            "error": "Research operation failed.",
+        }
+    response = _build_response(item["result"], item["session_id"])
+    _record(history, response, account)
+    return {
+        "index": item["index"],
+        "query": item["query"],
+        "session_id": item["session_id"],
+        "status": "ok",
+        "result": response.model_dump(mode="json", by_alias=True, include=include),
+    }
+
+
+def _record(history: Optional[HistoryStore], response: ResearchResponse, account: str) -> None:
+    """Store a finished report in the history under its API key; a failing store never fails the request"""
+    if history is None:
+        return
+    try:
+        history.save(response.model_dump(mode="json", by_alias=True), account)
+    except Exception as e:
+        import logging
+
+        logging.getLogger(__name__).error(f"Failed to store research history: {str(e)}")
+
+
+def _build_response(result: dict, session_id: Optional[str]) -> ResearchResponse:
+    """Build the API response model from a LeadAgent result"""
+    return ResearchResponse(
+        query=result["query"],
+        subagents=result["subagents"],
+        total_sources=result["total_sources"],
+        synthesis=result["synthesis"],
+        session_id=session_id,
+        subagent_results=result.get("subagent_results"),
+        complexity_analysis=result.get("complexity_analysis"),
+        model=result.get("model"),
+        synthesis_mode=result.get("synthesis_mode"),
+        deadline=result.get("deadline"),
+        refined_from=result.get("refined_from"),
+        cached=result.get("cached"),
+        usage=result.get("usage"),
+    )
+
+
+@router.get("/history", response_model=HistoryPage, tags=["History"])
+async def list_history(
+    limit: int = Query(20, ge=1, le=100, description="Reports per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    history: Optional[HistoryStore] = Depends(get_history_store),
+    tenant: Tenant = Depends(get_tenant),
+):
+    """
+    List the API key's stored research reports, newest first.
+
+    Pages use keyset pagination: pass the returned `next_cursor` to get the next
+    page. Every page costs the same however deep it is, and reports stored in the
+    meantime never shift or repeat items.
+    """
+    items, next_cursor = await run_in_threadpool(_history_page, history, lambda h: h.list(limit, cursor, tenant.name))
+    return HistoryPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/history/search", response_model=HistoryPage, tags=["History"])
+async def search_history(
+    q: str = Query(..., min_length=2, max_length=200, description="Words to find in queries and reports"),
+    limit: int = Query(20, ge=1, le=100, description="Reports per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    history: Optional[HistoryStore] = Depends(get_history_store),
+    tenant: Tenant = Depends(get_tenant),
+):
+    """
+    Full-text search of the API key's stored reports (queries and syntheses), newest first.
+
+    Every significant word must match. Each item has a `snippet` of the synthesis
+    with the matches highlighted. Paginated like `GET /history`.
+    """
+    items, next_cursor = await run_in_threadpool(_history_page, history, lambda h: h.search(q, limit, cursor, tenant.name))
+    return HistoryPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/history/{session_id}", response_model=ResearchResponse, tags=["History"])
+async def get_history(
+    session_id: str,
+    request: Request,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated response fields to return, e.g. synthesis,query"
+    ),
+    history: Optional[HistoryStore] = Depends(get_history_store),
+    tenant: Tenant = Depends(get_tenant),
+):
+    """
+    Get a stored research report by session id, without re-running the research.
+    Accepts `fields` like `POST /research`. Reports of other API keys answer 404.
+    """
+    include = parse_fields(fields, ResearchResponse)
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Research history is disabled.",
+        )
+    payload = await run_in_threadpool(history.get, session_id, tenant.name)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stored report for this session.",
+        )
+    return await json_response(payload, request, include)
+
+
+def _history_page(history: Optional[HistoryStore], fetch) -> tuple:
+    """Run a history query, mapping a disabled store and bad cursors to HTTP errors"""
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Research history is disabled.",
+        )
+    try:
+        return fetch(history)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get("/activity", tags=["Activity"])
@@ -113,12 +636,12 @@ async def root():
 
 
 @router.get("/activity/stream/{session_id}", tags=["Activity"])
-async def activity_stream(session_id: str):
-    """SSE stream of activity events for a given session."""
+async def activity_stream(session_id: str, request: Request):
+    """SSE stream of activity events for a given session. Ends when the client disconnects."""
 
     async def event_generator():
         last_event_count = 0
-        while True:
+        while not await request.is_disconnected():
             snap = activity_manager.snapshot(session_id)
             events = snap.get("events", [])
             if len(events) > last_event_count:
@@ -180,3 +703,66 @@ async def get_models():
         )
 
     return ModelsResponse(models=models, default_model=Settings.AI_MODEL)
+
+
+@router.post("/admin/profile", tags=["Admin"])
+async def profile_process(
+    seconds: float = Query(10, gt=0, description="How long to sample"),
+    format: str = Query("json", pattern="^(json|folded)$", description="'folded' for plain collapsed stacks"),
+    _: bool = Depends(verify_admin_key),
+):
+    """
+    Sample every thread of this worker for a while and return the profile.
+    `?format=folded` returns the collapsed stacks as text, ready for
+    `flamegraph.pl` or speedscope.
+    """
+    profiler = Profile(Settings.PROFILE_INTERVAL_MS, all_threads=True).start()
+    try:
+        await asyncio.sleep(min(seconds, Settings.PROFILE_MAX_SECONDS))
+    finally:
+        profiler.stop()
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return profiler.report()
+
+
+@router.post("/admin/memory/snapshot", tags=["Admin"])
+async def memory_snapshot(
+    frames: int = Query(1, ge=1, le=64, description="Stack depth traced per allocation (first snapshot only)"),
+    limit: int = Query(25, ge=1, le=500),
+    _: bool = Depends(verify_admin_key),
+):
+    """
+    Take a tracemalloc snapshot, starting tracing on the first call, and return
+    the largest allocation sites. Compare snapshots with `GET /admin/memory/diff`.
+    Tracing slows allocation until `DELETE /admin/memory`.
+    """
+    return await run_in_threadpool(memory_tracer.snapshot, frames, limit)
+
+
+@router.get("/admin/memory/diff", tags=["Admin"])
+async def memory_diff(
+    base: int = Query(..., description="Earlier snapshot_id"),
+    target: Optional[int] = Query(None, description="Later snapshot_id (default: the latest)"),
+    limit: int = Query(25, ge=1, le=500),
+    _: bool = Depends(verify_admin_key),
+):
+    """
+    Allocation sites that grew the most between two snapshots.
+    """
+    try:
+        return await run_in_threadpool(memory_tracer.diff, base, target, limit)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found (only the most recent ones are kept)",
+        )
+
+
+@router.delete("/admin/memory", tags=["Admin"])
+async def memory_stop(_: bool = Depends(verify_admin_key)):
+    """
+    Stop memory tracing and drop the snapshots.
+    """
+    await run_in_threadpool(memory_tracer.stop)
+    return {"tracing": False}
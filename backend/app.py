@@ -3,12 +3,33 @@ FastAPI application entry point.
 Run with: uvicorn app:app --reload
 """
 
+from utils.lifecycle import lifecycle  # First, so startup timing covers the remaining imports
+
+import asyncio
 import os
+import signal
+import threading
+import time
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import router
+from api.dependencies import (
+    close_services,
+    get_ai_service,
+    get_checkpoint_store,
+    get_content_store,
+    get_history_store,
+    get_lead_agent,
+    get_prefetcher,
+    get_search_service,
+    get_source_index,
+)
 from config.settings import Settings
 from middleware.rate_limit import RateLimitMiddleware
+from utils.profiler import LoopBlockDetector
+
+lifecycle.phase("import", lifecycle.started)
 
 # Create FastAPI app
 app = FastAPI(
@@ -45,7 +66,7 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
@@ -60,6 +81,11 @@ if os.getenv("ENVIRONMENT") == "production":
 # Include API routes
 app.include_router(router, prefix="/api/v1")
 
+# Reports whatever holds the event loop too long (see /metrics "event_loop")
+loop_block_detector = (
+    LoopBlockDetector(Settings.LOOP_BLOCK_THRESHOLD_MS) if Settings.LOOP_BLOCK_THRESHOLD_MS > 0 else None
+)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -70,13 +96,96 @@ async def startup_event():
     if not is_production:
         print("📚 API Documentation: http://localhost:8000/docs")
         print("🔍 Alternative Docs: http://localhost:8000/redoc")
-    print("✅ Server ready!")
+    Settings.validate()
+
+    # SDKs are imported and clients built here, in parallel, rather than at module import
+    started = time.monotonic()
+    search_service, ai_service = await asyncio.gather(
+        run_in_threadpool(get_search_service), run_in_threadpool(get_ai_service)
+    )
+    await run_in_threadpool(get_lead_agent)
+    lifecycle.phase("init", started)
+
+    if Settings.HTTP_WARMUP_CONNECTIONS > 0:
+        # Pay DNS/TCP/TLS setup now instead of on the first research requests
+        started = time.monotonic()
+        exa_opened, cerebras_opened = await asyncio.gather(
+            run_in_threadpool(search_service.warm_up),
+            run_in_threadpool(ai_service.warm_up),
+        )
+        lifecycle.phase("warm_up", started)
+        print(f"🔥 Warmed up {exa_opened} Exa and {cerebras_opened} Cerebras connections")
+
+    lifecycle.register_check("search_service", search_service.ready)
+    lifecycle.register_check("ai_service", ai_service.ready)
+    source_index = get_source_index()
+    if source_index is not None:
+        lifecycle.register_check("source_index", source_index.ready)
+    # The result cache keeps entries in memory and their source texts in the content store
+    lifecycle.register_check("content_store", get_content_store().ready)
+    checkpoint_store = get_checkpoint_store()
+    if checkpoint_store is not None:
+        lifecycle.register_check("checkpoint_store", checkpoint_store.ready)
+    history_store = get_history_store()
+    if history_store is not None:
+        lifecycle.register_check("history_store", history_store.ready)
+    lifecycle.mark_ready()
+    prefetcher = get_prefetcher()
+    if prefetcher is not None:
+        # Keep trending research hot from here on
+        prefetcher.start()
+    if loop_block_detector is not None:
+        loop_block_detector.start()
+    _drain_on_sigterm()
+    print(f"✅ Server ready in {lifecycle.startup_report()['total_ms']} ms!")
+
+
+def _drain_on_sigterm():
+    """
+    Stop reporting ready as soon as SIGTERM arrives, then let the server's own
+    handler stop accepting connections and wait out in-flight requests. After
+    DRAIN_TIMEOUT_SECONDS, research still running is cancelled (left resumable) and
+    the server is told to stop waiting, however it was started.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    drain_timer = None
+
+    def drain_expired():
+        print("⏱️ Drain timeout reached, stopping what is still running")
+        # A forced exit skips the shutdown hook, so release the services here
+        close_services()
+        if callable(previous):
+            # A second interrupt makes uvicorn stop waiting for open connections
+            previous(signal.SIGINT, None)
+
+    def handle_sigterm(signum, frame):
+        nonlocal drain_timer
+        lifecycle.begin_drain()
+        print("🛑 SIGTERM received, draining in-flight research...")
+        if drain_timer is None:
+            drain_timer = threading.Timer(Settings.DRAIN_TIMEOUT_SECONDS, drain_expired)
+            drain_timer.daemon = True
+            drain_timer.start()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            raise SystemExit(0)
+
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except ValueError:
+        # Not the main thread (e.g. an embedding test client): nothing to chain to
+        pass
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     print("👋 Shutting down AI Research Agent API...")
+    lifecycle.begin_drain()
+    if loop_block_detector is not None:
+        loop_block_detector.stop()
+    await run_in_threadpool(close_services)
 
 
 if __name__ == "__main__":
@@ -94,4 +203,5 @@ if __name__ == "__main__":
         reload=is_development,  # Only auto-reload in development
         log_level="info" if is_development else "warning",
         access_log=is_development,
+        timeout_graceful_shutdown=int(Settings.DRAIN_TIMEOUT_SECONDS),
     )
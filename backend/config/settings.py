@@ -41,9 +41,160 @@ class Settings:
         },
     }
     
+    # Orchestration settings
+    MAX_PARALLEL_SUBAGENTS = int(os.getenv("MAX_PARALLEL_SUBAGENTS", "6"))
+    # Expected source count at which synthesis switches to map-reduce
+    MAP_REDUCE_MIN_SOURCES = int(os.getenv("MAP_REDUCE_MIN_SOURCES", "12"))
+    # Summarize every subagent as soon as it finishes (and stream the summary to the
+    # activity feed), whatever the source count; synthesis then reduces the summaries
+    PIPELINED_SUMMARIES = os.getenv("PIPELINED_SUMMARIES", "false").lower() == "true"
+    MAP_SUMMARY_MAX_TOKENS = int(os.getenv("MAP_SUMMARY_MAX_TOKENS", "400"))
+    # Wall-clock limit on one subagent summary (the search deadline, when shorter, wins)
+    MAP_SUMMARY_TIMEOUT_SECONDS = float(os.getenv("MAP_SUMMARY_TIMEOUT_SECONDS", "60"))
+    # Start likely subtask searches while query analysis is still running
+    SPECULATIVE_DISPATCH = os.getenv("SPECULATIVE_DISPATCH", "true").lower() == "true"
+    SPECULATIVE_MATCH_THRESHOLD = float(os.getenv("SPECULATIVE_MATCH_THRESHOLD", "0.5"))
+    # Minimum focus similarity for a follow-up to reuse a prior session's subagent
+    REFINE_REUSE_THRESHOLD = float(os.getenv("REFINE_REUSE_THRESHOLD", "0.5"))
+    # Local complexity scorer: skip the LLM analyzer when the estimate is confident
+    HEURISTIC_ANALYSIS_ENABLED = os.getenv("HEURISTIC_ANALYSIS_ENABLED", "true").lower() == "true"
+    HEURISTIC_CONFIDENCE_THRESHOLD = float(os.getenv("HEURISTIC_CONFIDENCE_THRESHOLD", "0.8"))
+    HEURISTIC_MIN_SAMPLES = int(os.getenv("HEURISTIC_MIN_SAMPLES", "30"))
+    HEURISTIC_RECALIBRATE_EVERY = int(os.getenv("HEURISTIC_RECALIBRATE_EVERY", "50"))
+    # Newest LLM analyses kept in the calibration log (older ones are dropped at each refit)
+    HEURISTIC_MAX_SAMPLES = int(os.getenv("HEURISTIC_MAX_SAMPLES", "5000"))
+    # Start each subtask's search as soon as the streamed analysis emits it
+    STREAMING_DISPATCH = os.getenv("STREAMING_DISPATCH", "true").lower() == "true"
+    
+    # Deadline-aware research (requests with deadline_ms)
+    DEADLINE_ANALYSIS_SHARE = float(os.getenv("DEADLINE_ANALYSIS_SHARE", "0.15"))
+    DEADLINE_SEARCH_SHARE = float(os.getenv("DEADLINE_SEARCH_SHARE", "0.5"))
+    # Budgets below this switch to the fast model with fewer subagents and sources
+    DEADLINE_TIGHT_MS = int(os.getenv("DEADLINE_TIGHT_MS", "15000"))
+    DEADLINE_TIGHT_MAX_SUBAGENTS = int(os.getenv("DEADLINE_TIGHT_MAX_SUBAGENTS", "3"))
+    DEADLINE_TIGHT_MAX_RESULTS = int(os.getenv("DEADLINE_TIGHT_MAX_RESULTS", "2"))
+    # Minimum time worth spending on an LLM analysis / synthesis call
+    DEADLINE_MIN_LLM_ANALYSIS_MS = int(os.getenv("DEADLINE_MIN_LLM_ANALYSIS_MS", "1500"))
+    DEADLINE_MIN_SYNTHESIS_MS = int(os.getenv("DEADLINE_MIN_SYNTHESIS_MS", "1000"))
+    FAST_MODEL = os.getenv("FAST_MODEL", "llama3.1-8b")
+    
+    # Token budgets (requests with token_budget): share of what is left at synthesis
+    # time reserved for the report itself, and the least worth asking for
+    TOKEN_BUDGET_SYNTHESIS_SHARE = float(os.getenv("TOKEN_BUDGET_SYNTHESIS_SHARE", "0.25"))
+    TOKEN_BUDGET_MIN_SYNTHESIS_TOKENS = int(os.getenv("TOKEN_BUDGET_MIN_SYNTHESIS_TOKENS", "150"))
+    
+    # Batch research
+    BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+    BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+    BATCH_MAX_CONCURRENT_SEARCHES = int(os.getenv("BATCH_MAX_CONCURRENT_SEARCHES", "8"))
+    
     # Search settings
     DEFAULT_SEARCH_RESULTS = 10
     MAX_CHARACTERS_PER_RESULT = 1000
+    # Sources with less text than this are not usable
+    MIN_SOURCE_CHARS = int(os.getenv("MIN_SOURCE_CHARS", "30"))
+    
+    # Adaptive per-subagent fetching (follow-up rounds only while under target)
+    ADAPTIVE_MAX_ROUNDS = int(os.getenv("ADAPTIVE_MAX_ROUNDS", "3"))
+    ADAPTIVE_MAX_BATCH = int(os.getenv("ADAPTIVE_MAX_BATCH", "10"))
+    ADAPTIVE_REFORMULATIONS = ["overview", "explained", "analysis"]
+    
+    # HTTP transport shared by the Cerebras and Exa clients
+    # Pools match the lead agent's worker count so subagents never queue for a connection
+    EXA_POOL_SIZE = int(os.getenv("EXA_POOL_SIZE", str(MAX_PARALLEL_SUBAGENTS * 3)))
+    CEREBRAS_POOL_SIZE = int(os.getenv("CEREBRAS_POOL_SIZE", str(MAX_PARALLEL_SUBAGENTS * 2)))
+    HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "60"))
+    # HTTP/2 for Cerebras when the h2 package is installed (Exa's client is HTTP/1.1 only)
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    DNS_CACHE_TTL_SECONDS = float(os.getenv("DNS_CACHE_TTL_SECONDS", "300"))
+    # Connections opened to each API at startup (0 disables warm-up)
+    HTTP_WARMUP_CONNECTIONS = int(os.getenv("HTTP_WARMUP_CONNECTIONS", "2"))
+    HTTP_WARMUP_TIMEOUT_SECONDS = float(os.getenv("HTTP_WARMUP_TIMEOUT_SECONDS", "3"))
+    # Consecutive upstream failures that open a circuit, and its cool-down before a probe
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    # Research pipelines run at once; queued requests are shared fairly across API keys
+    RESEARCH_MAX_CONCURRENT = int(os.getenv("RESEARCH_MAX_CONCURRENT", "16"))
+    # Admission control: queue delay (CoDel-style) above which new requests are degraded or shed
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_TARGET_MS = float(os.getenv("ADMISSION_TARGET_MS", "2000"))
+    ADMISSION_INTERVAL_MS = float(os.getenv("ADMISSION_INTERVAL_MS", "10000"))
+    ADMISSION_SHED_MS = float(os.getenv("ADMISSION_SHED_MS", "15000"))
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", str(RESEARCH_MAX_CONCURRENT * 4)))
+    ADMISSION_MAX_QUEUE_SECONDS = float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", "30"))
+    # Budget given to degraded requests; below DEADLINE_TIGHT_MS it selects the fast model,
+    # fewer subagents and fewer sources
+    ADMISSION_DEGRADED_DEADLINE_MS = int(os.getenv("ADMISSION_DEGRADED_DEADLINE_MS", "12000"))
+    # Research responses smaller than this are sent uncompressed
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    
+    # Cache of finished research (plain requests without deadline or follow-up)
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "500"))
+    # Time for a query's popularity to halve when nobody asks it
+    QUERY_POPULARITY_HALF_LIFE_SECONDS = float(os.getenv("QUERY_POPULARITY_HALF_LIFE_SECONDS", "3600"))
+    # Refresh-ahead: re-research the top queries before their cached results expire
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "20"))
+    PREFETCH_LEAD_SECONDS = float(os.getenv("PREFETCH_LEAD_SECONDS", "300"))
+    PREFETCH_INTERVAL_SECONDS = float(os.getenv("PREFETCH_INTERVAL_SECONDS", "30"))
+    PREFETCH_MAX_PER_HOUR = int(os.getenv("PREFETCH_MAX_PER_HOUR", "30"))
+    # Popularity (request count, decayed by the half-life) a query needs to be kept hot
+    PREFETCH_MIN_POPULARITY = float(os.getenv("PREFETCH_MIN_POPULARITY", "2"))
+    # Refreshes only start while fewer than this share of research slots are busy
+    PREFETCH_MAX_UTILIZATION = float(os.getenv("PREFETCH_MAX_UTILIZATION", "0.5"))
+    
+    # Local storage settings
+    DATA_DIR = os.getenv("DATA_DIR", "data")
+    
+    # Local source index settings (serves repeat searches without Exa)
+    SOURCE_INDEX_ENABLED = os.getenv("SOURCE_INDEX_ENABLED", "true").lower() == "true"
+    SOURCE_INDEX_PATH = os.getenv(
+        "SOURCE_INDEX_PATH", os.path.join(DATA_DIR, "source_index.db")
+    )
+    SOURCE_INDEX_MAX_AGE_HOURS = float(os.getenv("SOURCE_INDEX_MAX_AGE_HOURS", "24"))
+    SOURCE_INDEX_MAX_ENTRIES = int(os.getenv("SOURCE_INDEX_MAX_ENTRIES", "50000"))
+    
+    # Content-addressed source store (each source text held once)
+    CONTENT_STORE_DIR = os.getenv("CONTENT_STORE_DIR", os.path.join(DATA_DIR, "content"))
+    CONTENT_STORE_MEMORY_MB = int(os.getenv("CONTENT_STORE_MEMORY_MB", "64"))
+    CONTENT_STORE_DISK_MB = int(os.getenv("CONTENT_STORE_DISK_MB", "512"))
+    CONTENT_STORE_SEGMENT_MB = int(os.getenv("CONTENT_STORE_SEGMENT_MB", "16"))
+    
+    # Research history (finished reports, browsable and searchable)
+    HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+    HISTORY_PATH = os.getenv("HISTORY_PATH", os.path.join(DATA_DIR, "history.db"))
+    HISTORY_MAX_ENTRIES = int(os.getenv("HISTORY_MAX_ENTRIES", "100000"))
+    # Research checkpoints (resume a session after a crash or redeploy)
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(DATA_DIR, "checkpoints.db"))
+    # Running sessions are taken over after three missed heartbeats
+    CHECKPOINT_HEARTBEAT_SECONDS = float(os.getenv("CHECKPOINT_HEARTBEAT_SECONDS", "5"))
+    CHECKPOINT_RETENTION_HOURS = float(os.getenv("CHECKPOINT_RETENTION_HOURS", "24"))
+    # How long a shutting-down worker lets in-flight research finish
+    DRAIN_TIMEOUT_SECONDS = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "30"))
+    # How long cancelled research gets to return before the stores it writes to are closed
+    SHUTDOWN_CANCEL_GRACE_SECONDS = float(os.getenv("SHUTDOWN_CANCEL_GRACE_SECONDS", "5"))
+    
+    # Sampling profiler behind ?profile=true and POST /admin/profile
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    # Log the stack of anything holding the event loop longer than this (0 to disable)
+    LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+    
+    # Worker processes for CPU-bound post-processing (0 runs it inline)
+    CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "2"))
+    # Tasks predicted (from their stage's measured cost per byte) to take less CPU time run
+    # inline. Offloading costs the server ~0.07 ms of CPU per task; ranking measures
+    # ~0.2 ms/KB, so a typical 2 KB source set is offloaded
+    CPU_POOL_MIN_TASK_MS = float(os.getenv("CPU_POOL_MIN_TASK_MS", "0.25"))
+    # Until a stage has been timed, smaller payloads run inline
+    CPU_POOL_MIN_PAYLOAD_BYTES = int(os.getenv("CPU_POOL_MIN_PAYLOAD_BYTES", "1024"))
+    CPU_POOL_TASK_TIMEOUT_SECONDS = float(os.getenv("CPU_POOL_TASK_TIMEOUT_SECONDS", "5"))
+    # Sources of a subagent whose texts overlap this much (word 3-shingle Jaccard) are near-duplicates
+    SOURCE_DEDUP_SIMILARITY = float(os.getenv("SOURCE_DEDUP_SIMILARITY", "0.8"))
     
     @classmethod
     def validate(cls):
@@ -51,7 +202,4 @@ class Settings:
         if not cls.EXA_API_KEY:
             raise ValueError("EXA_API_KEY not found in environment variables")
         if not cls.CEREBRAS_API_KEY:
-            raise ValueError("CEREBRAS_API_KEY not found in environment variables")
-
-# Validate settings on import
-Settings.validate()
\ No newline at end of file
+            raise ValueError("CEREBRAS_API_KEY not found in environment variables")
\ No newline at end of file
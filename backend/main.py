@@ -1,42 +1,208 @@
 """
-Main entry point for the AI agent research system.
-Initializes services and runs multi-agent research.
+Command-line entry point for the AI agent research system.
+Runs research for many queries in bulk without going through the HTTP API.
+
+Examples:
+    python main.py "Best Agentic AI Framework"
+    python main.py -i queries.txt -o results.jsonl -c 8
+    cat queries.txt | python main.py -o results.jsonl --resume
 """
-from services.search_service import SearchService
-from services.ai_service import AIService
-from agents.sub_agent import SubAgent
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import uuid
+from typing import List, Set
+
+from config.settings import Settings
+from api.dependencies import close_services, get_ai_service, get_lead_agent, get_search_service
 from agents.lead_agent import LeadAgent
+from utils.activity import activity_manager
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Run multi-agent research for one or many queries, writing JSONL results."
+    )
+    parser.add_argument("queries", nargs="*", help="Queries to research (in addition to --input)")
+    parser.add_argument(
+        "-i", "--input",
+        help="File with one query per line, or JSON lines with a 'query' field ('-' for stdin)",
+    )
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=Settings.BATCH_MAX_WORKERS,
+        help=f"Queries researched in parallel (default: {Settings.BATCH_MAX_WORKERS})",
+    )
+    parser.add_argument("-n", "--num-results", type=int, default=2, help="Results per subagent (default: 2)")
+    parser.add_argument("--model", default=None, help="AI model to use (default from settings)")
+    parser.add_argument("--deadline-ms", type=int, default=None, help="Per-query latency budget")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip queries that already have a successful result in the output file and "
+             "continue interrupted ones from their checkpoints",
+    )
+    return parser.parse_args(argv)
+
+
+def read_queries(args: argparse.Namespace) -> List[str]:
+    """Collect queries from positional arguments and the input file or stdin"""
+    queries = list(args.queries)
+
+    source = args.input
+    if source is None and not queries and not sys.stdin.isatty():
+        source = "-"
+    if source is not None:
+        stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        with contextlib.closing(stream) if stream is not sys.stdin else contextlib.nullcontext():
+            for number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("{"):
+                    try:
+                        line = json.loads(line)["query"].strip()
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        # One bad line shouldn't cost the whole batch
+                        print(f"⚠️ Skipping line {number} of {source}: not a JSON object with a 'query' string ({e})", file=sys.stderr)
+                        continue
+                if line:
+                    queries.append(line)
+    return queries
+
+
+def completed_queries(path: str) -> Set[str]:
+    """Normalized queries with a successful result in an existing output file"""
+    done = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                    if record.get("status") == "ok":
+                        done.add(LeadAgent.normalize_query(record["query"]))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # E.g. the partially written last line of an interrupted run: that query runs again
+                    print(f"⚠️ Ignoring unreadable line {number} of {path}", file=sys.stderr)
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def session_id_for(output: str, index: int, query: str) -> str:
+    """Stable session id of an input query, so a rerun with --resume finds its checkpoint"""
+    name = f"{os.path.abspath(output)}#{index}#{LeadAgent.normalize_query(query)}"
+    return uuid.uuid5(uuid.NAMESPACE_URL, name).hex
+
+
+def percentile(values: List[int], pct: float) -> int:
+    """Nearest-rank percentile of a list of latencies"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Run bulk research and print a throughput/latency summary"""
+    args = parse_args(argv)
+    Settings.validate()
+    queries = read_queries(args)
+    if not queries:
+        print("❌ No queries given. Pass queries as arguments, with --input, or on stdin.", file=sys.stderr)
+        return 2
+
+    if args.output == "-":
+        session_ids = [activity_manager.create_session(q) for q in queries]
+    else:
+        # Derived from the output file and input line, so an interrupted query keeps its session
+        session_ids = [session_id_for(args.output, i, q) for i, q in enumerate(queries)]
+    skipped = 0
+    if args.resume and args.output != "-":
+        done = completed_queries(args.output)
+        remaining = [(q, s) for q, s in zip(queries, session_ids) if LeadAgent.normalize_query(q) not in done]
+        skipped = len(queries) - len(remaining)
+        queries = [q for q, _ in remaining]
+        session_ids = [s for _, s in remaining]
+
+    out = sys.stdout if args.output == "-" else open(args.output, "a+", encoding="utf-8")
+    if out is not sys.stdout and out.tell() > 0:
+        # An interrupted run may have left a partial last line: start on a fresh one
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")
+
+    # Keep stdout clean for JSONL: progress and service messages go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        print("🚀 Initializing AI Agent Research System...")
+        print("=" * 50)
+
+        # Initialize services (the server's singletons, so shutdown releases the same ones)
+        search_service = get_search_service()
+        ai_service = get_ai_service()
+
+        # The server's lead agent, with its checkpoint store and result cache
+        lead_agent = get_lead_agent()
+        search_service.warm_up()
+        ai_service.warm_up()
+
+        print(f"✅ All systems ready! {len(queries)} queries to run ({skipped} already completed)\n")
+
+        latencies: List[int] = []
+        failed = 0
+        summary = {}
+        started = time.monotonic()
+        try:
+            for item in lead_agent.research_batch(
+                queries,
+                num_results_per_agent=args.num_results,
+                model=args.model,
+                deadline_ms=args.deadline_ms,
+                session_ids=session_ids,
+                max_workers=args.concurrency,
+                resume=args.resume,
+            ):
+                if "summary" in item:
+                    summary = item["summary"]
+                    continue
+                record = {"index": item["index"], "query": item["query"]}
+                if "error" in item:
+                    failed += 1
+                    record.update(status="error", error=item["error"])
+                    print(f"  ❌ [{item['index']}] {item['query']}: {item['error']}")
+                else:
+                    latencies.append(item["elapsed_ms"])
+                    record.update(status="ok", elapsed_ms=item["elapsed_ms"], result=item["result"])
+                    print(f"  ✓ [{item['index']}] {item['query']} ({item['elapsed_ms']} ms)")
+                # Written and flushed per query so an interrupted run can --resume
+                out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+            # Same shutdown as the server: stop the CPU pool, flush the source index
+            close_services()
+
+        wall = time.monotonic() - started
+        completed = len(latencies)
+        print("\n" + "=" * 50)
+        print("📊 BATCH SUMMARY")
+        print("=" * 50)
+        print(f"Queries: {completed} ok, {failed} failed, {skipped} skipped")
+        print(f"Wall time: {wall:.1f}s  Throughput: {completed / wall if wall else 0:.2f} queries/s")
+        print(
+            f"Latency ms: p50={percentile(latencies, 50)} p90={percentile(latencies, 90)} "
+            f"p99={percentile(latencies, 99)} max={max(latencies, default=0)}"
+        )
+        if summary:
+            print(f"Searches: {summary['unique_searches']} unique, {summary['deduplicated_searches']} deduplicated")
+
+    return 1 if failed else 0
 
-def main():
-    """Initialize and run the multi-agent research system"""
-    
-    print("🚀 Initializing AI Agent Research System...")
-    print("=" * 50)
-    
-    # Initialize services
-    search_service = SearchService()
-    ai_service = AIService()
-    
-    # Initialize agents
-    sub_agent = SubAgent(search_service)
-    lead_agent = LeadAgent(ai_service, sub_agent)
-    
-    print("✅ All systems ready!\n")
-    
-    # Run research
-    result = lead_agent.research("Best Agentic AI Framework")
-    
-    # Display results
-    print("\n" + "🤖" * 30)
-    print("RESEARCH SUMMARY")
-    print("🤖" * 30)
-    print(f"Query: {result['query']}")
-    print(f"Subagents deployed: {result['subagents']}")
-    print(f"Total sources: {result['total_sources']}")
-    
-    print("\n💡 Try other queries:")
-    print("lead_agent.research('quantum computing commercial applications')")
-    print("lead_agent.research('artificial intelligence safety frameworks')")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -2,18 +2,62 @@
 AI service using Cerebras API.
 Handles AI model interactions and completions.
 """
-from cerebras.cloud.sdk import Cerebras
+import threading
+from typing import Any, Dict, Iterator, Optional
 from config.settings import Settings
+from utils.cancellation import CancellationToken, Cancelled, SharedCancellation
+from utils.circuit_breaker import CircuitBreaker, OPEN
+from utils.singleflight import SingleFlight
+from utils.usage import current_usage, estimate_tokens
 
 class AIService:
     """Manages AI model interactions using Cerebras"""
     
     def __init__(self):
-        """Initialize Cerebras client with API key"""
-        self.client = Cerebras(api_key=Settings.CEREBRAS_API_KEY)
+        """Initialize Cerebras client with API key and the shared connection pool"""
+        # Imported here so the SDK's import cost is paid at startup, not at module import
+        from cerebras.cloud.sdk import Cerebras
+        from services.transport import create_cerebras_http_client
+        
+        self.http_client = create_cerebras_http_client()
+        # warm_up() replaces the SDK's single blocking warm-up request
+        self.client = Cerebras(
+            api_key=Settings.CEREBRAS_API_KEY,
+            http_client=self.http_client,
+            warm_tcp_connection=False,
+        )
+        self._inflight = SingleFlight()
+        self.breaker = CircuitBreaker("cerebras", Settings.CIRCUIT_FAILURE_THRESHOLD, Settings.CIRCUIT_RESET_SECONDS)
+        self.warmed_connections = None
         print("✅ AI service initialized")
     
-    def ask(self, prompt: str, max_tokens: int = None, temperature: float = None) -> str:
+    def warm_up(self, connections: int = None) -> int:
+        """
+        Pre-open pooled connections to Cerebras (DNS, TCP and TLS) before traffic arrives.
+        
+        Args:
+            connections: Connections to open (default from settings)
+            
+        Returns:
+            Number of connections opened
+        """
+        from services.transport import warm_connections
+        
+        if connections is None:
+            connections = Settings.HTTP_WARMUP_CONNECTIONS
+        url = self.client.base_url.join("/v1/tcp_warming")
+        timeout = Settings.HTTP_WARMUP_TIMEOUT_SECONDS
+        self.warmed_connections = warm_connections(
+            lambda: self.http_client.get(url, timeout=timeout).close(), connections, timeout
+        )
+        return self.warmed_connections
+    
+    def ready(self) -> Dict[str, Any]:
+        """Readiness of the Cerebras upstream (not ready while its circuit is open)"""
+        state = self.breaker.state
+        return {"ok": state != OPEN, "circuit": state, "warmed_connections": self.warmed_connections}
+    
+    def ask(self, prompt: str, max_tokens: int = None, temperature: float = None, model: str = None, timeout: float = None, cancel: Optional[CancellationToken] = None) -> str:
         """
         Get AI response from Cerebras.
         
@@ -21,16 +65,84 @@ class AIService:
             prompt: The prompt/question to send to AI
             max_tokens: Maximum response length (default from settings)
             temperature: Response randomness 0-1 (default from settings)
+            model: Model id to use (default from settings)
+            timeout: Request timeout in seconds (default from the SDK); with cancel it
+                bounds the whole streamed completion, not just each read
+            cancel: Token that aborts the completion mid-generation
             
         Returns:
-            AI-generated response text
+            AI-generated response text (empty on error or timeout)
+            
+        Raises:
+            Cancelled: If cancel was cancelled before the response completed
         """
         if max_tokens is None:
             max_tokens = Settings.MAX_TOKENS
         if temperature is None:
             temperature = Settings.TEMPERATURE
+        if model is None:
+            model = Settings.AI_MODEL
+        
+        # Concurrent identical completions share one upstream call
+        key = (prompt, max_tokens, temperature, model)
+        if cancel is None:
+            response, _ = self._inflight.do(key, lambda: self._complete(prompt, max_tokens, temperature, model, timeout))
+            return response
+        
+        # Streamed so it can be aborted; the shared call is aborted only once every
+        # caller waiting on it has cancelled, so one caller never empties another's response
+        def join(leader_cancel: Optional[SharedCancellation]) -> None:
+            if leader_cancel is not None:
+                leader_cancel.attach(cancel)
         
+        while True:
+            cancel.raise_if_cancelled()
+            shared_cancel = SharedCancellation()
+            shared_cancel.attach(cancel)
+            try:
+                response, _ = self._inflight.do(
+                    key,
+                    lambda: self._stream_shared(prompt, max_tokens, temperature, model, timeout, shared_cancel),
+                    context=shared_cancel,
+                    on_join=join,
+                    cancel=cancel,
+                )
+            except Cancelled:
+                if cancel.cancelled:
+                    raise
+                # Joined a call its other callers had just abandoned: run it again
+                continue
+            cancel.raise_if_cancelled()
+            return response
+    
+    def _stream_shared(self, prompt: str, max_tokens: int, temperature: float, model: str, timeout: float | None, cancel: SharedCancellation) -> str:
+        """Leader of a coalesced cancellable completion, stopped after timeout seconds of wall-clock time"""
+        # httpx only bounds each read, so a stream that keeps sending chunks needs its own stop
+        stream_cancel = cancel.child()
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, stream_cancel.cancel, args=("timeout",))
+            timer.daemon = True
+            timer.start()
         try:
+            response = "".join(self.ask_stream(prompt, max_tokens, temperature, model, timeout, cancel=stream_cancel))
+        finally:
+            if timer is not None:
+                timer.cancel()
+        cancel.raise_if_cancelled()
+        if stream_cancel.cancelled:
+            # Same as a timed-out blocking call: the partial text is not a complete answer
+            print(f"❌ AI error: completion did not finish within {timeout:.1f}s")
+            return ""
+        return response
+    
+    def _complete(self, prompt: str, max_tokens: int, temperature: float, model: str, timeout: float | None) -> str:
+        """Call the Cerebras chat completions API"""
+        if not self.breaker.allow():
+            print("❌ AI error: Cerebras circuit open, skipping call")
+            return ""
+        try:
+            options = {"timeout": timeout} if timeout is not None else {}
             chat_completion = self.client.chat.completions.create(
                 messages=[
                     {
@@ -38,11 +150,108 @@ class AIService:
                         "content": prompt,
                     }
                 ],
-                model=Settings.AI_MODEL,
+                model=model,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                **options
             )
-            return chat_completion.choices[0].message.content
+            self.breaker.record_success()
+            content = chat_completion.choices[0].message.content
+            self._record_usage(model, prompt, content or "", getattr(chat_completion, "usage", None))
+            return content
         except Exception as e:
+            self._record_error(e, timeout)
             print(f"❌ AI error: {e}")
-            return ""
\ No newline at end of file
+            return ""
+    
+    def ask_stream(self, prompt: str, max_tokens: int = None, temperature: float = None, model: str = None, timeout: float = None, cancel: Optional[CancellationToken] = None) -> Iterator[str]:
+        """
+        Stream an AI response from Cerebras chunk by chunk.
+        
+        Args:
+            prompt: The prompt/question to send to AI
+            max_tokens: Maximum response length (default from settings)
+            temperature: Response randomness 0-1 (default from settings)
+            model: Model id to use (default from settings)
+            timeout: Request timeout in seconds (default from the SDK)
+            cancel: Token that closes the stream (aborting generation upstream)
+            
+        Yields:
+            Response text fragments as they arrive (nothing on error)
+        """
+        if cancel is not None and cancel.cancelled:
+            return
+        if not self.breaker.allow():
+            print("❌ AI stream error: Cerebras circuit open, skipping call")
+            return
+        model = model or Settings.AI_MODEL
+        stream = None
+        unregister = None
+        received = []
+        usage = None
+        try:
+            options = {"timeout": timeout} if timeout is not None else {}
+            stream = self.client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt,
+                    }
+                ],
+                model=model,
+                max_tokens=max_tokens if max_tokens is not None else Settings.MAX_TOKENS,
+                temperature=temperature if temperature is not None else Settings.TEMPERATURE,
+                stream=True,
+                **options
+            )
+            self.breaker.record_success()
+            if cancel is not None:
+                # Closing the response from the cancelling thread interrupts the read below
+                unregister = cancel.on_cancel(stream.close)
+            for chunk in stream:
+                if cancel is not None and cancel.cancelled:
+                    break
+                # The final chunk carries the token counts
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    received.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                return  # Aborted on purpose, not an upstream failure
+            self._record_error(e, timeout)
+            print(f"❌ AI stream error: {e}")
+        finally:
+            if unregister is not None:
+                unregister()
+            # Release the connection if the consumer stopped reading early
+            if stream is not None:
+                stream.close()
+                # Aborted generations are billed too
+                self._record_usage(model, prompt, "".join(received), usage)
+    
+    @staticmethod
+    def _record_usage(model: str, prompt: str, completion: str, usage: Any) -> None:
+        """Bill a completion to the research run it was made for (estimated if the API reported no counts)"""
+        recorder = current_usage()
+        if recorder is None:
+            return
+        if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+            recorder.record_llm(model, usage.prompt_tokens, usage.completion_tokens or 0)
+        else:
+            recorder.record_llm(model, estimate_tokens(prompt), estimate_tokens(completion), estimated=True)
+    
+    def _record_error(self, error: Exception, timeout: float | None) -> None:
+        """Count upstream outages (not bad requests or caller-imposed deadlines) against the circuit"""
+        from cerebras.cloud.sdk import APIConnectionError, APIStatusError, APITimeoutError
+        
+        if isinstance(error, APITimeoutError):
+            outage = timeout is None
+        elif isinstance(error, APIConnectionError):
+            outage = True
+        else:
+            outage = isinstance(error, APIStatusError) and (error.status_code >= 500 or error.status_code == 429)
+        if outage:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
@@ -0,0 +1,264 @@
+"""
+Durable checkpoint store for research pipelines.
+Persists each completed stage keyed by session_id so another worker can resume the run.
+Source texts are stored once, content-addressed, however many stages reference them.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config.settings import Settings
+from services.content_store import join_contents, split_contents
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_heartbeat_at ON sessions(heartbeat_at);
+CREATE TABLE IF NOT EXISTS stages (
+    session_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    PRIMARY KEY (session_id, stage)
+);
+CREATE TABLE IF NOT EXISTS contents (
+    id TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_contents (
+    session_id TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    PRIMARY KEY (session_id, content_id)
+);
+"""
+
+RUNNING = "running"
+COMPLETE = "complete"
+INTERRUPTED = "interrupted"
+
+
+class CheckpointNotFound(LookupError):
+    """No checkpoint exists for the session"""
+
+
+class CheckpointBusy(RuntimeError):
+    """The session is still running on a worker that holds a live lease"""
+
+
+@dataclass
+class Checkpoint:
+    """Saved state of one research session"""
+
+    session_id: str
+    query: str
+    params: Dict[str, Any]
+    status: str
+    owner: str
+    heartbeat_at: float
+    stages: Dict[str, Any] = field(default_factory=dict)
+
+
+class CheckpointStore:
+    """SQLite store of per-stage research checkpoints with worker leases"""
+
+    def __init__(self, path: Optional[str] = None, heartbeat_seconds: Optional[float] = None):
+        """
+        Open (or create) the store and start heartbeating this worker's running sessions.
+
+        Args:
+            path: SQLite database file (default from settings)
+            heartbeat_seconds: Lease renewal interval (default from settings)
+        """
+        self.path = path or Settings.CHECKPOINT_PATH
+        self.heartbeat_seconds = heartbeat_seconds or Settings.CHECKPOINT_HEARTBEAT_SECONDS
+        # A session whose owner missed three heartbeats can be taken over
+        self.lease_seconds = self.heartbeat_seconds * 3
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.purge(Settings.CHECKPOINT_RETENTION_HOURS * 3600)
+
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(
+            target=self._heartbeat_loop, name="checkpoint-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+        print("✅ Checkpoint store initialized")
+
+    def start(self, session_id: str, query: str, params: Dict[str, Any]) -> None:
+        """Record a new session owned by this worker"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO sessions (session_id, query, params, status, owner, created_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (session_id, query, json.dumps(params), RUNNING, self.worker_id, now, now),
+            )
+
+    def claim(self, session_id: str) -> Checkpoint:
+        """
+        Take over a session to resume it, atomically with respect to other workers.
+
+        Returns:
+            The session's checkpoint, now owned by this worker
+
+        Raises:
+            CheckpointNotFound: If the session was never checkpointed
+            CheckpointBusy: If it is still running (on any worker, this one included)
+        """
+        now = time.time()
+        with self._lock:
+            claimed = self._conn.execute(
+                """
+                UPDATE sessions SET owner = ?, status = ?, heartbeat_at = ?
+                WHERE session_id = ? AND status != ?
+                  AND (status != ? OR heartbeat_at < ?)
+                """,
+                (self.worker_id, RUNNING, now, session_id, COMPLETE, RUNNING, now - self.lease_seconds),
+            ).rowcount
+        checkpoint = self.load(session_id)
+        if checkpoint is None:
+            raise CheckpointNotFound(session_id)
+        if not claimed and checkpoint.status != COMPLETE:
+            raise CheckpointBusy(session_id)
+        return checkpoint
+
+    def save(self, session_id: str, stage: str, data: Any) -> None:
+        """Persist the output of a completed stage (source texts by reference)"""
+        now = time.time()
+        data, contents = split_contents(data)
+        payload = json.dumps(data, default=str)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO contents (id, content) VALUES (?, ?)", contents.items()
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO session_contents (session_id, content_id) VALUES (?, ?)",
+                    [(session_id, content_id) for content_id in contents],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO stages (session_id, stage, data, saved_at) VALUES (?, ?, ?, ?)",
+                    (session_id, stage, payload, now),
+                )
+                self._conn.execute(
+                    "UPDATE sessions SET heartbeat_at = ? WHERE session_id = ? AND owner = ?",
+                    (now, session_id, self.worker_id),
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def finish(self, session_id: str, status: str) -> None:
+        """Record how a run ended (complete, or interrupted and resumable)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sessions SET status = ?, heartbeat_at = ? WHERE session_id = ? AND owner = ?",
+                (status, time.time(), session_id, self.worker_id),
+            )
+
+    def load(self, session_id: str) -> Optional[Checkpoint]:
+        """Saved state of a session, or None if it was never checkpointed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, params, status, owner, heartbeat_at FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            stages = self._conn.execute(
+                "SELECT stage, data FROM stages WHERE session_id = ?", (session_id,)
+            ).fetchall()
+            contents = dict(self._conn.execute(
+                """
+                SELECT c.id, c.content FROM session_contents l
+                JOIN contents c ON c.id = l.content_id
+                WHERE l.session_id = ?
+                """,
+                (session_id,),
+            ).fetchall())
+        return Checkpoint(
+            session_id=session_id,
+            query=row[0],
+            params=json.loads(row[1]),
+            status=row[2],
+            owner=row[3],
+            heartbeat_at=row[4],
+            stages={stage: join_contents(json.loads(data), contents) for stage, data in stages},
+        )
+
+    def interrupt_owned(self) -> List[str]:
+        """Mark this worker's running sessions resumable (used when shutting down)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM sessions WHERE owner = ? AND status = ?", (self.worker_id, RUNNING)
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE sessions SET status = ? WHERE owner = ? AND status = ?",
+                (INTERRUPTED, self.worker_id, RUNNING),
+            )
+        return [r[0] for r in rows]
+
+    def purge(self, max_age_seconds: float) -> int:
+        """Delete sessions not touched within max_age_seconds"""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for table in ("stages", "session_contents"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE session_id IN (SELECT session_id FROM sessions WHERE heartbeat_at < ?)",
+                    (cutoff,),
+                )
+            deleted = self._conn.execute("DELETE FROM sessions WHERE heartbeat_at < ?", (cutoff,)).rowcount
+            # Texts no remaining session references
+            self._conn.execute(
+                "DELETE FROM contents WHERE id NOT IN (SELECT content_id FROM session_contents)"
+            )
+            self._conn.execute("COMMIT")
+        return deleted
+
+    def ready(self) -> dict:
+        """Readiness: the database answers and this worker's leases are being renewed"""
+        with self._lock:
+            self._conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchall()
+        alive = self._heartbeat.is_alive()
+        return {"ok": alive, "heartbeat_alive": alive}
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def _heartbeat_loop(self) -> None:
+        """Renew the lease on every session this worker is still running"""
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE sessions SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                        (time.time(), self.worker_id, RUNNING),
+                    )
+            except sqlite3.Error as e:
+                print(f"❌ Checkpoint heartbeat error: {e}")
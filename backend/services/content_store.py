@@ -0,0 +1,296 @@
+"""
+Content-addressed store of source texts.
+Each (URL, text) is held once, keyed by its hash: recent entries in memory, colder
+ones in memory-mapped segment files. Results, caches and persisted payloads carry
+the id and the text is materialized only when it is needed.
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from config.settings import Settings
+from utils.metrics import metrics
+
+
+@dataclass(frozen=True)
+class StoredContent:
+    """One deduplicated source"""
+
+    url: Optional[str]
+    title: str
+    text: str
+
+
+def content_id(url: Optional[str], text: str) -> str:
+    """Stable id of a source: a hash of its URL and text"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update((url or "").encode())
+    digest.update(b"\0")
+    digest.update(text.encode())
+    return digest.hexdigest()
+
+
+def split_contents(value: Any) -> Tuple[Any, Dict[str, str]]:
+    """
+    Replace the text of every source in a result payload with its id.
+
+    Sources are the dicts with "id" and "content" inside any "sources" list.
+
+    Returns:
+        Tuple of (copy of value holding references, {id: text})
+    """
+    contents: Dict[str, str] = {}
+
+    def strip(node: Any) -> Any:
+        if isinstance(node, dict):
+            return {
+                key: [strip_source(s) for s in item] if key == "sources" and isinstance(item, list) else strip(item)
+                for key, item in node.items()
+            }
+        if isinstance(node, list):
+            return [strip(item) for item in node]
+        return node
+
+    def strip_source(source: Any) -> Any:
+        if isinstance(source, dict) and source.get("id") and "content" in source:
+            contents[source["id"]] = source["content"]
+            return {key: item for key, item in source.items() if key != "content"}
+        return strip(source)
+
+    return strip(value), contents
+
+
+def join_contents(value: Any, contents: Mapping[str, str]) -> Any:
+    """Inverse of split_contents: materialize the text of every referenced source"""
+    if isinstance(value, dict):
+        return {
+            key: [_join_source(s, contents) for s in item] if key == "sources" and isinstance(item, list) else join_contents(item, contents)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [join_contents(item, contents) for item in value]
+    return value
+
+
+def _join_source(source: Any, contents: Mapping[str, str]) -> Any:
+    if isinstance(source, dict) and source.get("id") and "content" not in source:
+        return {**source, "content": contents.get(source["id"], "")}
+    return join_contents(source, contents)
+
+
+def referenced_ids(value: Any) -> List[str]:
+    """Ids of the sources referenced by a payload produced by split_contents"""
+    ids: List[str] = []
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            for key, item in node.items():
+                if key == "sources" and isinstance(item, list):
+                    ids.extend(s["id"] for s in item if isinstance(s, dict) and s.get("id"))
+                walk(item)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(value)
+    return list(dict.fromkeys(ids))
+
+
+class _Segment:
+    """Append-only file of cold entries, read through a memory map"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = open(path, "a+b")
+        self.size = 0
+        self.ids: List[str] = []
+        self._map: Optional[mmap.mmap] = None
+
+    def append(self, data: bytes) -> int:
+        offset = self.size
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self._map is None or len(self._map) < offset + length:
+            # The file grew since it was mapped
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:offset + length]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self.file.close()
+        os.remove(self.path)
+
+
+class ContentStore:
+    """Deduplicating source store with a bounded in-memory tier and mmap-backed cold segments"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        memory_bytes: Optional[int] = None,
+        disk_bytes: Optional[int] = None,
+        segment_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            directory: Where this process keeps its cold segments (default from settings)
+            memory_bytes: Text kept in memory before the least recently used entries go cold
+            disk_bytes: Cold text kept on disk before the oldest segment is dropped
+            segment_bytes: Size at which a new segment file is started
+        """
+        root = directory or Settings.CONTENT_STORE_DIR
+        self.memory_bytes = memory_bytes or Settings.CONTENT_STORE_MEMORY_MB * 1024 * 1024
+        self.disk_bytes = disk_bytes or Settings.CONTENT_STORE_DISK_MB * 1024 * 1024
+        self.segment_bytes = segment_bytes or Settings.CONTENT_STORE_SEGMENT_MB * 1024 * 1024
+
+        # Segments only outlive their process after a crash; clear those of dead processes
+        os.makedirs(root, exist_ok=True)
+        for name in os.listdir(root):
+            if name.isdigit() and not self._process_alive(int(name)):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        self.directory = os.path.join(root, str(os.getpid()))
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+
+        self._lock = threading.Lock()
+        self._hot: "OrderedDict[str, StoredContent]" = OrderedDict()
+        self._hot_bytes = 0
+        self._cold: Dict[str, Tuple[_Segment, int, int]] = {}
+        self._segments: List[_Segment] = []
+        self._next_segment = 0
+        self.puts = 0
+        self.duplicates = 0
+        self.cold_reads = 0
+        self.misses = 0
+        metrics.register("content_store", self.stats)
+
+    def put(self, url: Optional[str], title: str, text: str) -> Tuple[str, str]:
+        """
+        Store a source once.
+
+        Returns:
+            Tuple of (id, canonical text); every caller storing the same source
+            gets the same string object back while it is in memory
+        """
+        source_id = content_id(url, text)
+        with self._lock:
+            self.puts += 1
+            entry = self._hot.get(source_id)
+            if entry is not None:
+                self.duplicates += 1
+                self._hot.move_to_end(source_id)
+                return source_id, entry.text
+            if source_id in self._cold:
+                self.duplicates += 1
+            entry = StoredContent(url, title, text)
+            self._hot[source_id] = entry
+            self._hot_bytes += len(text)
+            self._evict()
+            return source_id, text
+
+    def get(self, source_id: str) -> Optional[StoredContent]:
+        """A stored source, read back from its segment if it went cold (None if dropped)"""
+        with self._lock:
+            entry = self._hot.get(source_id)
+            if entry is not None:
+                self._hot.move_to_end(source_id)
+                return entry
+            location = self._cold.get(source_id)
+            if location is None:
+                self.misses += 1
+                return None
+            segment, offset, length = location
+            url, title, text = json.loads(segment.read(offset, length))
+            self.cold_reads += 1
+            # Promote: it is likely to be read again soon
+            entry = StoredContent(url, title, text)
+            self._hot[source_id] = entry
+            self._hot_bytes += len(text)
+            self._evict()
+            return entry
+
+    def contents(self, ids: List[str]) -> Dict[str, str]:
+        """Texts of the given ids that are still stored (for join_contents)"""
+        found = {}
+        for source_id in ids:
+            entry = self.get(source_id)
+            if entry is not None:
+                found[source_id] = entry.text
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hot_entries": len(self._hot),
+                "hot_bytes": self._hot_bytes,
+                "cold_entries": len(self._cold),
+                "cold_bytes": sum(s.size for s in self._segments),
+                "segments": len(self._segments),
+                "puts": self.puts,
+                "deduplicated": self.duplicates,
+                "cold_reads": self.cold_reads,
+                "misses": self.misses,
+            }
+
+    def ready(self) -> Dict[str, Any]:
+        """Readiness: the segment directory is writable and every open segment is still on disk"""
+        writable = os.access(self.directory, os.W_OK | os.X_OK)
+        with self._lock:
+            missing = [s.path for s in self._segments if not os.path.exists(s.path)]
+        return {"ok": writable and not missing, "writable": writable, "missing_segments": len(missing)}
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._cold = {}
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _evict(self) -> None:
+        """Move least recently used entries to the cold segments (lock held)"""
+        while self._hot_bytes > self.memory_bytes and len(self._hot) > 1:
+            source_id, entry = self._hot.popitem(last=False)
+            self._hot_bytes -= len(entry.text)
+            if source_id not in self._cold:
+                data = json.dumps([entry.url, entry.title, entry.text]).encode()
+                segment = self._active_segment(len(data))
+                self._cold[source_id] = (segment, segment.append(data), len(data))
+                segment.ids.append(source_id)
+        while len(self._segments) > 1 and sum(s.size for s in self._segments) > self.disk_bytes:
+            # Oldest segment first: its entries have been cold the longest
+            oldest = self._segments.pop(0)
+            for source_id in oldest.ids:
+                if self._cold.get(source_id, (None,))[0] is oldest:
+                    del self._cold[source_id]
+            oldest.close()
+
+    def _active_segment(self, size: int) -> _Segment:
+        if not self._segments or self._segments[-1].size + size > self.segment_bytes:
+            path = os.path.join(self.directory, f"{self._next_segment:06d}.seg")
+            self._next_segment += 1
+            self._segments.append(_Segment(path))
+        return self._segments[-1]
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
@@ -0,0 +1,271 @@
+"""
+Persistent research history backed by SQLite FTS5.
+Keeps every finished report so it can be browsed and searched without re-running research.
+Source texts are stored once, content-addressed, however many reports cite them.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import Settings
+from services.content_store import join_contents, split_contents
+from services.source_index import match_expression
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT UNIQUE NOT NULL,
+    query TEXT NOT NULL,
+    synthesis TEXT NOT NULL,
+    model TEXT,
+    subagents INTEGER NOT NULL,
+    total_sources INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    account TEXT NOT NULL DEFAULT 'anonymous'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    query, synthesis, content='reports', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO reports_fts(rowid, query, synthesis) VALUES (new.id, new.query, new.synthesis);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+    INSERT INTO reports_fts(reports_fts, rowid, query, synthesis)
+    VALUES ('delete', old.id, old.query, old.synthesis);
+END;
+CREATE TABLE IF NOT EXISTS contents (
+    id TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_contents (
+    report_id INTEGER NOT NULL,
+    content_id TEXT NOT NULL,
+    PRIMARY KEY (report_id, content_id)
+);
+CREATE INDEX IF NOT EXISTS report_contents_content_id ON report_contents(content_id);
+CREATE TRIGGER IF NOT EXISTS reports_ad_contents AFTER DELETE ON reports BEGIN
+    DELETE FROM report_contents WHERE report_id = old.id;
+END;
+"""
+
+# Columns returned in list and search pages (the full payload is only read by get)
+_SUMMARY_COLUMNS = "r.id, r.session_id, r.query, r.model, r.subagents, r.total_sources, r.created_at"
+
+
+class HistoryStore:
+    """Durable store of finished research reports with keyset-paginated listing and search"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Open (or create) the history database.
+
+        Args:
+            path: SQLite database file (default from settings)
+            max_entries: Size cap; the oldest reports are evicted beyond it (default from settings)
+        """
+        self.path = path or Settings.HISTORY_PATH
+        self.max_entries = max_entries or Settings.HISTORY_MAX_ENTRIES
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        print("✅ Research history initialized")
+
+    def save(self, payload: Dict[str, Any], account: str = "anonymous") -> None:
+        """
+        Store a finished report (a ResearchResponse payload), replacing any earlier
+        report of the same session (e.g. after a resume).
+
+        Args:
+            payload: Serialized response; must carry session_id, query and synthesis
+            account: API key (tenant) the report belongs to
+        """
+        stored, contents = split_contents(payload)
+        row = (
+            payload["session_id"],
+            payload["query"],
+            payload.get("synthesis") or "",
+            payload.get("model"),
+            payload.get("subagents") or 0,
+            payload.get("total_sources") or 0,
+            time.time(),
+            json.dumps(stored),
+            account,
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_reports("session_id = ?", (payload["session_id"],))
+                report_id = self._conn.execute(
+                    """
+                    INSERT INTO reports (session_id, query, synthesis, model, subagents, total_sources, created_at, payload, account)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    row,
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO contents (id, content) VALUES (?, ?)", contents.items()
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO report_contents (report_id, content_id) VALUES (?, ?)",
+                    [(report_id, content_id) for content_id in contents],
+                )
+                overflow = self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    self._delete_reports("id IN (SELECT id FROM reports ORDER BY id ASC LIMIT ?)", (overflow,))
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, session_id: str, account: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Full stored report of a session, or None (also when account is given and does not own it)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, payload, account FROM reports WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is not None and account is not None and row[2] != account:
+                row = None
+            if row is None:
+                return None
+            contents = dict(self._conn.execute(
+                """
+                SELECT c.id, c.content FROM report_contents l
+                JOIN contents c ON c.id = l.content_id
+                WHERE l.report_id = ?
+                """,
+                (row[0],),
+            ).fetchall())
+        return join_contents(json.loads(row[1]), contents)
+
+    def list(self, limit: int, cursor: Optional[str] = None, account: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Page through reports, newest first.
+
+        Args:
+            limit: Page size
+            cursor: next_cursor of the previous page (None for the first page)
+            account: Only list this API key's reports (None lists every report)
+
+        Returns:
+            Tuple of (report summaries, next_cursor or None on the last page)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT {_SUMMARY_COLUMNS}, NULL
+                FROM reports r
+                WHERE r.id < ? AND (? IS NULL OR r.account = ?)
+                ORDER BY r.id DESC
+                LIMIT ?
+                """,
+                (self._decode_cursor(cursor), account, account, limit + 1),
+            ).fetchall()
+        return self._page(rows, limit)
+
+    def search(self, text: str, limit: int, cursor: Optional[str] = None, account: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Full-text search over queries and syntheses, newest first.
+
+        Every significant term must match. Each item carries a highlighted snippet.
+        Given account, only that API key's reports are searched.
+
+        Returns:
+            Tuple of (report summaries, next_cursor or None on the last page)
+        """
+        match = match_expression(text)
+        if not match:
+            return [], None
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT {_SUMMARY_COLUMNS}, snippet(reports_fts, 1, '**', '**', '…', 24)
+                FROM reports_fts
+                JOIN reports r ON r.id = reports_fts.rowid
+                WHERE reports_fts MATCH ? AND r.id < ? AND (? IS NULL OR r.account = ?)
+                ORDER BY r.id DESC
+                LIMIT ?
+                """,
+                (match, self._decode_cursor(cursor), account, account, limit + 1),
+            ).fetchall()
+        return self._page(rows, limit)
+
+    def count(self) -> int:
+        """Number of stored reports"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def ready(self) -> Dict[str, Any]:
+        """Readiness: the database answers"""
+        with self._lock:
+            self._conn.execute("SELECT 1 FROM reports LIMIT 1").fetchall()
+        return {"ok": True}
+
+    def _migrate(self) -> None:
+        """Add the account column to databases created before reports had owners (they become anonymous)"""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(reports)")]
+        if "account" not in columns:
+            self._conn.execute("ALTER TABLE reports ADD COLUMN account TEXT NOT NULL DEFAULT 'anonymous'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS reports_account_id ON reports(account, id)")
+
+    def _delete_reports(self, where: str, params: tuple) -> None:
+        """Delete reports and the source texts only they cited (lock and transaction held)"""
+        report_ids = [r[0] for r in self._conn.execute(f"SELECT id FROM reports WHERE {where}", params)]
+        if not report_ids:
+            return
+        marks = ",".join("?" * len(report_ids))
+        content_ids = [
+            r[0]
+            for r in self._conn.execute(
+                f"SELECT DISTINCT content_id FROM report_contents WHERE report_id IN ({marks})", report_ids
+            )
+        ]
+        self._conn.execute(f"DELETE FROM reports WHERE id IN ({marks})", report_ids)
+        self._conn.executemany(
+            """
+            DELETE FROM contents WHERE id = ?
+              AND NOT EXISTS (SELECT 1 FROM report_contents WHERE content_id = ?)
+            """,
+            [(content_id, content_id) for content_id in content_ids],
+        )
+
+    @staticmethod
+    def _page(rows: List[tuple], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        # One extra row was fetched to learn whether another page exists
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [
+            {
+                "session_id": row[1],
+                "query": row[2],
+                "model": row[3],
+                "subagents": row[4],
+                "total_sources": row[5],
+                "created_at": row[6],
+                "snippet": row[7],
+            }
+            for row in rows
+        ]
+        next_cursor = str(rows[-1][0]) if has_more else None
+        return items, next_cursor
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> int:
+        """Row id to continue below; an absent cursor starts from the newest report"""
+        if cursor is None:
+            return 2 ** 63 - 1
+        try:
+            return int(cursor)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor!r}") from None
@@ -0,0 +1,154 @@
+"""
+Cache of finished research results, with query popularity tracking.
+Results are held for a TTL with their source texts referenced by id in the
+content store, and every lookup counts towards its query's (decaying) popularity,
+so the refresh-ahead prefetcher knows which entries are worth keeping hot.
+"""
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from config.settings import Settings
+from services.content_store import ContentStore, join_contents, referenced_ids, split_contents
+from utils.metrics import metrics
+
+
+@dataclass
+class _Entry:
+    result: Dict[str, Any]
+    source_ids: List[str]
+    stored_at: float
+    expires_at: float
+
+
+@dataclass
+class _Popularity:
+    query: str
+    score: float
+    updated_at: float
+
+
+class ResultCache:
+    """TTL cache of research results keyed by (normalized query, parameters)"""
+
+    def __init__(
+        self,
+        content_store: ContentStore,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        half_life_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            content_store: Store holding the source texts the cached results reference
+            ttl_seconds: How long a result is served after it was researched
+            max_entries: Results kept; the least recently used are dropped beyond it
+            half_life_seconds: Time for a query's popularity to halve without new requests
+        """
+        self.content_store = content_store
+        self.ttl_seconds = ttl_seconds or Settings.RESULT_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or Settings.RESULT_CACHE_MAX_ENTRIES
+        self.half_life_seconds = half_life_seconds or Settings.QUERY_POPULARITY_HALF_LIFE_SECONDS
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._popularity: Dict[Hashable, _Popularity] = {}
+        self.hits = 0
+        self.misses = 0
+        metrics.register("result_cache", self.stats)
+
+    def get(self, key: Hashable, query: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Look up a result and count the request towards the query's popularity.
+
+        Returns:
+            Tuple of (result with its source texts, seconds since it was researched),
+            or None if there is no fresh entry
+        """
+        now = time.time()
+        with self._lock:
+            self._bump(key, query, now)
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        contents = self.content_store.contents(entry.source_ids)
+        if len(contents) < len(entry.source_ids):
+            # Some texts were dropped from the content store: research again
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return join_contents(entry.result, contents), now - entry.stored_at
+
+    def put(self, key: Hashable, result: Dict[str, Any]) -> None:
+        """Cache a freshly researched result (its source texts stay in the content store)"""
+        stored, _ = split_contents(result)
+        now = time.time()
+        with self._lock:
+            self._entries[key] = _Entry(stored, referenced_ids(stored), now, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def due(self, limit: int, within_seconds: float, min_score: float) -> List[Tuple[Hashable, str, float]]:
+        """
+        The most popular queries whose cached result expires within within_seconds
+        (or has already expired), most popular first.
+
+        Args:
+            limit: Consider only this many of the most popular queries
+            within_seconds: How far ahead of expiry an entry becomes due
+            min_score: Popularity (decayed request count) a query needs to be kept hot
+
+        Returns:
+            List of (key, query, popularity)
+        """
+        now = time.time()
+        with self._lock:
+            ranked = sorted(
+                ((key, record.query, self._score(record, now)) for key, record in self._popularity.items()),
+                key=lambda item: item[2],
+                reverse=True,
+            )[:limit]
+            return [
+                (key, query, score)
+                for key, query, score in ranked
+                if score >= min_score
+                and (key not in self._entries or self._entries[key].expires_at - now <= within_seconds)
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            lookups = self.hits + self.misses
+            trending = sorted(self._popularity.values(), key=lambda r: self._score(r, now), reverse=True)[:5]
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "tracked_queries": len(self._popularity),
+                "trending": [{"query": r.query, "score": round(self._score(r, now), 2)} for r in trending],
+            }
+
+    def _bump(self, key: Hashable, query: str, now: float) -> None:
+        """Add one request to a query's decayed popularity (lock held)"""
+        record = self._popularity.get(key)
+        if record is None:
+            record = self._popularity[key] = _Popularity(query, 0.0, now)
+        record.score = self._score(record, now) + 1.0
+        record.updated_at = now
+        if len(self._popularity) > self.max_entries * 4:
+            # Forget the queries nobody asks for any more
+            ranked = sorted(self._popularity, key=lambda k: self._score(self._popularity[k], now))
+            for stale in ranked[: len(ranked) - self.max_entries * 2]:
+                del self._popularity[stale]
+
+    def _score(self, record: _Popularity, now: float) -> float:
+        return record.score * 0.5 ** ((now - record.updated_at) / self.half_life_seconds)
@@ -2,31 +2,93 @@
 Search service using Exa API.
 Handles web searching and content retrieval.
 """
-from exa_py import Exa
+from typing import Any, Dict, Optional
 from config.settings import Settings
+from services.source_index import SourceIndex
+from utils.cancellation import CancellationToken
+from utils.circuit_breaker import CircuitBreaker, OPEN
+from utils.singleflight import SingleFlight
+from utils.usage import current_usage
 
 class SearchService:
     """Manages web search operations using Exa"""
     
-    def __init__(self):
-        """Initialize Exa client with API key"""
-        self.client = Exa(api_key=Settings.EXA_API_KEY)
+    def __init__(self, source_index: Optional[SourceIndex] = None):
+        """
+        Initialize Exa client with API key and the shared connection pool.
+        
+        Args:
+            source_index: Optional local index that every fetched result is stored in
+        """
+        # Imported here so the SDK's import cost is paid at startup, not at module import
+        from services.transport import PooledExa, create_exa_session
+        
+        self.session = create_exa_session()
+        self.client = PooledExa(Settings.EXA_API_KEY, self.session)
+        self.source_index = source_index
+        self._inflight = SingleFlight()
+        self.breaker = CircuitBreaker("exa", Settings.CIRCUIT_FAILURE_THRESHOLD, Settings.CIRCUIT_RESET_SECONDS)
+        self.warmed_connections = None
         print("✅ Search service initialized")
     
-    def search(self, query: str, num_results: int = None) -> list:
+    def warm_up(self, connections: int = None) -> int:
+        """
+        Pre-open pooled connections to Exa (DNS, TCP and TLS) before traffic arrives.
+        
+        Args:
+            connections: Connections to open (default from settings)
+            
+        Returns:
+            Number of connections opened
+        """
+        from services.transport import warm_connections
+        
+        if connections is None:
+            connections = Settings.HTTP_WARMUP_CONNECTIONS
+        timeout = Settings.HTTP_WARMUP_TIMEOUT_SECONDS
+        self.warmed_connections = warm_connections(
+            lambda: self.session.head(self.client.base_url, timeout=timeout), connections, timeout
+        )
+        return self.warmed_connections
+    
+    def ready(self) -> Dict[str, Any]:
+        """Readiness of the Exa upstream (not ready while its circuit is open)"""
+        state = self.breaker.state
+        return {"ok": state != OPEN, "circuit": state, "warmed_connections": self.warmed_connections}
+    
+    def search(self, query: str, num_results: int = None, cancel: Optional[CancellationToken] = None) -> list:
         """
         Search the web using Exa.
         
         Args:
             query: Search query string
             num_results: Number of results to return (default from settings)
+            cancel: Token checked before the (billed) Exa call is made; also stops
+                waiting on an identical search another caller already started
             
         Returns:
             List of search results with title and text content
+            
+        Raises:
+            Cancelled: If cancel was cancelled before the search started or while
+                waiting on another caller's identical search
         """
         if num_results is None:
             num_results = Settings.DEFAULT_SEARCH_RESULTS
+        if cancel is not None:
+            cancel.raise_if_cancelled()
         
+        # Concurrent identical searches share one Exa call; a cancelled joiner stops waiting on it
+        results, _ = self._inflight.do(
+            (query, num_results), lambda: self._search(query, num_results), cancel=cancel
+        )
+        return results
+    
+    def _search(self, query: str, num_results: int) -> list:
+        """Call Exa and index the results"""
+        if not self.breaker.allow():
+            print("❌ Search error: Exa circuit open, skipping call")
+            return []
         try:
             result = self.client.search_and_contents(
                 query,
@@ -34,7 +96,28 @@ class SearchService:
                 num_results=num_results,
                 text={"max_characters": Settings.MAX_CHARACTERS_PER_RESULT}
             )
+            self.breaker.record_success()
+            recorder = current_usage()
+            if recorder is not None:
+                recorder.record_search(len(result.results))
+            if self.source_index is not None:
+                self.source_index.add_many(result.results)
             return result.results
         except Exception as e:
+            self._record_error(e)
             print(f"❌ Search error: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def _record_error(self, error: Exception) -> None:
+        """Count upstream outages (not bad requests) against the circuit"""
+        import requests
+        from services.transport import ExaHTTPError
+        
+        if isinstance(error, requests.RequestException):
+            outage = True
+        else:
+            outage = isinstance(error, ExaHTTPError) and (error.status_code >= 500 or error.status_code == 429)
+        if outage:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
@@ -0,0 +1,276 @@
+"""
+Local source index backed by SQLite FTS5.
+Persists fetched search results so repeat searches can skip Exa.
+"""
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from config.settings import Settings
+
+# Words that carry no recall signal and would make AND-matching too strict
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "best", "by", "for", "from",
+    "how", "in", "is", "it", "of", "on", "or", "the", "to", "vs", "what",
+    "when", "which", "who", "why", "with",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_fetched_at ON sources(fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS sources_fts USING fts5(
+    title, text, content='sources', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS sources_ai AFTER INSERT ON sources BEGIN
+    INSERT INTO sources_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS sources_ad AFTER DELETE ON sources BEGIN
+    INSERT INTO sources_fts(sources_fts, rowid, title, text)
+    VALUES ('delete', old.id, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS sources_au AFTER UPDATE ON sources BEGIN
+    INSERT INTO sources_fts(sources_fts, rowid, title, text)
+    VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO sources_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+"""
+
+
+def match_expression(query: str) -> str:
+    """Build an FTS5 AND-query from the significant terms of a search query"""
+    terms = [
+        term
+        for term in re.findall(r"\w+", query.lower())
+        if len(term) > 1 and term not in _STOPWORDS
+    ]
+    # Quote each term so FTS5 operators in user input are treated literally
+    return " AND ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+@dataclass
+class IndexedSource:
+    """Search result served from the local index (same fields as Exa results)"""
+
+    url: str
+    title: str
+    text: str
+    fetched_at: float
+
+
+class SourceIndex:
+    """Persistent full-text index of previously fetched sources"""
+
+    # Maximum rows written per transaction by the background writer
+    WRITE_BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_age_hours: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """
+        Open (or create) the index and start the background writer.
+
+        Args:
+            path: SQLite database file (default from settings)
+            max_age_hours: Freshness window for local hits (default from settings)
+            max_entries: Size cap; oldest entries are evicted beyond it (default from settings)
+        """
+        self.path = path or Settings.SOURCE_INDEX_PATH
+        self.max_age_seconds = (
+            max_age_hours if max_age_hours is not None else Settings.SOURCE_INDEX_MAX_AGE_HOURS
+        ) * 3600
+        self.max_entries = max_entries or Settings.SOURCE_INDEX_MAX_ENTRIES
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The writer connection belongs to the background writer; searches read
+        # through their own read-only connections, which WAL lets run alongside a write
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Idle read connections, one opened per concurrent reader
+        self._readers: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="source-index-writer", daemon=True
+        )
+        self._writer.start()
+        print("✅ Source index initialized")
+
+    def search(
+        self, query: str, limit: int, max_age_seconds: Optional[float] = None
+    ) -> List[IndexedSource]:
+        """
+        Find fresh indexed sources matching every significant query term.
+
+        Args:
+            query: Search query string
+            limit: Maximum number of sources to return
+            max_age_seconds: Override for the freshness window
+
+        Returns:
+            Matching sources ordered by BM25 relevance (may be empty)
+        """
+        match = match_expression(query)
+        if not match:
+            return []
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+
+        try:
+            with self._reader() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT s.url, s.title, s.text, s.fetched_at
+                    FROM sources_fts
+                    JOIN sources s ON s.id = sources_fts.rowid
+                    WHERE sources_fts MATCH ? AND s.fetched_at >= ?
+                    ORDER BY bm25(sources_fts)
+                    LIMIT ?
+                    """,
+                    (match, cutoff, limit),
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ Source index error: {e}")
+            return []
+
+        return [IndexedSource(*row) for row in rows]
+
+    def add_many(self, results: Iterable) -> None:
+        """
+        Queue search results for indexing without blocking the caller.
+
+        Args:
+            results: Exa result objects (anything with url, title and text)
+        """
+        if self._closed:
+            return
+        now = time.time()
+        for result in results:
+            url = getattr(result, "url", None)
+            text = getattr(result, "text", None)
+            if not url or not text:
+                continue
+            self._queue.put((url, getattr(result, "title", None) or "", text, now))
+
+    def flush(self) -> None:
+        """Block until every queued result has been written"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, stop the background writer and close the database"""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def count(self) -> int:
+        """Number of indexed sources"""
+        with self._reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+
+    def ready(self) -> dict:
+        """Readiness: the database answers and the background writer is running"""
+        with self._reader() as conn:
+            conn.execute("SELECT 1 FROM sources LIMIT 1").fetchall()
+        alive = self._writer.is_alive()
+        return {"ok": alive, "writer_alive": alive, "pending_writes": self._queue.qsize()}
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow an idle read-only connection, opening one if every other is in use"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            uri = f"{Path(self.path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _write_loop(self) -> None:
+        """Drain the queue in bulk transactions and enforce the size cap, until closed"""
+        closed = False
+        while not closed:
+            batch = [self._queue.get()]
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # None is the close marker: write what came before it, then stop
+            rows = [row for row in batch if row is not None]
+            closed = len(rows) < len(batch)
+            try:
+                if rows:
+                    self._write_batch(rows)
+            except sqlite3.Error as e:
+                print(f"❌ Source index write error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO sources (url, title, text, fetched_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        title = excluded.title,
+                        text = excluded.text,
+                        fetched_at = excluded.fetched_at
+                    """,
+                    batch,
+                )
+                overflow = (
+                    self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+                    - self.max_entries
+                )
+                if overflow > 0:
+                    # Evict the stalest entries first
+                    self._conn.execute(
+                        """
+                        DELETE FROM sources WHERE id IN (
+                            SELECT id FROM sources ORDER BY fetched_at ASC LIMIT ?
+                        )
+                        """,
+                        (overflow,),
+                    )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
@@ -0,0 +1,365 @@
+"""
+Shared HTTP transport for the Cerebras and Exa clients.
+Imported on first service construction (it pulls in both SDKs). Provides tuned keep-alive connection pools, optional HTTP/2, DNS caching,
+connection warm-up and pool utilization metrics.
+"""
+from __future__ import annotations
+
+import importlib.util
+import ipaddress
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import BoundedSemaphore, Lock
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from exa_py import Exa
+
+from config.settings import Settings
+from utils.metrics import metrics
+
+
+class ConnectionGate:
+    """
+    Admits at most one request per pooled connection and measures the wait.
+
+    Sized to the pool, so requests queue here (where the wait is observable)
+    instead of inside the HTTP library's pool.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._slots = BoundedSemaphore(size)
+        self._lock = Lock()
+        self._in_use = 0
+        self._waiting = 0
+        self._peak_in_use = 0
+        self._acquired = 0
+        self._waited = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    def acquire(self) -> None:
+        started = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        self._slots.acquire()
+        wait_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._waiting -= 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._acquired += 1
+            if wait_ms >= 1:
+                self._waited += 1
+            self._wait_ms_total += wait_ms
+            self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pool_size": self.size,
+                "in_use": self._in_use,
+                "utilization": round(self._in_use / self.size, 3),
+                "peak_in_use": self._peak_in_use,
+                "waiting": self._waiting,
+                "requests": self._acquired,
+                "requests_waited": self._waited,
+                "wait_ms_avg": round(self._wait_ms_total / self._acquired, 2) if self._acquired else 0.0,
+                "wait_ms_max": round(self._wait_ms_max, 2),
+            }
+
+
+class _ReleaseOnce:
+    def __init__(self, release: Callable[[], None]) -> None:
+        self._release = release
+        self._lock = Lock()
+        self._done = False
+
+    def __call__(self) -> None:
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        self._release()
+
+
+class _GatedStream(httpx.SyncByteStream):
+    """Response body that frees its gate slot when the response is closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _GatedTransport(httpx.HTTPTransport):
+    def __init__(self, gate: ConnectionGate, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.gate = gate
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        address = dns_cache.resolve(host, request.url.port or 443)
+        if address != host:
+            # Connect to the cached address; the Host header and TLS name stay the hostname
+            request.url = request.url.copy_with(host=address)
+            request.extensions = {**request.extensions, "sni_hostname": host}
+        self.gate.acquire()
+        release = _ReleaseOnce(self.gate.release)
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_GatedStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+
+class _GatedAdapter(HTTPAdapter):
+    def __init__(self, gate: ConnectionGate, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self.gate = gate
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        host = host_params["host"]
+        address = dns_cache.resolve(host, host_params["port"] or 443)
+        if address != host:
+            # Connect to the cached address; the certificate is still checked against the hostname
+            host_params["host"] = address
+            if host_params["scheme"] == "https":
+                pool_kwargs["server_hostname"] = host
+                pool_kwargs["assert_hostname"] = host
+        return host_params, pool_kwargs
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        # A connection to a cached address would otherwise send the address as Host
+        request.headers.setdefault("Host", request.url.split("/")[2].rsplit("@", 1)[-1])
+        self.gate.acquire()
+        release = _ReleaseOnce(self.gate.release)
+        try:
+            response = super().send(request, stream=stream, timeout=timeout or self.timeout, **kwargs)
+            if not stream:
+                # Read the body while holding the slot; the connection returns to the pool here
+                response.content
+        except BaseException:
+            release()
+            raise
+        if not stream:
+            release()
+        else:
+            close = response.close
+
+            def close_and_release() -> None:
+                try:
+                    close()
+                finally:
+                    release()
+
+            response.close = close_and_release
+        return response
+
+
+class _DNSCache:
+    """
+    TTL cache of resolved API hosts, used by the pooled transports only.
+
+    The transports connect to the cached address while keeping the hostname for
+    the Host header and TLS verification; nothing else in the process is affected.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, int], Tuple[float, str]] = {}
+        self._lock = Lock()
+        self.ttl = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.enabled = False
+
+    def enable(self, ttl: float) -> None:
+        self.ttl = ttl
+        if ttl > 0 and not self.enabled:
+            self.enabled = True
+            metrics.register("dns_cache", self.stats)
+
+    def resolve(self, host: str, port: int) -> str:
+        """
+        Address to connect to for host.
+
+        Returns:
+            The cached or freshly resolved address, or host itself when caching is
+            off, host is already an address, or resolution failed (the HTTP
+            library then resolves it and reports the error)
+        """
+        if not self.enabled or not host or _is_address(host):
+            return host
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        try:
+            address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4][0]
+        except (OSError, IndexError):
+            return host
+        with self._lock:
+            self._entries[key] = (now + self.ttl, address)
+        return address
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ttl_seconds": self.ttl, "entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _is_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+dns_cache = _DNSCache()
+
+
+def http2_available() -> bool:
+    return Settings.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+def create_cerebras_http_client() -> httpx.Client:
+    """Pooled keep-alive httpx client for the Cerebras SDK (HTTP/2 when available)"""
+    dns_cache.enable(Settings.DNS_CACHE_TTL_SECONDS)
+    gate = ConnectionGate(Settings.CEREBRAS_POOL_SIZE)
+    limits = httpx.Limits(
+        max_connections=Settings.CEREBRAS_POOL_SIZE,
+        max_keepalive_connections=Settings.CEREBRAS_POOL_SIZE,
+        keepalive_expiry=Settings.HTTP_KEEPALIVE_SECONDS,
+    )
+    http2 = http2_available()
+    transport = _GatedTransport(gate, limits=limits, http2=http2)
+    metrics.register("http_pool.cerebras", lambda: {**gate.stats(), "http2": http2})
+    return httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(Settings.HTTP_TIMEOUT_SECONDS, connect=10.0),
+        follow_redirects=True,
+    )
+
+
+def create_exa_session() -> requests.Session:
+    """Pooled keep-alive requests session for the Exa client"""
+    dns_cache.enable(Settings.DNS_CACHE_TTL_SECONDS)
+    if dns_cache.ttl > 0 and not hasattr(HTTPAdapter, "build_connection_pool_key_attributes"):
+        # requests < 2.32 never asks the adapter for the pool key, so the cache cannot apply
+        print("⚠️ requests is older than 2.32: Exa connections do not use the DNS cache")
+    gate = ConnectionGate(Settings.EXA_POOL_SIZE)
+    adapter = _GatedAdapter(
+        gate, timeout=Settings.HTTP_TIMEOUT_SECONDS, pool_connections=1, pool_maxsize=Settings.EXA_POOL_SIZE, pool_block=True
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    metrics.register("http_pool.exa", lambda: {**gate.stats(), "http2": False})
+    return session
+
+
+class ExaHTTPError(ValueError):
+    """Exa error response (a ValueError, like the SDK raises, with the status code kept)"""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class PooledExa(Exa):
+    """
+    Exa client that sends its API requests through a pooled session.
+
+    Overrides Exa.request, the single method every SDK call goes through, keeping
+    its contract: the decoded JSON, or the open response when streaming, and a
+    ValueError (an ExaHTTPError carrying the status code) for error responses.
+    """
+
+    def __init__(self, api_key: str, session: requests.Session, **kwargs: Any) -> None:
+        super().__init__(api_key=api_key, **kwargs)
+        self.session = session
+
+    def request(
+        self,
+        endpoint: str,
+        data: Optional[Any] = None,
+        method: str = "POST",
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        method = method.upper()
+        if method not in ("GET", "POST", "PATCH", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        if isinstance(data, str):
+            body = data
+        else:
+            # URLs in the SDK's request models serialize as strings
+            body = json.dumps(data, default=str) if data else None
+        request_headers = {**self.headers, **(headers or {})}
+        streaming = bool(
+            (isinstance(data, dict) and data.get("stream"))
+            or (params and params.get("stream") == "true")
+            or request_headers.get("Accept") == "text/event-stream"
+        )
+        res = self.session.request(
+            method,
+            self.base_url + endpoint,
+            data=body if method in ("POST", "PATCH") else None,
+            params=params if method == "GET" else None,
+            headers=request_headers,
+            stream=streaming,
+        )
+        if res.status_code >= 400:
+            message = f"Request failed with status code {res.status_code}: {res.text}"
+            res.close()
+            raise ExaHTTPError(message, res.status_code)
+        return res if streaming else res.json()
+
+
+def warm_connections(open_one: Callable[[], Any], count: int, timeout: float) -> int:
+    """
+    Open up to count pooled connections by issuing that many requests at once.
+
+    Concurrent requests cannot share an HTTP/1.1 connection, so each one
+    leaves a separate keep-alive connection in the pool.
+
+    Returns:
+        Number of warm-up requests that completed
+    """
+    if count <= 0:
+        return 0
+    executor = ThreadPoolExecutor(max_workers=count)
+    futures = [executor.submit(open_one) for _ in range(count)]
+    done, _ = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+    return sum(1 for f in done if f.exception() is None)
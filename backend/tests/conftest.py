@@ -0,0 +1,14 @@
+"""
+Shared test setup: placeholder API keys, and state files in a temporary directory
+so tests never touch the real data/ stores.
+"""
+import os
+import tempfile
+
+_STATE_DIR = tempfile.mkdtemp(prefix="deep-research-tests-")
+
+os.environ.setdefault("CEREBRAS_API_KEY", "test")
+os.environ.setdefault("EXA_API_KEY", "test")
+os.environ.setdefault("CHECKPOINT_PATH", os.path.join(_STATE_DIR, "checkpoints.db"))
+os.environ.setdefault("HISTORY_PATH", os.path.join(_STATE_DIR, "history.db"))
+os.environ.setdefault("CONTENT_STORE_DIR", os.path.join(_STATE_DIR, "content"))
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from utils.admission import ADMIT, DEGRADE, AdmissionController, Overloaded
+from utils.auth import Tenant
+from utils.fair_scheduler import FairScheduler
+
+
+def controller(scheduler=None, **kwargs):
+    options = dict(target_ms=10, interval_ms=20, shed_ms=1000, max_in_flight=10, max_queue_seconds=0.05, enabled=True)
+    options.update(kwargs)
+    return AdmissionController(scheduler or FairScheduler(capacity=1), **options)
+
+
+def test_idle_queue_admits():
+    admission = controller()
+    assert admission.check() == ADMIT
+    assert not admission.overloaded
+
+
+def test_sustained_delay_degrades_then_clears(monkeypatch):
+    admission = controller()
+    monkeypatch.setattr(admission.scheduler, "load", lambda: (1, 2, 50.0))
+    # One sample above target is not yet overload
+    assert admission.check() == ADMIT
+    time.sleep(0.03)
+    assert admission.check() == DEGRADE
+    assert admission.overloaded
+
+    monkeypatch.setattr(admission.scheduler, "load", lambda: (0, 0, 0.0))
+    assert admission.check() == ADMIT
+    assert admission.stats()["degraded"] == 1
+
+
+def test_sheds_when_overloaded_past_shed_delay(monkeypatch):
+    admission = controller()
+    monkeypatch.setattr(admission.scheduler, "load", lambda: (1, 2, 2500.0))
+    admission.check()
+    time.sleep(0.03)
+    with pytest.raises(Overloaded) as shed:
+        admission.check()
+    assert shed.value.retry_after == 3
+    assert admission.stats()["shed"]["queue_delay"] == 1
+
+
+def test_sheds_when_too_many_in_flight(monkeypatch):
+    admission = controller(max_in_flight=3)
+    monkeypatch.setattr(admission.scheduler, "load", lambda: (1, 2, 0.0))
+    with pytest.raises(Overloaded, match="in flight"):
+        admission.check()
+    assert admission.stats()["shed"]["in_flight"] == 1
+
+
+def test_slot_timeout_is_shed():
+    scheduler = FairScheduler(capacity=1)
+    admission = controller(scheduler)
+    with scheduler.slot(Tenant("a")):
+        with pytest.raises(Overloaded, match="Timed out"):
+            with admission.slot(Tenant("b")):
+                pass
+    assert admission.stats()["shed"]["queue_timeout"] == 1
+
+
+def test_disabled_admits_everything(monkeypatch):
+    admission = controller(enabled=False, max_in_flight=1)
+    monkeypatch.setattr(admission.scheduler, "load", lambda: (5, 5, 9000.0))
+    assert admission.check() == ADMIT
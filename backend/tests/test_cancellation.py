@@ -0,0 +1,16 @@
+from utils.cancellation import CancellationRegistry, CancellationToken
+
+
+def test_only_the_owner_sees_and_cancels_a_session():
+    registry = CancellationRegistry()
+    token = CancellationToken()
+    registry.register("s1", token, "alice")
+
+    assert not registry.running("s1", "bob")
+    assert not registry.cancel("s1", owner="bob")
+    assert not token.cancelled
+
+    assert registry.running("s1", "alice")
+    assert registry.cancel("s1", owner="alice")
+    assert token.cancelled
+
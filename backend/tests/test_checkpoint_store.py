@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from services.checkpoint_store import COMPLETE, RUNNING, CheckpointBusy, CheckpointNotFound, CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"), heartbeat_seconds=60)
+    yield store
+    store.close()
+
+
+def other_worker(store):
+    """A second store on the same database, as another worker process would open it"""
+    other = CheckpointStore(store.path, heartbeat_seconds=60)
+    other.worker_id = "other-host:1"
+    return other
+
+
+def age(store, session_id, seconds):
+    store._conn.execute("UPDATE sessions SET heartbeat_at = ? WHERE session_id = ?", (time.time() - seconds, session_id))
+
+
+def test_running_session_cannot_be_claimed(store):
+    store.start("s1", "query", {})
+    with pytest.raises(CheckpointBusy):
+        store.claim("s1")
+    other = other_worker(store)
+    with pytest.raises(CheckpointBusy):
+        other.claim("s1")
+    other.close()
+
+
+def test_stale_lease_is_taken_over(store):
+    store.start("s1", "query", {"depth": 2})
+    store.save("s1", "plan", {"subtasks": [1, 2]})
+    age(store, "s1", store.lease_seconds + 1)
+    other = other_worker(store)
+    checkpoint = other.claim("s1")
+    assert checkpoint.owner == other.worker_id
+    assert checkpoint.status == RUNNING
+    assert checkpoint.stages == {"plan": {"subtasks": [1, 2]}}
+    # Now the new owner holds a live lease
+    with pytest.raises(CheckpointBusy):
+        store.claim("s1")
+    other.close()
+
+
+def test_interrupted_session_is_claimed_and_complete_is_returned_as_is(store):
+    store.start("s1", "query", {})
+    assert store.interrupt_owned() == ["s1"]
+    assert store.claim("s1").status == RUNNING
+
+    store.start("s2", "query", {})
+    store.finish("s2", COMPLETE)
+    assert store.claim("s2").status == COMPLETE
+    assert store.load("s2").status == COMPLETE
+
+
+def test_unknown_session(store):
+    with pytest.raises(CheckpointNotFound):
+        store.claim("missing")
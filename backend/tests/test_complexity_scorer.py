@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from agents.complexity_scorer import FEATURES, HeuristicComplexityScorer
+from config.settings import Settings
+
+
+@pytest.fixture
+def scorer(tmp_path):
+    return HeuristicComplexityScorer(str(tmp_path / "samples.jsonl"), str(tmp_path / "weights.json"))
+
+
+def test_estimate_near_a_whole_score_is_confident(scorer):
+    scorer.weights = {"bias": 3.0, **{name: 0.0 for name in FEATURES}}
+    estimate = scorer.estimate("anything")
+    assert estimate.complexity_score == 3
+    assert estimate.confidence == scorer.reliability
+
+
+def test_out_of_range_estimate_is_low_confidence(scorer):
+    scorer.weights = {"bias": 9.0, **{name: 0.0 for name in FEATURES}}
+    estimate = scorer.estimate("anything")
+    assert estimate.complexity_score == 5
+    assert estimate.confidence == 0.0
+    scorer.weights["bias"] = 5.2
+    assert scorer.estimate("anything").confidence == pytest.approx(scorer.reliability * 0.6, abs=1e-3)
+
+
+def test_recalibration_runs_in_the_background_and_rotates_the_log(scorer, monkeypatch):
+    monkeypatch.setattr(Settings, "HEURISTIC_RECALIBRATE_EVERY", 10)
+    monkeypatch.setattr(Settings, "HEURISTIC_MIN_SAMPLES", 5)
+    monkeypatch.setattr(Settings, "HEURISTIC_MAX_SAMPLES", 8)
+    queries = ["what is rust", "compare rust and go for web servers", "why did the economy of japan stall"]
+    for i in range(10):
+        scorer.record(queries[i % 3], [1, 3, 4][i % 3])
+    scorer._calibration.join(timeout=5)
+    with open(scorer.samples_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 8
+    with open(scorer.weights_path, encoding="utf-8") as f:
+        assert json.load(f)["samples"] == 8
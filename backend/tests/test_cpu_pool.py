@@ -0,0 +1,34 @@
+import pytest
+
+from agents.postprocessing import sanitize_report
+from utils.cpu_pool import CPUPool, CPUTaskError
+
+
+def test_unmeasured_stage_is_routed_by_payload_size():
+    pool = CPUPool(workers=2, min_task_ms=1, min_payload_bytes=1024)
+    assert not pool._offload(sanitize_report, b"x" * 1023)
+    assert pool._offload(sanitize_report, b"x" * 1024)
+
+
+def test_measured_stage_is_routed_by_predicted_cost():
+    pool = CPUPool(workers=2, min_task_ms=1, min_payload_bytes=1024)
+    # 0.5 ms for 1 KB: a 1 KB payload is predicted under the threshold, 4 KB over it
+    pool._measure(sanitize_report, b"x" * 1024, 0.0005)
+    assert not pool._offload(sanitize_report, b"x" * 1024)
+    assert pool._offload(sanitize_report, b"x" * 4096)
+    assert pool.stats()["cost_ms_per_kb"] == {"sanitize_report": 0.5}
+
+
+def test_no_workers_runs_inline():
+    pool = CPUPool(workers=0)
+    assert pool.run(sanitize_report, b"<b>hi</b>" * 5000).startswith(b"hihi")
+    assert pool.stats()["inline"] == 1
+    assert not pool.stats()["started"]
+
+
+def test_stage_errors_are_wrapped():
+    def broken(payload: bytes) -> bytes:
+        raise ValueError("bad input")
+
+    with pytest.raises(CPUTaskError, match="bad input"):
+        CPUPool(workers=0).run(broken, b"x")
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from utils.auth import Tenant
+from utils.cancellation import CancellationToken, Cancelled
+from utils.fair_scheduler import FairScheduler, QueueTimeout
+
+
+def enqueue(scheduler, granted, name, weight=1.0, max_concurrent=None):
+    """Queue a request whose grant appends it to granted"""
+    box = []
+    box.append(scheduler._enqueue(Tenant(name, weight, max_concurrent), lambda: granted.append(box)))
+
+
+def test_backlogged_tenants_share_slots_by_weight():
+    scheduler = FairScheduler(capacity=1)
+    granted = []
+    enqueue(scheduler, granted, "holder")
+    for _ in range(4):
+        enqueue(scheduler, granted, "heavy", weight=2.0)
+    for _ in range(2):
+        enqueue(scheduler, granted, "light")
+
+    order = []
+    while granted:
+        waiter = granted.pop(0)[0]
+        order.append(waiter.tenant)
+        scheduler._release(waiter, time.monotonic())
+    # Dispatched by finish tag: heavy's tags advance by 1/2, light's by 1
+    assert order == ["holder", "heavy", "heavy", "light", "heavy", "heavy", "light"]
+
+
+def test_max_concurrent_holds_back_a_tenant_with_free_slots():
+    scheduler = FairScheduler(capacity=3)
+    granted = []
+    enqueue(scheduler, granted, "capped", max_concurrent=1)
+    enqueue(scheduler, granted, "capped", max_concurrent=1)
+    enqueue(scheduler, granted, "other")
+    assert [box[0].tenant for box in granted] == ["capped", "other"]
+    assert scheduler.load()[:2] == (2, 1)
+
+
+def test_cancel_while_queued_leaves_the_queue():
+    scheduler = FairScheduler(capacity=1)
+    cancel = CancellationToken()
+    with scheduler.slot(Tenant("a")):
+        threading.Timer(0.05, cancel.cancel, args=("client left",)).start()
+        with pytest.raises(Cancelled):
+            with scheduler.slot(Tenant("b"), cancel):
+                pass
+        assert scheduler.load()[:2] == (1, 0)
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["by_tenant"]["b"]["cancelled_while_queued"] == 1
+
+
+def test_queue_timeout():
+    scheduler = FairScheduler(capacity=1)
+    with scheduler.slot(Tenant("a")):
+        with pytest.raises(QueueTimeout):
+            with scheduler.slot(Tenant("b"), max_wait=0.05):
+                pass
+    stats = scheduler.stats()
+    assert stats["queued"] == 0
+    assert stats["by_tenant"]["b"]["timed_out_in_queue"] == 1
+    # The freed slot is granted straight away afterwards
+    with scheduler.slot(Tenant("b"), max_wait=0.05):
+        assert scheduler.load()[0] == 1
@@ -0,0 +1,29 @@
+from agents.fetch_cache import SharedFetchCache
+
+
+def test_identical_searches_are_fetched_once():
+    cache = SharedFetchCache(4)
+    calls = []
+
+    def loader(query, count, cancel):
+        calls.append(query)
+        return ["result"], "exa"
+
+    assert cache.fetch("Rust  Memory", 2, loader) == (["result"], "exa")
+    assert cache.fetch("rust memory", 2, loader) == (["result"], "exa")
+    assert calls == ["Rust  Memory"]
+    assert cache.stats() == {"unique_searches": 1, "deduplicated_searches": 1}
+
+
+def test_empty_fetch_is_retried():
+    cache = SharedFetchCache(4)
+    responses = [([], "exa"), (["result"], "exa")]
+
+    def loader(query, count, cancel):
+        return responses.pop(0)
+
+    # A failed search (no results) is not shared with later queries
+    assert cache.fetch("rust", 2, loader) == ([], "exa")
+    assert cache.fetch("rust", 2, loader) == (["result"], "exa")
+    assert cache.fetch("rust", 2, loader) == (["result"], "exa")
+    assert responses == []
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from services.history_store import HistoryStore
+
+
+def report(session_id: str, query: str = "rust memory safety"):
+    return {"session_id": session_id, "query": query, "synthesis": f"{query} report", "subagents": 2, "total_sources": 4}
+
+
+@pytest.fixture
+def history(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+
+def test_reports_are_scoped_to_their_account(history):
+    history.save(report("a1"), "alice")
+    history.save(report("b1"), "bob")
+
+    assert history.get("a1", "alice")["session_id"] == "a1"
+    assert history.get("a1", "bob") is None
+    assert [item["session_id"] for item in history.list(10, account="bob")[0]] == ["b1"]
+    assert [item["session_id"] for item in history.search("rust", 10, account="alice")[0]] == ["a1"]
+    # Unscoped reads see everything
+    assert len(history.list(10)[0]) == 2
+
+
+def test_reports_from_before_accounts_become_anonymous(tmp_path):
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE reports (
+            id INTEGER PRIMARY KEY, session_id TEXT UNIQUE NOT NULL, query TEXT NOT NULL,
+            synthesis TEXT NOT NULL, model TEXT, subagents INTEGER NOT NULL,
+            total_sources INTEGER NOT NULL, created_at REAL NOT NULL, payload TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute("INSERT INTO reports VALUES (1, 'old', 'q', 's', NULL, 1, 1, 0, '{}')")
+    conn.commit()
+    conn.close()
+
+    history = HistoryStore(path)
+    assert history.get("old", "anonymous") == {}
+    assert history.get("old", "alice") is None
+
+
+def test_ready_fails_once_the_database_is_unusable(history):
+    assert history.ready()["ok"]
+    history._conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        history.ready()
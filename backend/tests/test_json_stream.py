@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from utils.json_stream import StreamingArrayParser, repair_json
+
+
+def test_fenced_json_with_prose_around_it():
+    text = 'Here is the plan:\n```json\n{"subtasks": [{"id": 1}]}\n```\nHope it helps {not json}'
+    assert json.loads(repair_json(text)) == {"subtasks": [{"id": 1}]}
+
+
+def test_trailing_commas_are_dropped():
+    assert json.loads(repair_json('{"a": [1, 2, ], "b": 3, }')) == {"a": [1, 2], "b": 3}
+
+
+def test_truncated_string_and_containers_are_closed():
+    assert json.loads(repair_json('{"subtasks": [{"id": 1, "focus": "rust own')) == {
+        "subtasks": [{"id": 1, "focus": "rust own"}]
+    }
+
+
+def test_malformed_tail_falls_back_to_last_complete_member():
+    assert json.loads(repair_json('{"subtasks": [{"id": 1}, {"id": 2, "focus":')) == {
+        "subtasks": [{"id": 1}, {"id": 2}]
+    }
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("I could not produce a plan for that.")
+
+
+def test_streaming_parser_emits_elements_as_they_close():
+    parser = StreamingArrayParser("subtasks")
+    chunks = ['```json\n{"reasoning": "two parts", "sub', 'tasks": [{"id": 1, "q": "a}"}', ", {\"id\": 2", '}]}']
+    emitted = [parser.feed(chunk) for chunk in chunks]
+    assert emitted == [[], [{"id": 1, "q": "a}"}], [], [{"id": 2}]]
+
+
+def test_streaming_parser_ignores_other_arrays():
+    parser = StreamingArrayParser("subtasks")
+    assert parser.feed('{"notes": [{"x": 1}], "subtasks": [{"id": 1, "tags": [{"t": 2}]}]}') == [
+        {"id": 1, "tags": [{"t": 2}]}
+    ]
@@ -0,0 +1,37 @@
+import json
+
+from agents.postprocessing import encode_sources, rank_sources, sanitize_report
+
+
+def sanitize(text: str) -> str:
+    return sanitize_report(text.encode("utf-8")).decode("utf-8")
+
+
+def test_sanitize_strips_html_and_unsafe_links():
+    report = 'Intro <b>bold</b><script>alert(1)</script> [x](javascript:alert(1)) [ok](https://a.b)'
+    assert sanitize(report) == "Intro bold x [ok](https://a.b)"
+
+
+def test_sanitize_keeps_fenced_code():
+    report = "Before <i>x</i>\n```html\n<div>kept</div>\n```\nAfter"
+    assert sanitize(report) == "Before x\n```html\n<div>kept</div>\n```\nAfter"
+
+
+def test_sanitize_keeps_inline_code_spans():
+    report = "Wrap it in `<div>` or ``a ` <span>b</span>``, not <span>this</span>."
+    assert sanitize(report) == "Wrap it in `<div>` or ``a ` <span>b</span>``, not this."
+
+
+def test_sanitize_cleans_prose_around_unclosed_backtick():
+    assert sanitize("A stray ` then <b>bold</b>") == "A stray ` then bold"
+
+
+def test_rank_sources_orders_by_relevance_and_drops_near_duplicates():
+    text = "rust borrow checker ownership rules explained with lifetimes and examples"
+    sources = [
+        {"title": "Cooking", "content": "pasta recipes with tomato sauce and basil for dinner"},
+        {"title": "Rust ownership", "content": text},
+        {"title": "Rust ownership copy", "content": text},
+    ]
+    payload = encode_sources("rust ownership", "borrow checker", sources, 0.8)
+    assert json.loads(rank_sources(payload))["keep"] == [1, 0]
@@ -0,0 +1,39 @@
+import gzip
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from api import responses
+
+
+class Report(BaseModel):
+    query: str
+    synthesis: str
+
+
+def test_negotiate_encoding_falls_back_to_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert responses.negotiate_encoding("br, gzip") == "gzip"
+    assert responses.negotiate_encoding("gzip;q=0, br") is None
+    assert responses.negotiate_encoding("*") == "gzip"
+    assert responses.negotiate_encoding("deflate") is None
+
+
+def test_compress_gzip_round_trips():
+    body = b'{"synthesis": "' + b"x" * 4096 + b'"}'
+    assert gzip.decompress(responses.compress(body, "gzip")) == body
+
+
+def test_json_bytes_restricts_fields():
+    report = Report(query="q", synthesis="s")
+    assert responses.json_bytes(report, {"query"}) == b'{"query":"q"}'
+    assert responses.json_bytes({"query": "q", "other": 1}, {"query"}).replace(b" ", b"") == b'{"query":"q"}'
+
+
+def test_parse_fields_rejects_unknown_names():
+    assert responses.parse_fields("query, synthesis", Report) == {"query", "synthesis"}
+    assert responses.parse_fields(None, Report) is None
+    with pytest.raises(HTTPException) as error:
+        responses.parse_fields("query,bogus", Report)
+    assert error.value.status_code == 400
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.cancellation import CancellationToken, Cancelled
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    joined = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(flight.do, "key", work, "session-1")
+        while not flight.in_flight():
+            pass
+        joiners = [pool.submit(flight.do, "key", work, None, joined.append) for _ in range(3)]
+        while len(joined) < 3:
+            pass
+        release.set()
+        assert leader.result() == ("answer", False)
+        assert [j.result() for j in joiners] == [("answer", True)] * 3
+
+    assert calls == [1]
+    assert joined == ["session-1"] * 3
+    assert flight.in_flight() == 0
+
+
+def test_leader_error_reaches_joiners():
+    flight = SingleFlight()
+    release = threading.Event()
+    joined = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", work)
+        while not flight.in_flight():
+            pass
+        joiner = pool.submit(flight.do, "key", work, None, lambda _: joined.set())
+        joined.wait(5)
+        release.set()
+        for future in (leader, joiner):
+            with pytest.raises(ValueError, match="upstream failed"):
+                future.result()
+
+
+def test_cancelled_joiner_stops_waiting_without_cancelling_the_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    joined = threading.Event()
+    cancel = CancellationToken()
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", lambda: release.wait(5) and "done")
+        while not flight.in_flight():
+            pass
+        joiner = pool.submit(flight.do, "key", lambda: "unused", None, lambda _: joined.set(), cancel)
+        joined.wait(5)
+        cancel.cancel("client left")
+        with pytest.raises(Cancelled):
+            joiner.result(timeout=5)
+        assert flight.in_flight() == 1
+        release.set()
+        assert leader.result() == ("done", False)
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.do("key", lambda: 2) == (2, False)
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.source_index import SourceIndex, match_expression
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SourceIndex(str(tmp_path / "sources.db"))
+
+
+def result(i: int):
+    return SimpleNamespace(url=f"https://example.com/{i}", title=f"Rust ownership {i}", text="rust memory safety " * 10)
+
+
+def test_match_expression_drops_stopwords_and_quotes_terms():
+    assert match_expression('What is the best "Rust" OR borrow checker?') == '"rust" AND "borrow" AND "checker"'
+
+
+def test_search_sees_flushed_writes(index):
+    assert index.search("rust memory", 5) == []
+    index.add_many([result(i) for i in range(3)])
+    index.flush()
+    assert len(index.search("rust memory", 5)) == 3
+    assert index.count() == 3
+
+
+def test_search_does_not_wait_for_the_writer(index):
+    index.add_many([result(1)])
+    index.flush()
+    # Searches read through their own connections, not the writer's lock
+    with index._lock:
+        assert len(index.search("rust ownership", 5)) == 1
+        assert index.ready()["ok"]
+
+
+def test_stale_sources_are_not_served(index):
+    index.add_many([result(1)])
+    index.flush()
+    assert index.search("rust", 5, max_age_seconds=-1) == []
+
+
+def test_close_writes_what_is_queued(tmp_path):
+    path = str(tmp_path / "sources.db")
+    index = SourceIndex(path)
+    index.add_many([result(i) for i in range(3)])
+    index.close()
+    index.add_many([result(4)])  # Ignored once closed
+    reopened = SourceIndex(path)
+    assert reopened.count() == 3
+    reopened.close()
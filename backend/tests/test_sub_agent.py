@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from agents.sub_agent import SubAgent
+from config.settings import Settings
+
+
+class ShortTextSearch:
+    """Search whose results are all too short to be usable"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query, num_results, cancel=None):
+        self.calls.append((query, num_results))
+        return [SimpleNamespace(url=f"https://{query}/{i}", title=query, text="short") for i in range(num_results)]
+
+
+def test_follow_up_asks_for_a_larger_page_first():
+    search = ShortTextSearch()
+    SubAgent(search).research(1, "rust", num_results=2, silent=True)
+    assert search.calls[:2] == [("rust", 2), ("rust", Settings.ADAPTIVE_MAX_BATCH)]
+    assert search.calls[2][0] == f"rust {Settings.ADAPTIVE_REFORMULATIONS[0]}"
+
+
+def test_follow_up_reformulates_when_the_first_page_was_already_the_largest():
+    search = ShortTextSearch()
+    SubAgent(search).research(1, "rust", num_results=Settings.ADAPTIVE_MAX_BATCH, silent=True)
+    queries = [query for query, _ in search.calls]
+    assert queries == ["rust"] + [f"rust {suffix}" for suffix in Settings.ADAPTIVE_REFORMULATIONS[:len(queries) - 1]]
@@ -0,0 +1,79 @@
+import json
+import socket
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.transport import ExaHTTPError, PooledExa, _DNSCache
+
+
+def test_dns_cache_resolves_once_per_ttl(monkeypatch):
+    lookups = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("203.0.113.7", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    cache = _DNSCache()
+    assert cache.resolve("api.example.com", 443) == "api.example.com"  # Not enabled yet
+    cache.enable(60)
+    assert cache.resolve("api.example.com", 443) == "203.0.113.7"
+    assert cache.resolve("api.example.com", 443) == "203.0.113.7"
+    assert lookups == ["api.example.com"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_dns_cache_leaves_addresses_and_failures_to_the_http_library(monkeypatch):
+    def getaddrinfo(host, port, *args, **kwargs):
+        raise socket.gaierror("unknown host")
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    cache = _DNSCache()
+    cache.enable(60)
+    assert cache.resolve("127.0.0.1", 80) == "127.0.0.1"
+    assert cache.resolve("[::1]", 80) == "[::1]"
+    assert cache.resolve("missing.example.com", 443) == "missing.example.com"
+
+
+class _StubAdapter(HTTPAdapter):
+    """Answers every request with a canned status and JSON body"""
+
+    def __init__(self, status_code: int, body: dict):
+        super().__init__()
+        self.status_code = status_code
+        self.body = body
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = json.dumps(self.body).encode()
+        response.request = request
+        return response
+
+
+def pooled_client(adapter):
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return PooledExa("test-key", session)
+
+
+def test_pooled_exa_sends_sdk_requests_through_the_session():
+    adapter = _StubAdapter(200, {"results": [], "requestId": "r1"})
+    client = pooled_client(adapter)
+    assert client.request("/search", {"query": "rust", "numResults": 2}) == {"results": [], "requestId": "r1"}
+    sent = adapter.sent[0]
+    assert sent.url == "https://api.exa.ai/search"
+    assert sent.headers["x-api-key"] == "test-key"
+    assert json.loads(sent.body) == {"query": "rust", "numResults": 2}
+
+
+def test_pooled_exa_keeps_the_status_code_of_errors():
+    client = pooled_client(_StubAdapter(503, {"error": "overloaded"}))
+    with pytest.raises(ExaHTTPError) as error:
+        client.request("/search", {"query": "rust"})
+    assert error.value.status_code == 503
+    assert isinstance(error.value, ValueError)
@@ -22,6 +22,8 @@ class ActivityEvent:
 class ActivityLogger:
     def __init__(self) -> None:
         self._lock = Lock()
+        # Loggers of coalesced requests that receive a copy of every update
+        self._mirrors: List[ActivityLogger] = []
         self.reset()
 
     def reset(self, query: Optional[str] = None) -> None:
@@ -32,15 +34,22 @@ class ActivityLogger:
             self.events: List[ActivityEvent] = []
             self.total_sources: int = 0
             self.subagents: Dict[int, Dict[str, Any]] = {}
+            for mirror in self._mirrors:
+                mirror.reset(query)
 
-    def complete(self) -> None:
+    def complete(self, status: str = "complete") -> None:
         with self._lock:
             self.active = False
-            self.status = "complete"
+            self.status = status
+            for mirror in self._mirrors:
+                mirror.complete(status)
+            self._mirrors = []
 
     def set_status(self, status: str) -> None:
         with self._lock:
             self.status = status
+            for mirror in self._mirrors:
+                mirror.set_status(status)
 
     def log(self, message: str, type: str = "info", data: Optional[Dict[str, Any]] = None) -> None:
         evt = ActivityEvent(
@@ -49,18 +58,42 @@ class ActivityLogger:
             message=message,
             data=data or {},
         )
+        self._append(evt)
+
+    def _append(self, evt: ActivityEvent) -> None:
         with self._lock:
             self.events.append(evt)
+            for mirror in self._mirrors:
+                mirror._append(evt)
 
     def update_subagent(self, subtask_id: int, **kwargs: Any) -> None:
         with self._lock:
             entry = self.subagents.get(subtask_id, {})
             entry.update(kwargs)
             self.subagents[subtask_id] = entry
+            for mirror in self._mirrors:
+                mirror.update_subagent(subtask_id, **kwargs)
 
     def add_sources(self, count: int) -> None:
         with self._lock:
             self.total_sources += max(0, int(count))
+            for mirror in self._mirrors:
+                mirror.add_sources(count)
+
+    def add_mirror(self, other: ActivityLogger) -> None:
+        """Copy current state into another logger and forward all later updates to it."""
+        if other is self:
+            return
+        with self._lock:
+            with other._lock:
+                other.active = self.active
+                other.query = self.query
+                other.status = self.status
+                other.events = list(self.events)
+                other.total_sources = self.total_sources
+                other.subagents = {k: dict(v) for k, v in self.subagents.items()}
+            if self.active:
+                self._mirrors.append(other)
 
     def snapshot(self) -> Dict[str, Any]:
         with self._lock:
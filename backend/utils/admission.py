@@ -0,0 +1,187 @@
+"""
+Admission control for research requests, driven by measured queue delay.
+Follows CoDel: the queue counts as overloaded once every request admitted over a
+whole interval waited longer than the target. While it is, new requests are
+switched to a cheaper research mode, or turned away outright when the backlog
+is far beyond the target, so latency stays bounded instead of growing without limit.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from threading import Lock
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from config.settings import Settings
+from utils.auth import Tenant
+from utils.cancellation import CancellationToken
+from utils.fair_scheduler import FairScheduler, QueueTimeout, research_scheduler
+from utils.metrics import metrics
+
+ADMIT = "admit"
+DEGRADE = "degrade"
+
+# Queue waits kept for the time-in-queue percentiles
+_WINDOW = 500
+
+
+class Overloaded(RuntimeError):
+    """A request was shed; the client should retry after retry_after seconds"""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """CoDel-style overload detection in front of the fair scheduler"""
+
+    def __init__(
+        self,
+        scheduler: FairScheduler,
+        target_ms: Optional[float] = None,
+        interval_ms: Optional[float] = None,
+        shed_ms: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        max_queue_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        """
+        Args:
+            scheduler: Scheduler whose queue delay is measured
+            target_ms: Acceptable queue delay; sustained delay above it means overload
+            interval_ms: How long the delay must stay above target before acting
+            shed_ms: Queue delay beyond which overloaded requests are shed, not degraded
+            max_in_flight: Running plus queued requests beyond which new ones are shed
+            max_queue_seconds: Longest a request may wait for a slot before it is shed
+            enabled: When False every request is admitted and may queue indefinitely
+        """
+        self.scheduler = scheduler
+        self.target_ms = target_ms or Settings.ADMISSION_TARGET_MS
+        self.interval_ms = interval_ms or Settings.ADMISSION_INTERVAL_MS
+        self.shed_ms = shed_ms or Settings.ADMISSION_SHED_MS
+        self.max_in_flight = max_in_flight or Settings.ADMISSION_MAX_IN_FLIGHT
+        self.max_queue_seconds = max_queue_seconds or Settings.ADMISSION_MAX_QUEUE_SECONDS
+        self.enabled = Settings.ADMISSION_ENABLED if enabled is None else enabled
+        self._lock = Lock()
+        # When the delay first exceeded the target (0 while below it)
+        self._above_since = 0.0
+        self._overloaded = False
+        self._waits_ms: Deque[float] = deque(maxlen=_WINDOW)
+        self.admitted = 0
+        self.degraded = 0
+        self.shed: Dict[str, int] = {"in_flight": 0, "queue_delay": 0, "queue_timeout": 0}
+        scheduler.add_wait_listener(self.observe)
+        metrics.register("admission", self.stats)
+
+    @property
+    def overloaded(self) -> bool:
+        with self._lock:
+            return self._overloaded
+
+    def observe(self, wait_ms: float) -> None:
+        """Record the queue wait of an admitted request"""
+        with self._lock:
+            self._waits_ms.append(wait_ms)
+            self._update(wait_ms, time.monotonic())
+
+    def check(self) -> str:
+        """
+        Decide how to run a new request.
+
+        Returns:
+            ADMIT, or DEGRADE to run it in the cheaper research mode
+
+        Raises:
+            Overloaded: If the request should be shed
+        """
+        if not self.enabled:
+            return ADMIT
+        running, queued, delay_ms = self.scheduler.load()
+        with self._lock:
+            # A stalled queue admits nobody, so the current head's wait counts as a
+            # sample too (and an empty queue clears the overload)
+            self._update(delay_ms, time.monotonic())
+            if running + queued >= self.max_in_flight:
+                self.shed["in_flight"] += 1
+                raise Overloaded("Too many research requests in flight", self._retry_after(delay_ms))
+            if not self._overloaded:
+                self.admitted += 1
+                return ADMIT
+            if delay_ms >= self.shed_ms:
+                self.shed["queue_delay"] += 1
+                raise Overloaded("Research queue delay too high", self._retry_after(delay_ms))
+            self.degraded += 1
+            return DEGRADE
+
+    @contextmanager
+    def slot(self, tenant: Tenant, cancel: Optional[CancellationToken] = None) -> Iterator[None]:
+        """
+        A fair scheduler slot that is shed if it is not granted in time.
+
+        Raises:
+            Cancelled: If cancel was cancelled while queued
+            Overloaded: If the request waited max_queue_seconds without a slot
+        """
+        try:
+            with self.scheduler.slot(tenant, cancel, max_wait=self._max_wait()):
+                yield
+        except QueueTimeout:
+            raise self._timed_out() from None
+
+    @asynccontextmanager
+    async def slot_async(self, tenant: Tenant, cancel: Optional[CancellationToken] = None) -> AsyncIterator[None]:
+        """Same as slot, but waits on the event loop instead of blocking a thread"""
+        try:
+            async with self.scheduler.slot_async(tenant, cancel, max_wait=self._max_wait()):
+                yield
+        except QueueTimeout:
+            raise self._timed_out() from None
+
+    def stats(self) -> Dict[str, Any]:
+        running, queued, oldest_ms = self.scheduler.load()
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            return {
+                "enabled": self.enabled,
+                "overloaded": self._overloaded,
+                "target_ms": self.target_ms,
+                "running": running,
+                "queued": queued,
+                "oldest_queued_ms": round(oldest_ms, 1),
+                "time_in_queue_ms_p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+                "time_in_queue_ms_p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 1) if waits else 0.0,
+                "admitted": self.admitted,
+                "degraded": self.degraded,
+                "shed": dict(self.shed),
+            }
+
+    def _update(self, wait_ms: float, now: float) -> None:
+        """CoDel state: overloaded once the delay stays above target for an interval (lock held)"""
+        if wait_ms < self.target_ms:
+            self._above_since = 0.0
+            self._overloaded = False
+        elif not self._above_since:
+            self._above_since = now
+        elif (now - self._above_since) * 1000 >= self.interval_ms:
+            self._overloaded = True
+
+    def _max_wait(self) -> Optional[float]:
+        return self.max_queue_seconds if self.enabled else None
+
+    def _timed_out(self) -> Overloaded:
+        with self._lock:
+            self.shed["queue_timeout"] += 1
+        return Overloaded("Timed out waiting for a research slot", self._retry_after(self.max_queue_seconds * 1000))
+
+    @staticmethod
+    def _retry_after(delay_ms: float) -> int:
+        """Seconds to suggest in Retry-After: about the current queue delay, within [1, 60]"""
+        return min(60, max(1, math.ceil(delay_ms / 1000)))
+
+
+# Global admission controller in front of the research scheduler
+admission = AdmissionController(research_scheduler)
@@ -2,24 +2,66 @@
 Authentication utilities for the API.
 """
 
+import hmac
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from fastapi import HTTPException, status, Header
-from typing import Optional
+from typing import Dict, Optional
 
 
-def verify_api_key(x_api_key: Optional[str] = Header(None)):
+@dataclass(frozen=True)
+class Tenant:
+    """A client identified by its API key, with its share of research capacity"""
+
+    name: str
+    weight: float = 1.0
+    max_concurrent: Optional[int] = None
+
+
+# Requests made while authentication is off (development, or no keys configured)
+ANONYMOUS = Tenant("anonymous")
+
+
+@lru_cache()
+def _parse_api_keys(raw: str, secret: str) -> Dict[str, Tenant]:
     """
-    Verify the API key from the X-API-Key header.
+    Map API keys to tenants.
+
+    API_KEYS is a comma-separated list of name:key[:weight[:max_concurrent]]
+    entries; the legacy API_SECRET is the "default" tenant with weight 1.
+    """
+    tenants = {}
+    if secret:
+        tenants[secret] = Tenant("default")
+    for entry in raw.split(","):
+        if not entry.strip():
+            continue
+        parts = [p.strip() for p in entry.split(":")]
+        if len(parts) < 2 or not parts[0] or not parts[1]:
+            raise ValueError(f"Invalid API_KEYS entry (expected name:key[:weight[:max_concurrent]]): {parts[0]!r}")
+        weight = float(parts[2]) if len(parts) > 2 and parts[2] else 1.0
+        max_concurrent = int(parts[3]) if len(parts) > 3 and parts[3] else None
+        if weight <= 0:
+            raise ValueError(f"API_KEYS weight for {parts[0]!r} must be positive")
+        tenants[parts[1]] = Tenant(parts[0], weight, max_concurrent)
+    return tenants
+
+
+def get_tenant(x_api_key: Optional[str] = Header(None)) -> Tenant:
+    """
+    Verify the API key from the X-API-Key header and return the tenant it belongs to.
     """
+    tenants = _parse_api_keys(os.getenv("API_KEYS", ""), os.getenv("API_SECRET", ""))
+    tenant = tenants.get(x_api_key) if x_api_key else None
+
     # Skip auth in development for ease of use
     if os.getenv("ENVIRONMENT") == "development":
-        return True
+        return tenant or ANONYMOUS
 
-    expected_key = os.getenv("API_SECRET")
-
-    # If no API_SECRET is set, skip authentication (for initial setup)
-    if not expected_key:
-        return True
+    # If no keys are configured, skip authentication (for initial setup)
+    if not tenants:
+        return ANONYMOUS
 
     if not x_api_key:
         raise HTTPException(
@@ -28,11 +70,43 @@ def verify_api_key(x_api_key: Optional[str] = Header(None)):
             headers={"WWW-Authenticate": "ApiKey"},
         )
 
-    if x_api_key != expected_key:
+    if tenant is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
             headers={"WWW-Authenticate": "ApiKey"},
         )
 
+    return tenant
+
+
+def verify_api_key(x_api_key: Optional[str] = Header(None)):
+    """
+    Verify the API key from the X-API-Key header.
+    """
+    get_tenant(x_api_key)
+    return True
+
+
+def verify_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """
+    Verify that the X-Admin-Key header holds ADMIN_API_KEY (profiling and memory
+    endpoints). Admin endpoints are closed unless ADMIN_API_KEY is set, except in development.
+    """
+    if os.getenv("ENVIRONMENT") == "development":
+        return True
+
+    admin_key = os.getenv("ADMIN_API_KEY", "")
+    if not admin_key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled. Set ADMIN_API_KEY to enable them.",
+        )
+
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API key required",
+        )
+
     return True
@@ -0,0 +1,156 @@
+"""
+Cooperative cancellation for research requests.
+A token is cancelled when the client disconnects or explicitly cancels; the
+pipeline checks it between steps and upstream calls abort on it.
+"""
+from __future__ import annotations
+
+from threading import Event, Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Cancelled(Exception):
+    """Raised when work is abandoned because its token was cancelled"""
+
+
+class CancellationToken:
+    """Thread-safe cancellation flag with callbacks that abort in-flight work"""
+
+    def __init__(self) -> None:
+        self._event = Event()
+        self._lock = Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """
+        Cancel the token and run its callbacks.
+
+        Returns:
+            True if this call cancelled it (False if it already was)
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Cancellation callback error: {e}")
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback when the token is cancelled (immediately if it already is).
+
+        Returns:
+            Function that unregisters the callback
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def child(self) -> "CancellationToken":
+        """Token cancelled along with this one that can also be cancelled on its own"""
+        child = CancellationToken()
+        self.on_cancel(lambda: child.cancel(self.reason or "cancelled"))
+        return child
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def _remove(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class SharedCancellation(CancellationToken):
+    """
+    Token for work shared by several callers (coalesced requests).
+
+    Cancelled only once every attached caller has cancelled; a caller
+    without a token keeps it alive for good.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._callers = 0
+        self._count_lock = Lock()
+
+    def attach(self, token: Optional[CancellationToken]) -> None:
+        with self._count_lock:
+            self._callers += 1
+        if token is not None:
+            token.on_cancel(self._detach)
+
+    def _detach(self) -> None:
+        with self._count_lock:
+            self._callers -= 1
+            abandoned = self._callers == 0
+        if abandoned:
+            self.cancel("all callers cancelled")
+
+
+class CancellationRegistry:
+    """Maps activity session ids to the tokens of their running requests and the tenants that own them"""
+
+    def __init__(self) -> None:
+        self._tokens: Dict[str, Tuple[CancellationToken, Optional[str]]] = {}
+        self._lock = Lock()
+
+    def register(self, session_id: str, token: CancellationToken, owner: Optional[str] = None) -> None:
+        with self._lock:
+            self._tokens[session_id] = (token, owner)
+
+    def unregister(self, session_id: str) -> None:
+        with self._lock:
+            self._tokens.pop(session_id, None)
+
+    def running(self, session_id: str, owner: Optional[str] = None) -> bool:
+        """Whether a request of this session (owned by owner, if given) is running in this worker"""
+        return self._token(session_id, owner) is not None
+
+    def cancel(self, session_id: str, reason: str = "cancelled by client", owner: Optional[str] = None) -> bool:
+        """
+        Cancel the running request of a session.
+
+        Args:
+            owner: Only cancel it if this tenant started it
+
+        Returns:
+            False if no request (of owner's) is running for the session
+        """
+        token = self._token(session_id, owner)
+        if token is None:
+            return False
+        token.cancel(reason)
+        return True
+
+    def cancel_all(self, reason: str) -> int:
+        """Cancel every running request (used at shutdown); returns how many were cancelled"""
+        with self._lock:
+            tokens = [token for token, _ in self._tokens.values()]
+        return sum(token.cancel(reason) for token in tokens)
+
+    def _token(self, session_id: str, owner: Optional[str]) -> Optional[CancellationToken]:
+        with self._lock:
+            entry = self._tokens.get(session_id)
+        if entry is None or (owner is not None and entry[1] != owner):
+            return None
+        return entry[0]
+
+
+# Global registry of cancellable requests
+cancellations = CancellationRegistry()
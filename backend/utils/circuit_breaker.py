@@ -0,0 +1,85 @@
+"""
+Circuit breaker for upstream APIs.
+After repeated failures calls fail fast for a cool-down period instead of waiting on timeouts.
+"""
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Any, Dict
+
+from utils.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe after the cool-down"""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float) -> None:
+        """
+        Args:
+            name: Upstream name used in metrics and readiness reports
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Cool-down before a single probe call is let through
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejected = 0
+        self._trips = 0
+        self._lock = Lock()
+        metrics.register(f"circuit.{name}", self.stats)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (half-open admits one probe at a time)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._trips += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "trips": self._trips,
+                "rejected": self._rejected,
+            }
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self._state
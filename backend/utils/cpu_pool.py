@@ -0,0 +1,217 @@
+"""
+Process pool for CPU-bound post-processing.
+Stages take and return bytes, so what crosses the process boundary is one
+compact buffer instead of a pickled object graph. Stages are routed by cost:
+each stage's measured CPU time per byte predicts what a payload will take, and
+tasks predicted to be cheap run inline, where IPC would cost more than the GIL
+time saved. Every offloaded task has a timeout after which the pool is recycled.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional
+
+from config.settings import Settings
+from utils.metrics import metrics
+
+# Task durations kept for the latency percentiles
+_WINDOW = 500
+# Weight of the newest measurement in a stage's cost estimate
+_COST_SMOOTHING = 0.2
+
+
+class CPUTaskError(RuntimeError):
+    """A post-processing stage failed; callers go on without its output"""
+
+
+class CPUTaskTimeout(CPUTaskError):
+    """A post-processing stage ran past its timeout"""
+
+
+class CPUPool:
+    """Process pool for bytes-in, bytes-out CPU stages, with saturation metrics"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        min_task_ms: Optional[float] = None,
+        min_payload_bytes: Optional[int] = None,
+        task_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            workers: Worker processes (0 runs every stage inline)
+            min_task_ms: Tasks predicted to take less CPU time than this run inline
+            min_payload_bytes: Payloads smaller than this run inline until their stage has been timed
+            task_timeout: Seconds an offloaded task may run
+        """
+        self.workers = Settings.CPU_POOL_WORKERS if workers is None else workers
+        self.min_task_ms = min_task_ms or Settings.CPU_POOL_MIN_TASK_MS
+        self.min_payload_bytes = min_payload_bytes or Settings.CPU_POOL_MIN_PAYLOAD_BYTES
+        self.task_timeout = task_timeout or Settings.CPU_POOL_TASK_TIMEOUT_SECONDS
+        # Measured CPU milliseconds per KB of payload, by stage
+        self._cost: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._peak_queued = 0
+        self._task_ms: Deque[float] = deque(maxlen=_WINDOW)
+        self._wait_ms: Deque[float] = deque(maxlen=_WINDOW)
+        self.offloaded = 0
+        self.inline = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.recycles = 0
+        metrics.register("cpu_pool", self.stats)
+
+    def run(self, fn: Callable[[bytes], bytes], payload: bytes, timeout: Optional[float] = None) -> bytes:
+        """
+        Run a stage on payload, in a worker process unless it is predicted to be cheap.
+
+        Args:
+            fn: Module-level function taking and returning bytes
+            payload: Encoded input
+            timeout: Overrides the pool's task timeout
+
+        Raises:
+            CPUTaskTimeout: If the offloaded task did not finish in time
+            CPUTaskError: If the stage raised or the pool broke
+        """
+        if not self._offload(fn, payload):
+            with self._lock:
+                self.inline += 1
+            started = time.perf_counter()
+            try:
+                result = fn(payload)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                raise CPUTaskError(f"{fn.__name__} failed: {e}") from e
+            self._measure(fn, payload, time.perf_counter() - started)
+            return result
+
+        submitted = time.monotonic()
+        with self._lock:
+            executor = self._ensure_executor()
+            self._in_flight += 1
+            self._peak_queued = max(self._peak_queued, self._in_flight - self.workers)
+            self.offloaded += 1
+        try:
+            future = executor.submit(_timed, fn, payload)
+            started, cpu_seconds, result = future.result(timeout=timeout or self.task_timeout)
+        except FuturesTimeout:
+            # The worker cannot be interrupted: replace the pool so it stops holding a process
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            self._recycle(executor)
+            raise CPUTaskTimeout(f"{fn.__name__} timed out after {timeout or self.task_timeout}s") from None
+        except BrokenProcessPool as e:
+            with self._lock:
+                self.errors += 1
+            self._recycle(executor)
+            raise CPUTaskError(f"{fn.__name__} failed: worker process died") from e
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            raise CPUTaskError(f"{fn.__name__} failed: {e}") from e
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        finished = time.monotonic()
+        with self._lock:
+            self._wait_ms.append(max(0.0, (started - submitted) * 1000))
+            self._task_ms.append((finished - submitted) * 1000)
+        self._measure(fn, payload, cpu_seconds)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = min(self._in_flight, self.workers)
+            durations = sorted(self._task_ms)
+            waits = sorted(self._wait_ms)
+            return {
+                "workers": self.workers,
+                "started": self._executor is not None,
+                "running": running,
+                "queued": max(0, self._in_flight - self.workers),
+                "peak_queued": self._peak_queued,
+                "utilization": round(running / self.workers, 3) if self.workers else 0.0,
+                "offloaded": self.offloaded,
+                "inline": self.inline,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "recycles": self.recycles,
+                "cost_ms_per_kb": {stage: round(cost, 4) for stage, cost in self._cost.items()},
+                "task_ms_p50": _percentile(durations, 0.5),
+                "task_ms_p95": _percentile(durations, 0.95),
+                "queue_wait_ms_p95": _percentile(waits, 0.95),
+            }
+
+    def _offload(self, fn: Callable[[bytes], bytes], payload: bytes) -> bool:
+        """Whether the task is predicted to cost enough CPU time to be worth the IPC"""
+        if self.workers <= 0:
+            return False
+        with self._lock:
+            cost = self._cost.get(fn.__name__)
+        if cost is None:
+            return len(payload) >= self.min_payload_bytes
+        return cost * len(payload) / 1024 >= self.min_task_ms
+
+    def _measure(self, fn: Callable[[bytes], bytes], payload: bytes, seconds: float) -> None:
+        """Fold a task's CPU time into its stage's cost estimate"""
+        if not payload:
+            return
+        cost = seconds * 1000 / (len(payload) / 1024)
+        with self._lock:
+            previous = self._cost.get(fn.__name__)
+            self._cost[fn.__name__] = cost if previous is None else previous + _COST_SMOOTHING * (cost - previous)
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        """The live executor, started on first use (lock held)"""
+        if self._executor is None:
+            # Spawned workers import only the stage modules, not the server's threads and clients
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Replace a broken or stuck executor, killing its workers"""
+        with self._lock:
+            if self._executor is not executor:
+                return  # Already replaced by another task
+            self._executor = None
+            self.recycles += 1
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+
+def _timed(fn: Callable[[bytes], bytes], payload: bytes) -> tuple:
+    """Worker-side wrapper that reports when the task actually started and how long it ran"""
+    started = time.monotonic()
+    result = fn(payload)
+    return started, time.monotonic() - started, result
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+
+# Global pool for the research pipeline's post-processing stages
+cpu_pool = CPUPool()
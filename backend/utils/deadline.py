@@ -0,0 +1,78 @@
+"""
+Latency budget tracking for deadline-aware research.
+Splits a request's budget across pipeline stages and records what was cut to meet it.
+"""
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+
+class Deadline:
+    """Wall-clock budget for one research request"""
+
+    def __init__(self, budget_ms: int, analysis_share: float, search_share: float) -> None:
+        """
+        Args:
+            budget_ms: Total latency budget in milliseconds
+            analysis_share: Fraction of the budget reserved for query analysis
+            search_share: Fraction of the budget reserved for subagent searches
+                (synthesis gets whatever remains after both)
+        """
+        self.budget_ms = budget_ms
+        self._start = time.monotonic()
+        self._end = self._start + budget_ms / 1000
+        self._analysis_end = self._start + budget_ms * analysis_share / 1000
+        self._search_end = self._start + budget_ms * (analysis_share + search_share) / 1000
+        self._cuts: List[str] = []
+        self._lock = Lock()
+
+    def remaining(self) -> float:
+        """Seconds left before the overall deadline (never negative)"""
+        return max(0.0, self._end - time.monotonic())
+
+    def analysis_remaining(self) -> float:
+        """Seconds left for the analysis stage"""
+        return max(0.0, self._analysis_end - time.monotonic())
+
+    def search_remaining(self) -> float:
+        """Seconds left for the search stage (unused analysis time carries over)"""
+        return max(0.0, self._search_end - time.monotonic())
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self._start) * 1000)
+
+    def cut(self, what: str) -> None:
+        """Record a degradation applied to stay within the budget"""
+        with self._lock:
+            if what not in self._cuts:
+                self._cuts.append(what)
+
+    @property
+    def cuts(self) -> List[str]:
+        with self._lock:
+            return list(self._cuts)
+
+    def report(self) -> Dict[str, Any]:
+        """Summary returned with the research result"""
+        elapsed = self.elapsed_ms()
+        cuts = self.cuts
+        return {
+            "deadline_ms": self.budget_ms,
+            "elapsed_ms": elapsed,
+            "met": elapsed <= self.budget_ms,
+            "degraded": bool(cuts),
+            "cuts": cuts,
+        }
+
+
+def stage_timeout(deadline: Optional[Deadline], stage: str) -> Optional[float]:
+    """Seconds left for a stage, or None when the request has no deadline"""
+    if deadline is None:
+        return None
+    return {
+        "analysis": deadline.analysis_remaining,
+        "search": deadline.search_remaining,
+        "synthesis": deadline.remaining,
+    }[stage]()
@@ -0,0 +1,263 @@
+"""
+Weighted fair queueing of research requests across tenants (API keys).
+A bounded number of research pipelines run at once; when requests queue, each
+tenant gets a share of the slots proportional to its weight, capped by its own
+concurrency limit, so a tenant with a deep backlog cannot starve the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from threading import Event, Lock
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import Settings
+from utils.auth import Tenant
+from utils.cancellation import CancellationToken, Cancelled
+from utils.metrics import metrics
+
+# Recent waits and service times kept per tenant for percentiles
+_WINDOW = 200
+
+
+class QueueTimeout(TimeoutError):
+    """A request waited longer than its max_wait for a slot"""
+
+
+class _Waiter:
+    def __init__(self, tenant: str, start_tag: float, finish_tag: float, grant: Callable[[], None]) -> None:
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.grant = grant
+        self.granted = False
+        self.enqueued = time.monotonic()
+
+
+class _TenantState:
+    def __init__(self, tenant: Tenant) -> None:
+        self.weight = tenant.weight
+        self.max_concurrent = tenant.max_concurrent
+        self.queue: Deque[_Waiter] = deque()
+        self.running = 0
+        self.last_finish = 0.0
+        self.admitted = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self.waits_ms: Deque[float] = deque(maxlen=_WINDOW)
+        self.service_ms: Deque[float] = deque(maxlen=_WINDOW)
+
+
+def _percentile(values: Deque[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+class FairScheduler:
+    """
+    Weighted fair queueing by virtual finish tag over per-tenant FIFO queues.
+
+    Each request is tagged on arrival with a start tag, the later of the
+    scheduler's virtual time and the tenant's previous finish tag, and a finish
+    tag, start + 1/weight. Free slots go to the eligible queued request with the
+    smallest finish tag, and the virtual time advances to the start tag of each
+    request granted. Backlogged tenants thus share slots in proportion to their
+    weights, and an idle tenant is served as soon as it arrives.
+    """
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        """
+        Args:
+            capacity: Research pipelines allowed to run at once (default from settings)
+        """
+        self.capacity = capacity or Settings.RESEARCH_MAX_CONCURRENT
+        self._lock = Lock()
+        self._running = 0
+        self._virtual_time = 0.0
+        self._tenants: Dict[str, _TenantState] = {}
+        self._wait_listeners: List[Callable[[float], None]] = []
+        metrics.register("tenants", self.stats)
+
+    def add_wait_listener(self, listener: Callable[[float], None]) -> None:
+        """Call listener with the queue wait in milliseconds of every admitted request"""
+        self._wait_listeners.append(listener)
+
+    def load(self) -> Tuple[int, int, float]:
+        """
+        Returns:
+            Tuple of (running, queued, milliseconds the oldest queued request has waited)
+        """
+        now = time.monotonic()
+        with self._lock:
+            heads = [state.queue[0].enqueued for state in self._tenants.values() if state.queue]
+            queued = sum(len(state.queue) for state in self._tenants.values())
+            return self._running, queued, (now - min(heads)) * 1000 if heads else 0.0
+
+    @contextmanager
+    def slot(
+        self, tenant: Tenant, cancel: Optional[CancellationToken] = None, max_wait: Optional[float] = None
+    ) -> Iterator[None]:
+        """
+        Hold a research slot for the block, blocking the calling thread until one is granted.
+
+        Args:
+            tenant: Tenant the request is queued and accounted under
+            cancel: Token that takes the request out of the queue
+            max_wait: Seconds to wait for a slot (None waits indefinitely)
+
+        Raises:
+            Cancelled: If cancel was cancelled while queued
+            QueueTimeout: If no slot was granted within max_wait
+        """
+        granted = Event()
+        waiter = self._enqueue(tenant, granted.set)
+        unregister = cancel.on_cancel(granted.set) if cancel is not None else (lambda: None)
+        try:
+            if not granted.wait(max_wait):
+                self._expire(waiter)
+        finally:
+            unregister()
+        self._admit_or_abandon(waiter, cancel)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(waiter, started)
+
+    @asynccontextmanager
+    async def slot_async(
+        self, tenant: Tenant, cancel: Optional[CancellationToken] = None, max_wait: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """Same as slot, but waits on the event loop instead of blocking a thread"""
+        loop = asyncio.get_running_loop()
+        granted = asyncio.Event()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(granted.set)
+
+        waiter = self._enqueue(tenant, wake)
+        unregister = cancel.on_cancel(wake) if cancel is not None else (lambda: None)
+        try:
+            await asyncio.wait_for(granted.wait(), max_wait)
+        except asyncio.TimeoutError:
+            self._expire(waiter)
+        except asyncio.CancelledError:
+            # The request task itself was aborted while queued
+            self._abandon(waiter)
+            raise
+        finally:
+            unregister()
+        self._admit_or_abandon(waiter, cancel)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(waiter, started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "running": self._running,
+                "queued": sum(len(state.queue) for state in self._tenants.values()),
+                "by_tenant": {
+                    name: {
+                        "weight": state.weight,
+                        "max_concurrent": state.max_concurrent,
+                        "running": state.running,
+                        "queue_depth": len(state.queue),
+                        "admitted": state.admitted,
+                        "cancelled_while_queued": state.cancelled,
+                        "timed_out_in_queue": state.timed_out,
+                        "wait_ms_p50": _percentile(state.waits_ms, 0.5),
+                        "wait_ms_p95": _percentile(state.waits_ms, 0.95),
+                        "latency_ms_p50": _percentile(state.service_ms, 0.5),
+                        "latency_ms_p95": _percentile(state.service_ms, 0.95),
+                    }
+                    for name, state in self._tenants.items()
+                },
+            }
+
+    def _enqueue(self, tenant: Tenant, grant: Callable[[], None]) -> _Waiter:
+        with self._lock:
+            state = self._tenants.get(tenant.name)
+            if state is None:
+                state = self._tenants[tenant.name] = _TenantState(tenant)
+            # Limits may have been reconfigured since the tenant was first seen
+            state.weight, state.max_concurrent = tenant.weight, tenant.max_concurrent
+            start_tag = max(self._virtual_time, state.last_finish)
+            waiter = _Waiter(tenant.name, start_tag, start_tag + 1.0 / state.weight, grant)
+            state.last_finish = waiter.finish_tag
+            state.queue.append(waiter)
+            self._dispatch()
+        return waiter
+
+    def _admit_or_abandon(self, waiter: _Waiter, cancel: Optional[CancellationToken]) -> None:
+        """After a wake-up: keep the slot, or give it back and raise if cancelled"""
+        if cancel is not None and cancel.cancelled:
+            self._abandon(waiter)
+            raise Cancelled(cancel.reason)
+        wait_ms = (time.monotonic() - waiter.enqueued) * 1000
+        with self._lock:
+            state = self._tenants[waiter.tenant]
+            state.admitted += 1
+            state.waits_ms.append(wait_ms)
+        for listener in self._wait_listeners:
+            listener(wait_ms)
+
+    def _expire(self, waiter: _Waiter) -> None:
+        """Leave the queue after max_wait, unless the slot was granted in the meantime"""
+        with self._lock:
+            if waiter.granted:
+                return
+            state = self._tenants[waiter.tenant]
+            state.timed_out += 1
+            state.queue.remove(waiter)
+        raise QueueTimeout(f"No research slot within {(time.monotonic() - waiter.enqueued):.1f}s")
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            state = self._tenants[waiter.tenant]
+            state.cancelled += 1
+            if waiter.granted:
+                state.running -= 1
+                self._running -= 1
+            else:
+                state.queue.remove(waiter)
+            self._dispatch()
+
+    def _release(self, waiter: _Waiter, started: float) -> None:
+        with self._lock:
+            state = self._tenants[waiter.tenant]
+            state.running -= 1
+            state.service_ms.append((time.monotonic() - started) * 1000)
+            self._running -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the eligible queue heads with the smallest finish tags (lock held)"""
+        while self._running < self.capacity:
+            best: Optional[_TenantState] = None
+            for state in self._tenants.values():
+                if not state.queue:
+                    continue
+                if state.max_concurrent is not None and state.running >= state.max_concurrent:
+                    continue
+                if best is None or state.queue[0].finish_tag < best.queue[0].finish_tag:
+                    best = state
+            if best is None:
+                return
+            waiter = best.queue.popleft()
+            waiter.granted = True
+            best.running += 1
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            waiter.grant()
+
+
+# Global scheduler in front of the research pipeline
+research_scheduler = FairScheduler()
@@ -0,0 +1,196 @@
+"""
+Tolerant JSON helpers for LLM output.
+Parses streamed completions incrementally and repairs fenced or truncated JSON.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(text: str) -> str:
+    """
+    Extract and repair the first JSON value in an LLM response.
+
+    Skips prose and Markdown fences before the value, ignores anything after it,
+    drops trailing commas, and closes strings and containers cut off by truncation.
+    When the tail is malformed, falls back to the last complete member.
+
+    Raises:
+        ValueError: If no JSON object or array can be recovered
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON value found in response")
+
+    out: List[str] = []
+    stack: List[str] = []
+    # Points where the value can be cut and closed: (output length, open containers)
+    cut_points: List[Tuple[int, Tuple[str, ...]]] = []
+    in_string = escape = False
+    complete = False
+
+    for ch in text[min(starts):]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in _CLOSERS:
+            stack.append(ch)
+            out.append(ch)
+            cut_points.append((len(out), tuple(stack)))
+        elif ch in "}]":
+            if not stack:
+                break
+            _strip_trailing_comma(out)
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                complete = True
+                break
+            cut_points.append((len(out), tuple(stack)))
+        elif ch == ",":
+            cut_points.append((len(out), tuple(stack)))
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    if complete:
+        return "".join(out)
+
+    # Truncated: close the open string and containers as-is first
+    tail = list(out)
+    if in_string:
+        if escape:
+            tail.pop()
+        tail.append('"')
+    _strip_trailing_comma(tail)
+    candidate = "".join(tail) + _close(stack)
+    if _parses(candidate):
+        return candidate
+
+    # Otherwise drop the partial member after the last cut point that yields valid JSON
+    for length, open_stack in reversed(cut_points):
+        head = out[:length]
+        _strip_trailing_comma(head)
+        candidate = "".join(head) + _close(list(open_stack))
+        if _parses(candidate):
+            return candidate
+
+    raise ValueError("Could not repair truncated JSON response")
+
+
+def _close(stack: List[str]) -> str:
+    return "".join(_CLOSERS[c] for c in reversed(stack))
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+class StreamingArrayParser:
+    """
+    Incrementally scans a streamed JSON object and emits each element of one
+    top-level array field (e.g. "subtasks") as soon as that element closes.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._stack: List[Dict[str, Any]] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._element_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume the next chunk of the completion.
+
+        Returns:
+            Array elements completed within this chunk, in order
+        """
+        self.text += chunk
+        completed: List[Any] = []
+
+        while self._pos < len(self.text):
+            i = self._pos
+            ch = self.text[i]
+            self._pos += 1
+
+            if not self._started:
+                # Skip prose and Markdown fences before the object
+                if ch == "{":
+                    self._started = True
+                    self._stack.append({"type": "{", "expect_key": True, "key": None, "target": False})
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    frame = self._stack[-1] if self._stack else None
+                    if frame and frame["type"] == "{" and frame["expect_key"]:
+                        frame["key"] = self.text[self._string_start + 1:i]
+                continue
+
+            if not self._stack:
+                continue
+            frame = self._stack[-1]
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and frame["type"] == "{":
+                frame["expect_key"] = False
+            elif ch == "," and frame["type"] == "{":
+                frame["expect_key"] = True
+            elif ch in _CLOSERS:
+                target = ch == "[" and len(self._stack) == 1 and frame["key"] == self.key
+                if ch == "{" and frame["target"]:
+                    self._element_start = i
+                self._stack.append({"type": ch, "expect_key": ch == "{", "key": None, "target": target})
+            elif ch in "}]":
+                self._stack.pop()
+                if ch == "}" and self._element_start is not None and self._stack and self._stack[-1]["target"]:
+                    element = self._parse_element(self.text[self._element_start:i + 1])
+                    if element is not None:
+                        completed.append(element)
+                    self._element_start = None
+
+        return completed
+
+    @staticmethod
+    def _parse_element(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError:
+            try:
+                return json.loads(repair_json(text))
+            except ValueError:
+                return None
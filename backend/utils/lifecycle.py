@@ -0,0 +1,85 @@
+"""
+Process lifecycle: startup timing, liveness and readiness.
+Readiness is the conjunction of registered checks once startup has completed,
+until the process starts draining for shutdown.
+"""
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Tuple
+
+from utils.metrics import metrics
+
+
+class Lifecycle:
+    """Tracks startup phases and answers liveness/readiness probes"""
+
+    def __init__(self) -> None:
+        # Imported first by the app, so this approximates process start
+        self.started = time.monotonic()
+        self._phases: Dict[str, int] = {}
+        self._checks: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._ready_at: float | None = None
+        self._draining_since: float | None = None
+        self._lock = Lock()
+        metrics.register("startup", self.startup_report)
+
+    def phase(self, name: str, started: float) -> int:
+        """Record how long a startup phase took since started (a monotonic timestamp)"""
+        elapsed = int((time.monotonic() - started) * 1000)
+        with self._lock:
+            self._phases[name] = elapsed
+        return elapsed
+
+    def register_check(self, name: str, check: Callable[[], Dict[str, Any]]) -> None:
+        """Add a readiness check returning a dict with at least an "ok" bool"""
+        with self._lock:
+            self._checks[name] = check
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self._ready_at = time.monotonic()
+
+    def begin_drain(self) -> None:
+        """Stop reporting ready so no new work is routed here while in-flight work finishes"""
+        with self._lock:
+            if self._draining_since is None:
+                self._draining_since = time.monotonic()
+
+    @property
+    def draining(self) -> bool:
+        with self._lock:
+            return self._draining_since is not None
+
+    def liveness(self) -> Dict[str, Any]:
+        return {"status": "alive", "uptime_seconds": round(time.monotonic() - self.started, 1)}
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Run every readiness check.
+
+        Returns:
+            Tuple of (ready, report) where report details each check
+        """
+        with self._lock:
+            started_up = self._ready_at is not None
+            draining = self._draining_since is not None
+            checks = dict(self._checks)
+        results = {}
+        for name, check in checks.items():
+            try:
+                results[name] = check()
+            except Exception as e:
+                results[name] = {"ok": False, "error": str(e)}
+        ready = started_up and not draining and all(r.get("ok") for r in results.values())
+        return ready, {"ready": ready, "startup_complete": started_up, "draining": draining, "checks": results}
+
+    def startup_report(self) -> Dict[str, Any]:
+        with self._lock:
+            total = int((self._ready_at - self.started) * 1000) if self._ready_at is not None else None
+            return {"phases_ms": dict(self._phases), "total_ms": total}
+
+
+# Global lifecycle state
+lifecycle = Lifecycle()
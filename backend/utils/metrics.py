@@ -0,0 +1,37 @@
+"""
+Process-wide metrics registry.
+Components register a collector and the /metrics endpoint reports their snapshots.
+"""
+from __future__ import annotations
+
+from threading import Lock
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    """Named collectors that each return a dict of current values"""
+
+    def __init__(self) -> None:
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = Lock()
+
+    def register(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Add (or replace) the collector reported under name"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current values of every registered collector"""
+        with self._lock:
+            collectors = dict(self._collectors)
+        report = {}
+        for name, collector in sorted(collectors.items()):
+            try:
+                report[name] = collector()
+            except Exception as e:
+                report[name] = {"error": str(e)}
+        return report
+
+
+# Global registry
+metrics = MetricsRegistry()
@@ -0,0 +1,333 @@
+"""
+Production profiling: a sampling profiler, an event-loop block detector and
+tracemalloc snapshots.
+Profiles are reported as collapsed stacks ("frame;frame;frame count" lines),
+which flamegraph.pl, speedscope and most flame graph viewers read directly.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.metrics import metrics
+from utils.threads import register_task_hook
+
+# Deeper stacks keep only their innermost frames
+_MAX_DEPTH = 128
+
+_current: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar("profile", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}:{frame.f_lineno}"
+
+
+def _collapse(frame, root: str) -> str:
+    """One sample as a collapsed stack, outermost frame first"""
+    labels = []
+    while frame is not None and len(labels) < _MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class Profile:
+    """
+    Sampling profiler over a set of threads.
+
+    A background thread reads the stacks of the profiled threads every interval
+    (sys._current_frames), so overhead is independent of how much code runs.
+    With all_threads=False only threads attached to the profile are sampled.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, all_threads: bool = False) -> None:
+        """
+        Args:
+            interval_ms: Time between samples
+            all_threads: Sample every thread of the process instead of attached ones
+        """
+        self.interval = interval_ms / 1000
+        self.all_threads = all_threads
+        self._threads: Dict[int, List[str]] = {}
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._elapsed = 0.0
+        self.samples = 0
+
+    def start(self) -> "Profile":
+        self._started = time.monotonic()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> "Profile":
+        if self._stop.is_set():
+            return self
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._elapsed = time.monotonic() - self._started
+        return self
+
+    @contextmanager
+    def attach(self, role: str) -> Iterator[None]:
+        """Sample the calling thread while the block runs, under a root frame named role"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.setdefault(ident, []).append(role)
+        try:
+            yield
+        finally:
+            with self._lock:
+                roles = self._threads[ident]
+                roles.pop()
+                if not roles:
+                    del self._threads[ident]
+
+    @contextmanager
+    def active(self) -> Iterator["Profile"]:
+        """Make this the profile that work spawned from the current context attaches to"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def folded(self) -> str:
+        """Collapsed stacks with sample counts, heaviest first"""
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def report(self, top: int = 25) -> Dict[str, Any]:
+        """Summary with the collapsed stacks and the functions most often on top of the stack"""
+        with self._lock:
+            stacks = dict(self._stacks)
+        own: Counter = Counter()
+        for stack, count in stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "duration_ms": int(self._elapsed * 1000),
+            "top_self": [{"frame": frame, "samples": count} for frame, count in own.most_common(top)],
+            "folded": self.folded(),
+        }
+
+    def _sample_loop(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                if self.all_threads:
+                    if len(names) != threading.active_count():
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    targets = {ident: names.get(ident, "thread") for ident in frames if ident != me}
+                else:
+                    targets = {ident: roles[-1] for ident, roles in self._threads.items()}
+                for ident, root in targets.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self._stacks[_collapse(frame, root)] += 1
+                        self.samples += 1
+
+
+def current_profile() -> Optional[Profile]:
+    """Profile of the request this code is working for, if it is being profiled"""
+    return _current.get()
+
+
+@contextmanager
+def profile_thread(role: str = "worker") -> Iterator[None]:
+    """Attach the calling thread to the active profile (if any) while the block runs"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    with profile.attach(role):
+        yield
+
+
+# Pool workers doing work for a profiled request are sampled with it
+register_task_hook(profile_thread)
+
+
+class LoopBlockDetector:
+    """
+    Watchdog for the asyncio event loop.
+
+    A task on the loop ticks every threshold/2; a watchdog thread that sees no tick
+    for longer than the threshold logs the stack the loop thread is stuck in
+    (once per blocking episode), so blocking calls on the loop can be found.
+    """
+
+    def __init__(self, threshold_ms: float) -> None:
+        """
+        Args:
+            threshold_ms: How long the loop may go without running its tasks
+        """
+        self.threshold = threshold_ms / 1000
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.blocks = 0
+        self.max_block_ms = 0.0
+        self.last_stack: Optional[str] = None
+        metrics.register("event_loop", self.stats)
+
+    def start(self) -> None:
+        """Start watching the running loop (call from a coroutine on it)"""
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        threading.Thread(target=self._watch, name="loop-block-detector", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "blocks": self.blocks,
+                "max_block_ms": round(self.max_block_ms, 1),
+                "last_stack": self.last_stack,
+            }
+
+    async def _tick(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            blocked_ms = (now - self._last_tick - self.threshold / 2) * 1000
+            with self._lock:
+                self.max_block_ms = max(self.max_block_ms, blocked_ms)
+            self._last_tick = now
+            await asyncio.sleep(self.threshold / 2)
+
+    def _watch(self) -> None:
+        reported = 0.0
+        while not self._stop.wait(self.threshold / 2):
+            last_tick = self._last_tick
+            if time.monotonic() - last_tick <= self.threshold or last_tick == reported:
+                continue
+            # Blocked: report the stack it is stuck in, once per episode
+            reported = last_tick
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(unavailable)"
+            with self._lock:
+                self.blocks += 1
+                self.last_stack = stack
+            print(f"⚠️ Event loop blocked for over {self.threshold * 1000:.0f} ms in:\n{stack}")
+
+
+class MemoryTracer:
+    """tracemalloc snapshots kept for diffing memory growth between points in time"""
+
+    def __init__(self, max_snapshots: int = 5) -> None:
+        """
+        Args:
+            max_snapshots: Snapshots kept; the oldest is dropped beyond it
+        """
+        self.max_snapshots = max_snapshots
+        self._snapshots: Dict[int, tracemalloc.Snapshot] = {}
+        self._taken_at: Dict[int, float] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def snapshot(self, frames: int = 1, limit: int = 25) -> Dict[str, Any]:
+        """
+        Take a snapshot, starting tracing first if needed (allocations made before
+        tracing started are not seen).
+
+        Returns:
+            {"snapshot_id", "traced_bytes", "peak_bytes", "top": largest allocation sites}
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            snapshot = self._filter(tracemalloc.take_snapshot())
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = snapshot
+            self._taken_at[snapshot_id] = time.time()
+            while len(self._snapshots) > self.max_snapshots:
+                oldest = min(self._snapshots)
+                del self._snapshots[oldest], self._taken_at[oldest]
+            current, peak = tracemalloc.get_traced_memory()
+        return {
+            "snapshot_id": snapshot_id,
+            "taken_at": self._taken_at[snapshot_id],
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"site": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("traceback" if frames > 1 else "lineno")[:limit]
+            ],
+        }
+
+    def diff(self, base_id: int, target_id: Optional[int] = None, limit: int = 25) -> Dict[str, Any]:
+        """
+        Allocation sites that grew the most between two snapshots.
+
+        Args:
+            base_id: Earlier snapshot
+            target_id: Later snapshot (default: the latest)
+
+        Raises:
+            KeyError: If a snapshot is unknown (never taken, or already dropped)
+        """
+        with self._lock:
+            if target_id is None:
+                target_id = max(self._snapshots, default=0)
+            base, target = self._snapshots[base_id], self._snapshots[target_id]
+        stats = target.compare_to(base, "lineno")
+        return {
+            "base_id": base_id,
+            "target_id": target_id,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "site": str(stat.traceback),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def stop(self) -> None:
+        """Stop tracing (it slows allocation) and drop the snapshots"""
+        with self._lock:
+            tracemalloc.stop()
+            self._snapshots.clear()
+            self._taken_at.clear()
+
+    @staticmethod
+    def _filter(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+
+# Global tracer behind the admin memory endpoints
+memory_tracer = MemoryTracer()
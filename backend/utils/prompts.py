@@ -51,4 +51,82 @@ RESEARCH QUALITY:
 - Sources analyzed: {total_sources} across {len(subagent_results)} specialized agents
 - Coverage: [How well the subtasks covered the topic]"""
         
-        return context
\ No newline at end of file
+        return context
+    
+    @staticmethod
+    def partial_summary_prompt(query: str, result: dict) -> str:
+        """Prompt for summarizing one subagent's sources (map step)"""
+        context = f"ORIGINAL QUERY: {query}\n\nSUBAGENT FOCUS: {result['search_focus']}\n\nSOURCES:\n"
+        
+        for source in result['sources']:
+            context += f"- {source['title']}: {source['content']}...\n"
+        
+        context += """
+
+As a Research Subagent, condense these sources into compact findings for the Lead Agent:
+
+KEY FINDINGS:
+- [3-5 bullet points of concrete facts, figures or claims, naming the source title]
+
+GAPS:
+- [What this focus area left unanswered, if anything]
+
+Be concise. Do not add information that is not in the sources."""
+        
+        return context
+    
+    @staticmethod
+    def reduce_prompt(query: str, partials: list, total_sources: int) -> str:
+        """Prompt for lead agent to synthesize per-subagent summaries (reduce step)"""
+        
+        context = f"ORIGINAL QUERY: {query}\n\nSUBAGENT SUMMARIES:\n"
+        
+        for partial in partials:
+            context += f"\nSubagent {partial['subtask']} ({partial['search_focus']}):\n{partial['summary']}\n"
+        
+        context += f"""
+
+As the Lead Agent, synthesize these subagent summaries into a comprehensive report:
+
+EXECUTIVE SUMMARY:
+[2-3 sentences covering the most important insights across all subagents]
+
+INTEGRATED FINDINGS:
+- [Key finding for each major focus area]
+- [Cross-cutting insight that emerged]
+
+RESEARCH QUALITY:
+- Sources analyzed: {total_sources} across {len(partials)} specialized agents
+- Coverage: [How well the subtasks covered the topic, noting reported gaps]"""
+        
+        return context
+    
+    @staticmethod
+    def refinement_prompt(query: str, prior: dict, subagent_results: list, total_sources: int) -> str:
+        """Prompt for lead agent to refine a prior report for a follow-up query"""
+        
+        context = f"FOLLOW-UP QUERY: {query}\n\nPREVIOUS QUERY: {prior['query']}\n\nPREVIOUS REPORT:\n{prior['synthesis']}\n\nFINDINGS FOR THE FOLLOW-UP:\n"
+        
+        for result in subagent_results:
+            origin = "reused" if result.get("reused") else "new"
+            context += f"\nSubagent {result['subtask']} ({result['search_focus']}, {origin}):\n"
+            for source in result['sources'][:2]:
+                context += f"- {source['title']}: {source['content']}...\n"
+        
+        context += f"""
+
+As the Lead Agent, build on the previous report to answer the follow-up query. Keep what still
+applies, focus on what the follow-up asks, and integrate the new findings:
+
+EXECUTIVE SUMMARY:
+[2-3 sentences answering the follow-up query]
+
+INTEGRATED FINDINGS:
+- [Key finding relevant to the follow-up, from the previous report or new research]
+- [What the new research adds or changes]
+
+RESEARCH QUALITY:
+- Sources analyzed: {total_sources} across {len(subagent_results)} specialized agents
+- Coverage: [How well the previous and new research cover the follow-up]"""
+        
+        return context
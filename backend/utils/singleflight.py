@@ -0,0 +1,87 @@
+"""
+Single-flight coalescing of concurrent identical calls.
+The first caller for a key runs the work; concurrent callers wait and share its result.
+"""
+from __future__ import annotations
+
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.cancellation import CancellationToken
+
+
+class _Call:
+    def __init__(self, context: Any) -> None:
+        self.done = Event()
+        self.context = context
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    # How often a waiting caller checks its cancellation token
+    CANCEL_POLL_SECONDS = 0.1
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        context: Any = None,
+        on_join: Optional[Callable[[Any], None]] = None,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the work being requested
+            fn: Zero-argument callable that performs the work
+            context: Leader-supplied value handed to joining callers (e.g. its session id)
+            on_join: Called with the leader's context when this caller joins an in-flight call
+            cancel: Lets a joining caller stop waiting (the leader's call keeps running)
+
+        Returns:
+            Tuple of (result, shared) where shared is True if another caller ran fn
+
+        Raises:
+            Cancelled: If cancel was cancelled while waiting on another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call(context)
+                self._calls[key] = call
+
+        if not leader:
+            if on_join is not None:
+                on_join(call.context)
+            if cancel is None:
+                call.done.wait()
+            while not call.done.wait(self.CANCEL_POLL_SECONDS):
+                cancel.raise_if_cancelled()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing"""
+        with self._lock:
+            return len(self._calls)
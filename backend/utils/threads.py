@@ -0,0 +1,37 @@
+"""
+Thread pools whose tasks carry the submitter's context.
+Per-request state kept in context variables (usage accounting, the active profile)
+follows work onto worker threads, and components can wrap every task in a hook.
+"""
+from __future__ import annotations
+
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from threading import Lock
+from typing import Any, Callable, ContextManager, List
+
+_hooks: List[Callable[[], ContextManager[Any]]] = []
+_lock = Lock()
+
+
+def register_task_hook(hook: Callable[[], ContextManager[Any]]) -> None:
+    """Run every ContextThreadPoolExecutor task inside hook(), entered in the task's context"""
+    with _lock:
+        _hooks.append(hook)
+
+
+def _run_hooked(fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    with _lock:
+        hooks = list(_hooks)
+    with ExitStack() as stack:
+        for hook in hooks:
+            stack.enter_context(hook())
+        return fn(*args, **kwargs)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks run in a copy of the submitter's context, inside the registered task hooks"""
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        return super().submit(contextvars.copy_context().run, _run_hooked, fn, *args, **kwargs)
@@ -0,0 +1,173 @@
+"""
+Token and search usage accounting.
+Each research run records its LLM tokens and Exa searches into a Usage carried in
+a context variable (so upstream calls anywhere in the pipeline find it), and the
+totals are aggregated per model, per API key and per session.
+"""
+from __future__ import annotations
+
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.metrics import metrics
+
+# Rough size of a token in English text, for estimates when the API reports none
+CHARS_PER_TOKEN = 4
+
+# Sessions whose totals are kept for GET /research/{session_id}/usage
+_MAX_SESSIONS = 10000
+
+_current: contextvars.ContextVar[Optional["Usage"]] = contextvars.ContextVar("usage", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _empty_totals() -> Dict[str, int]:
+    return {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "search_calls": 0,
+        "search_results": 0,
+    }
+
+
+def _add(totals: Dict[str, int], other: Dict[str, int]) -> None:
+    for key, value in other.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+class Usage:
+    """Upstream usage of one research run"""
+
+    def __init__(self, account: str = "anonymous", token_budget: Optional[int] = None) -> None:
+        """
+        Args:
+            account: API key (tenant) the usage is billed to
+            token_budget: Tokens the run may spend (None for no limit)
+        """
+        self.account = account
+        self.token_budget = token_budget
+        self._lock = Lock()
+        self._totals = _empty_totals()
+        self._by_model: Dict[str, Dict[str, int]] = {}
+        self._cuts: List[str] = []
+        self.estimated = False
+
+    @contextmanager
+    def scope(self) -> Iterator["Usage"]:
+        """Make this the usage that upstream calls in the current context record into"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def record_llm(self, model: str, prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> None:
+        call = {
+            "llm_calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        with self._lock:
+            _add(self._totals, call)
+            _add(self._by_model.setdefault(model, {}), call)
+            self.estimated = self.estimated or estimated
+
+    def record_search(self, results: int) -> None:
+        with self._lock:
+            _add(self._totals, {"search_calls": 1, "search_results": results})
+
+    def cut(self, what: str) -> None:
+        """Record a reduction applied to stay within the token budget"""
+        with self._lock:
+            if what not in self._cuts:
+                self._cuts.append(what)
+
+    @property
+    def cuts(self) -> List[str]:
+        with self._lock:
+            return list(self._cuts)
+
+    @property
+    def total_tokens(self) -> int:
+        with self._lock:
+            return self._totals["total_tokens"]
+
+    def remaining_tokens(self) -> Optional[int]:
+        """Tokens left in the budget (None without a budget)"""
+        if self.token_budget is None:
+            return None
+        return max(0, self.token_budget - self.total_tokens)
+
+    def report(self) -> Dict[str, Any]:
+        """The usage block returned with a research result"""
+        with self._lock:
+            return {
+                **self._totals,
+                "by_model": {model: dict(totals) for model, totals in self._by_model.items()},
+                "token_budget": self.token_budget,
+                "budget_cuts": list(self._cuts),
+                "estimated": self.estimated,
+            }
+
+
+def current_usage() -> Optional[Usage]:
+    """Usage of the research run this code is working for, if any"""
+    return _current.get()
+
+
+class UsageLedger:
+    """Usage totals per model, per API key and per (recent) session"""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._by_model: Dict[str, Dict[str, int]] = {}
+        self._by_account: Dict[str, Dict[str, int]] = {}
+        self._by_session: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        # API key each tracked session belongs to
+        self._session_accounts: Dict[str, str] = {}
+        metrics.register("usage", self.stats)
+
+    def add(self, usage: Usage, session_id: Optional[str]) -> None:
+        """Fold a finished run into the totals (a resumed session adds to its own)"""
+        report = usage.report()
+        totals = {key: report[key] for key in _empty_totals()}
+        with self._lock:
+            for model, model_totals in report["by_model"].items():
+                _add(self._by_model.setdefault(model, {}), model_totals)
+            _add(self._by_account.setdefault(usage.account, _empty_totals()), totals)
+            if session_id:
+                _add(self._by_session.setdefault(session_id, _empty_totals()), totals)
+                self._by_session.move_to_end(session_id)
+                self._session_accounts.setdefault(session_id, usage.account)
+                while len(self._by_session) > _MAX_SESSIONS:
+                    evicted, _ = self._by_session.popitem(last=False)
+                    self._session_accounts.pop(evicted, None)
+
+    def session(self, session_id: str, account: Optional[str] = None) -> Optional[Dict[str, int]]:
+        """Totals of a session, or None if it is unknown (or, given account, belongs to another API key)"""
+        with self._lock:
+            totals = self._by_session.get(session_id)
+            if totals is None or (account is not None and self._session_accounts.get(session_id) != account):
+                return None
+            return dict(totals)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "by_model": {model: dict(totals) for model, totals in self._by_model.items()},
+                "by_api_key": {account: dict(totals) for account, totals in self._by_account.items()},
+                "sessions_tracked": len(self._by_session),
+            }
+
+
+# Global ledger
+usage_ledger = UsageLedger()
@@ -100,6 +100,9 @@ export const ActivityFeed = ({ isLoading = false, sessionId }: ActivityFeedProps
                 {info.sources ?? 0}/{info.requested ?? ""} sources
               </span>
             </div>
+            {info.summary && (
+              <p className="mt-2 text-xs whitespace-pre-line">{info.summary}</p>
+            )}
           </div>
         ))}
       </div>
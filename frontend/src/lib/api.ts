@@ -89,7 +89,7 @@ export interface ActivityState {
   query?: string;
   status: string;
   total_sources: number;
-  subagents: Record<number, { status?: string; search_focus?: string; sources?: number; requested?: number; rationale?: string }>;
+  subagents: Record<number, { status?: string; search_focus?: string; sources?: number; requested?: number; rationale?: string; summary?: string }>;
   events: ActivityEvent[];
   progress: number;
   current_phase: string;